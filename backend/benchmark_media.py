@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+视频Range请求压测脚本
+
+模拟移动端频繁拖动进度条：多个并发客户端对同一视频发起随机区间的Range请求，
+统计吞吐量、延迟分位数，以及按worker数估算的worker占用率
+（所有请求耗时之和 / (总耗时 × worker数)，越低说明发送越不占用worker；
+客户端排队时间也计入其中，超过100%说明请求在排队）。
+
+用法:
+    # 先启动服务，例如 gunicorn src.api_server:app --workers 3
+    python benchmark_media.py --url http://localhost:5002/static/videos/dark.mp4 \
+        --concurrency 32 --requests 500 --workers 3
+
+对比不同发送方式时，分别以 MEDIA_OFFLOAD 为空（sendfile）、x-accel（nginx）启动服务后运行本脚本。
+"""
+import argparse
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch_size(url):
+    """通过HEAD请求获取文件大小"""
+    req = urllib.request.Request(url, method='HEAD')
+    with urllib.request.urlopen(req) as resp:
+        if resp.headers.get('Accept-Ranges') != 'bytes':
+            print("警告: 服务端未返回 Accept-Ranges: bytes")
+        return int(resp.headers['Content-Length'])
+
+
+def seek_once(url, file_size, chunk_size):
+    """随机定位并读取一个区间，返回(耗时秒, 字节数, 状态码)"""
+    start = random.randrange(0, max(file_size - 1, 1))
+    end = min(start + chunk_size - 1, file_size - 1)
+    req = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}'})
+    began = time.perf_counter()
+    with urllib.request.urlopen(req) as resp:
+        body = resp.read()
+        status = resp.status
+    return time.perf_counter() - began, len(body), status
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(len(values) * pct / 100), len(values) - 1)
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='视频Range请求压测')
+    parser.add_argument('--url', default='http://localhost:5002/static/videos/dark.mp4')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发客户端数')
+    parser.add_argument('--requests', type=int, default=200, help='请求总数')
+    parser.add_argument('--chunk-size', type=int, default=1024 * 1024, help='每次Range读取的字节数')
+    parser.add_argument('--workers', type=int, default=1, help='服务端worker数，用于计算占用率')
+    args = parser.parse_args()
+
+    file_size = fetch_size(args.url)
+    print(f"目标: {args.url} ({file_size} 字节)")
+
+    latencies = []
+    total_bytes = 0
+    bad_status = 0
+    lock = threading.Lock()
+
+    def task(_):
+        nonlocal total_bytes, bad_status
+        elapsed, size, status = seek_once(args.url, file_size, args.chunk_size)
+        with lock:
+            latencies.append(elapsed)
+            total_bytes += size
+            if status != 206:
+                bad_status += 1
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(task, range(args.requests)))
+    wall = time.perf_counter() - began
+
+    busy = sum(latencies)
+    print(f"请求数: {len(latencies)}，非206响应: {bad_status}")
+    print(f"总耗时: {wall:.2f}s，吞吐量: {total_bytes / wall / 1024 / 1024:.2f} MB/s，{len(latencies) / wall:.1f} req/s")
+    print(f"延迟 p50: {percentile(latencies, 50) * 1000:.1f}ms，"
+          f"p95: {percentile(latencies, 95) * 1000:.1f}ms，p99: {percentile(latencies, 99) * 1000:.1f}ms")
+    print(f"worker占用率: {busy / (wall * args.workers) * 100:.1f}%（按{args.workers}个worker计算）")
+
+
+if __name__ == '__main__':
+    main()
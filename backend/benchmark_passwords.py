@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+密码哈希压测脚本
+
+1. 本地模式（默认）：在多个进程中反复校验密码，报告每种哈希参数下每秒登录数和单核每秒登录数，
+   用于选择 PASSWORD_HASH_METHOD：
+    python benchmark_passwords.py --methods scrypt:32768:8:1,scrypt:16384:8:1,pbkdf2:sha256:600000
+
+2. 接口模式：对运行中的服务并发调用登录接口，统计整体吞吐量和延迟：
+    python benchmark_passwords.py --url http://localhost:5002/api/auth/login \
+        --username admin --password admin123 --concurrency 16 --requests 200 --workers 3
+"""
+import argparse
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD = 'benchmark-password'
+
+
+def verify_for(password_hash, seconds):
+    """在当前进程中持续校验密码 seconds 秒，返回校验次数"""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        check_password_hash(password_hash, PASSWORD)
+        count += 1
+    return count
+
+
+def bench_method(method, processes, seconds):
+    password_hash = generate_password_hash(PASSWORD, method=method)
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        counts = list(pool.map(verify_for, [password_hash] * processes, [seconds] * processes))
+    wall = time.perf_counter() - began
+    total = sum(counts)
+    return total / wall, total / wall / processes, seconds * processes / total * 1000
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def bench_http(args):
+    body = json.dumps({'username': args.username, 'password': args.password}).encode('utf-8')
+
+    def login(_):
+        req = urllib.request.Request(args.url, data=body, headers={'Content-Type': 'application/json'})
+        began = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        return time.perf_counter() - began, status
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(login, range(args.requests)))
+    wall = time.perf_counter() - began
+
+    latencies = [elapsed for elapsed, _ in results]
+    failed = sum(1 for _, status in results if status != 200)
+    print(f"请求数: {len(results)}，失败: {failed}")
+    print(f"吞吐量: {len(results) / wall:.1f} 登录/秒，按{args.workers}个worker计算每worker {len(results) / wall / args.workers:.1f} 登录/秒")
+    print(f"延迟 p50: {percentile(latencies, 50) * 1000:.1f}ms，"
+          f"p95: {percentile(latencies, 95) * 1000:.1f}ms，p99: {percentile(latencies, 99) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='密码哈希压测')
+    parser.add_argument('--methods', default='scrypt:32768:8:1,scrypt:16384:8:1,pbkdf2:sha256:600000,pbkdf2:sha256:260000',
+                        help='逗号分隔的哈希参数（werkzeug格式）')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='本地模式的进程数')
+    parser.add_argument('--seconds', type=float, default=3, help='本地模式每种参数的测试时间（秒）')
+    parser.add_argument('--url', help='登录接口地址，指定时使用接口模式')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--concurrency', type=int, default=16, help='接口模式的并发数')
+    parser.add_argument('--requests', type=int, default=200, help='接口模式的请求总数')
+    parser.add_argument('--workers', type=int, default=1, help='服务端worker数，用于计算每worker吞吐量')
+    args = parser.parse_args()
+
+    if args.url:
+        bench_http(args)
+        return
+
+    print(f"进程数: {args.processes}，每种参数测试 {args.seconds:g} 秒")
+    print(f"{'哈希参数':<28}{'登录/秒':>10}{'单核登录/秒':>14}{'单次耗时(ms)':>14}")
+    for method in args.methods.split(','):
+        method = method.strip()
+        total_rate, per_core, latency_ms = bench_method(method, args.processes, args.seconds)
+        print(f"{method:<28}{total_rate:>10.1f}{per_core:>14.1f}{latency_ms:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
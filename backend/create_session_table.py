@@ -0,0 +1,10 @@
+from src.models.database import db, ServerSession
+from src.main import app
+
+# 创建服务端会话表（SESSION_BACKEND=server 时需要，已存在时跳过）
+with app.app_context():
+    try:
+        ServerSession.__table__.create(db.engine, checkfirst=True)
+        print("成功创建server_sessions表")
+    except Exception as e:
+        print(f"创建server_sessions表失败: {e}")
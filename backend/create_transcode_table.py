@@ -0,0 +1,10 @@
+from src.models.database import db, TranscodeJob
+from src.main import app
+
+# 创建视频转码任务表（已存在时跳过）
+with app.app_context():
+    try:
+        TranscodeJob.__table__.create(db.engine, checkfirst=True)
+        print("成功创建transcode_jobs表")
+    except Exception as e:
+        print(f"创建transcode_jobs表失败: {e}")
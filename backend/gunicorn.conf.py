@@ -0,0 +1,104 @@
+"""
+gunicorn配置
+
+在backend目录下执行 `gunicorn src.api_server:app` 时自动读取本文件（也可用 -c gunicorn.conf.py 指定）。
+所有参数都可以通过环境变量调整：
+
+- GUNICORN_WORKER_CLASS：'gthread'（默认，每个worker多个线程）、'gevent'（协程，需要安装gevent，
+  并建议安装psycogreen让数据库查询不阻塞其他协程）或 'sync'
+- WEB_CONCURRENCY：worker进程数，默认 CPU核数×2+1；GUNICORN_THREADS：gthread每个worker的线程数，默认4；
+  GUNICORN_WORKER_CONNECTIONS：gevent每个worker的最大并发连接数，默认100
+- GUNICORN_PRELOAD：在主进程中加载应用后再fork出worker，启动更快、内存共享更多；gthread/sync默认开启。
+  gevent默认关闭（worker启动后才打猴子补丁，预加载时创建的锁不是协程安全的）
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER：worker处理这么多请求后自动重启，避免内存缓慢增长
+- GUNICORN_KEEPALIVE：keep-alive连接的空闲等待秒数；GUNICORN_TIMEOUT：worker无响应多少秒后被重启
+
+WEB_CONCURRENCY 和 GUNICORN_THREADS 同时用于确定每个worker的数据库连接池大小（见 src/utils/db_engine.py）。
+预加载时数据库预热（DB_WARMUP）不在主进程中进行，改为每个worker初始化后各自预热。
+设置 PROMETHEUS_MULTIPROC_DIR 时启动前清空该目录，worker退出时清理它的指标文件。
+"""
+
+import multiprocessing
+import os
+import shutil
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread').lower()
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5002)}")
+preload_app = os.environ.get(
+    'GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true'
+).lower() in ('1', 'true', 'yes')
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# worker心跳文件放在内存文件系统中，避免磁盘IO阻塞时worker被误判为无响应
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+# 应用按这两个值确定每个worker的连接池大小；gevent下一个worker同时处理 worker_connections 个请求，
+# 连接池默认最多按10个并发计算，其余请求排队等待连接（可用 DB_POOL_SIZE 调整）
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(min(worker_connections, 10) if worker_class == 'gevent' else threads)
+
+# 预加载时主进程建立的连接在post_fork中被丢弃，主进程中不预热数据库，由 post_worker_init 在每个worker中预热
+db_warmup = os.environ.get('DB_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+if preload_app:
+    os.environ['DB_WARMUP'] = 'false'
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+    server.log.info("worker: %s × %d, threads=%d, preload=%s, max_requests=%d",
+                    worker_class, workers, threads, preload_app, max_requests)
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            worker.log.warning("未安装psycogreen，gevent worker中的数据库查询会阻塞其他请求")
+    if not preload_app:
+        return
+    # 预加载时父进程可能已经建立了数据库连接和密码哈希进程池，子进程不能共用
+    from src.models.database import db
+    from src.utils.db_engine import dispose_engines
+    from src.utils.passwords import shutdown_pool
+
+    dispose_engines(server.app.wsgi(), db)
+    shutdown_pool()
+
+
+def post_worker_init(worker):
+    # worker初始化信号时把SIGHUP恢复为默认处理（结束进程），预加载时需要重新注册重新加载index.html的处理函数
+    from src.utils.index_cache import install_reload_signal
+    install_reload_signal()
+
+    if preload_app and db_warmup:
+        from src.models.database import db
+        from src.utils.startup import warm_up_worker
+        warm_up_worker(worker.wsgi, db)
+
+
+def child_exit(server, worker):
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,82 @@
+"""add indexes for hot query predicates
+
+预约时间段名额、用户预约、活动报名、活动/新闻列表和用户列表的查询条件索引。
+已有的表由 db.create_all() 和 create_*_table.py 创建，这是第一个迁移，只添加索引。
+PostgreSQL上使用 CREATE INDEX CONCURRENTLY，建索引期间不阻塞写入；索引已存在时跳过。
+建索引时不限制语句超时；上次中断留下的无效索引会先删除再重建。
+
+Revision ID: 3f1c2a7b9d10
+Revises:
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_APPOINTMENT_STATUSES = sa.text("status IN ('pending', 'confirmed')")
+
+# (索引名, 表名, 列, 额外参数)
+INDEXES = [
+    ('ix_appointments_date_time_slot_status', 'appointments', ['date', 'time_slot', 'status'], {}),
+    ('ix_appointments_user_id_date', 'appointments', ['user_id', 'date'], {}),
+    ('ix_appointments_active_slot', 'appointments', ['date', 'time_slot'], {
+        'postgresql_where': ACTIVE_APPOINTMENT_STATUSES,
+        'postgresql_include': ['visitor_count'],
+        'sqlite_where': ACTIVE_APPOINTMENT_STATUSES,
+    }),
+    ('ix_registrations_activity_id_user_id_status', 'registrations', ['activity_id', 'user_id', 'status'], {}),
+    ('ix_registrations_user_id', 'registrations', ['user_id'], {}),
+    ('ix_activities_start_time', 'activities', ['start_time'], {}),
+    ('ix_activities_status_category_start_time', 'activities', ['status', 'category', 'start_time'], {}),
+    ('ix_News_createdAt', 'News', ['createdAt'], {}),
+    ('ix_News_category_createdAt', 'News', ['category', 'createdAt'], {}),
+    ('ix_users_created_at', 'users', ['created_at'], {}),
+]
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _drop_invalid_indexes():
+    """删除上次 CREATE INDEX CONCURRENTLY 中断后留下的无效索引（indisvalid = false），
+    否则 IF NOT EXISTS 会一直跳过它们，查询永远用不上"""
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+    ), {'names': [name for name, _, _, _ in INDEXES]}).scalars().all()
+    for name, table, _, _ in INDEXES:
+        if name in invalid:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def upgrade():
+    concurrently = _is_postgresql()
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        if concurrently:
+            # 连接参数中的 statement_timeout（DB_STATEMENT_TIMEOUT_MS）会中断大表上的建索引
+            op.execute('SET statement_timeout = 0')
+            _drop_invalid_indexes()
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True,
+                            postgresql_concurrently=concurrently, **kwargs)
+    if concurrently:
+        for table in sorted({table for _, table, _, _ in INDEXES}):
+            op.execute(f'ANALYZE "{table}"')
+
+
+def downgrade():
+    concurrently = _is_postgresql()
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True,
+                          postgresql_concurrently=concurrently)
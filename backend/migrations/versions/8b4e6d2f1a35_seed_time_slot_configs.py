@@ -0,0 +1,58 @@
+"""seed default time slot configs
+
+写入默认的预约时间段。以前每次启动应用时都会检查并修改 time_slot_configs，
+现在启动时不再写数据库，改由这个迁移在表为空时写入一次；已有配置时不插入任何数据。
+同时把已有时间段一次性改为允许周末预约（以前每次启动都会这样修改），之后管理员的修改不会再被覆盖。
+
+Revision ID: 8b4e6d2f1a35
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2f1a35'
+down_revision = '3f1c2a7b9d10'
+branch_labels = None
+depends_on = None
+
+
+# 与 src/routes/appointments.py 中的 DEFAULT_TIME_SLOTS 相同
+DEFAULT_TIME_SLOTS = [
+    '09:00-10:00', '10:00-11:00', '11:00-12:00',
+    '13:00-14:00', '14:00-15:00', '15:00-16:00', '16:00-17:00',
+]
+
+time_slot_configs = sa.table(
+    'time_slot_configs',
+    sa.column('id', sa.Integer),
+    sa.column('time_slot', sa.String),
+    sa.column('max_visitors', sa.Integer),
+    sa.column('is_active', sa.Boolean),
+    sa.column('weekday_only', sa.Boolean),
+)
+
+
+def upgrade():
+    conn = op.get_bind()
+    has_slots = conn.execute(sa.select(time_slot_configs.c.id).limit(1)).first() is not None
+    if has_slots:
+        op.execute(
+            time_slot_configs.update()
+            .where(time_slot_configs.c.weekday_only == sa.true())
+            .values(weekday_only=False)
+        )
+        return
+
+    op.bulk_insert(time_slot_configs, [
+        {'time_slot': time_slot, 'max_visitors': 30, 'is_active': True, 'weekday_only': False}
+        for time_slot in DEFAULT_TIME_SLOTS
+    ])
+
+
+def downgrade():
+    # 时间段可能已被管理员修改或被预约引用，降级时保留数据
+    pass
@@ -0,0 +1,132 @@
+"""
+命令行工具，通过 flask 命令调用，例如:
+
+    FLASK_APP=src.main flask media gc --dry-run
+    FLASK_APP=src.main flask transcode worker
+    FLASK_APP=src.main flask assets compress
+    FLASK_APP=src.main flask sessions cleanup
+    FLASK_APP=src.main flask database setup
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_migrate import upgrade
+
+from src.models.database import db, TranscodeJob
+from src.utils.media_store import garbage_collect
+from src.utils.precompressed import compress_directory, HAS_BROTLI
+from src.utils.server_session import cleanup_expired_sessions, revoke_user_sessions
+from src.utils.transcode import run_worker, backfill_news_videos
+
+media_cli = AppGroup('media', help='上传文件存储管理')
+transcode_cli = AppGroup('transcode', help='新闻视频HLS转码')
+assets_cli = AppGroup('assets', help='前端构建文件管理')
+sessions_cli = AppGroup('sessions', help='服务端会话管理（SESSION_BACKEND=server）')
+database_cli = AppGroup('database', help='数据库表结构和初始数据')
+
+
+@media_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='只列出将被删除的文件，不实际删除')
+@click.option('--grace-period', type=int, default=None, help='不清理该秒数内上传的文件，默认取 MEDIA_GC_GRACE_PERIOD')
+@click.option('--include-legacy', is_flag=True, help='同时清理旧版上传目录(images/news、images/activities、videos/news)中未被引用的文件')
+def media_gc(dry_run, grace_period, include_legacy):
+    """删除不再被新闻、活动等记录引用的上传文件"""
+    if grace_period is None:
+        grace_period = current_app.config['MEDIA_GC_GRACE_PERIOD']
+
+    removed, freed = garbage_collect(
+        grace_period=grace_period,
+        include_legacy=include_legacy,
+        dry_run=dry_run
+    )
+
+    for path in removed:
+        click.echo(f"{'将删除' if dry_run else '已删除'}: {path}")
+    click.echo(f"共{len(removed)}个文件，{freed / 1024 / 1024:.2f}MB")
+
+
+@transcode_cli.command('worker')
+@click.option('--once', is_flag=True, help='处理完当前队列中的任务后退出')
+@click.option('--poll-interval', type=int, default=10, help='队列为空时的轮询间隔（秒）')
+def transcode_worker(once, poll_interval):
+    """运行转码worker，可在多台机器上同时运行"""
+    click.echo('转码worker已启动')
+    processed = run_worker(once=once, poll_interval=poll_interval)
+    click.echo(f"处理了{processed}个任务")
+
+
+@transcode_cli.command('backfill')
+@click.option('--dry-run', is_flag=True, help='只列出需要转码的视频，不创建任务')
+def transcode_backfill(dry_run):
+    """为已有的本地新闻视频创建转码任务"""
+    urls = backfill_news_videos(dry_run=dry_run)
+    for url in urls:
+        click.echo(f"{'需要转码' if dry_run else '已加入队列'}: {url}")
+    click.echo(f"共{len(urls)}个视频")
+
+
+@transcode_cli.command('status')
+@click.option('--limit', type=int, default=20, help='显示最近的任务数')
+def transcode_status(limit):
+    """查看最近的转码任务"""
+    jobs = TranscodeJob.query.order_by(TranscodeJob.id.desc()).limit(limit).all()
+    for job in jobs:
+        line = f"#{job.id} [{job.status}] {job.source_url}"
+        if job.playlist_url:
+            line += f" -> {job.playlist_url}"
+        if job.status == 'failed' and job.error:
+            line += f" ({job.error.splitlines()[-1][:100]})"
+        click.echo(line)
+
+
+@assets_cli.command('compress')
+@click.option('--directory', default=None, help='要压缩的目录，默认为后端static目录（前端构建文件复制到这里）')
+def assets_compress(directory):
+    """为前端构建的js/css/html/svg/json生成 .br 和 .gz 压缩副本"""
+    if directory is None:
+        directory = current_app.config['MEDIA_ROOT']
+    if not HAS_BROTLI:
+        click.echo('未安装brotli，只生成gzip副本')
+
+    written = compress_directory(directory)
+    for path in written:
+        click.echo(f"已生成: {path}")
+    click.echo(f"共生成{len(written)}个压缩文件")
+
+
+@sessions_cli.command('cleanup')
+@click.option('--batch-size', type=int, default=1000, help='每批删除的会话数')
+def sessions_cleanup(batch_size):
+    """删除已过期的服务端会话，可通过cron定期运行"""
+    removed = cleanup_expired_sessions(batch_size=batch_size)
+    click.echo(f"已删除{removed}个过期会话")
+
+
+@sessions_cli.command('revoke')
+@click.argument('user_id', type=int)
+def sessions_revoke(user_id):
+    """强制用户在所有设备上退出登录"""
+    if current_app.config.get('SESSION_BACKEND') != 'server':
+        click.echo('未开启服务端会话（SESSION_BACKEND=server），无法撤销会话')
+        return
+    removed = revoke_user_sessions(current_app, user_id)
+    click.echo(f"已撤销用户{user_id}的{removed}个会话，各worker最多{current_app.config['SESSION_CACHE_TTL']}秒后生效")
+
+
+@database_cli.command('setup')
+def database_setup():
+    """创建缺少的表并执行所有迁移（索引、默认时间段等），每次部署、启动服务前运行，可重复执行"""
+    # 迁移从已有的表结构开始（第一个迁移只添加索引），新数据库先按模型建表
+    db.create_all(bind_key=None)
+    upgrade()
+    click.echo('数据库已是最新版本')
+
+
+def register_commands(app):
+    """注册所有命令行工具"""
+    app.cli.add_command(media_cli)
+    app.cli.add_command(transcode_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(sessions_cli)
+    app.cli.add_command(database_cli)
@@ -1,6 +1,11 @@
+import time
+# 模块导入耗时计入启动耗时报告
+_import_started = time.perf_counter()
+
 import pytz
 import os
 import sys
+import mimetypes
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
@@ -12,17 +17,40 @@ from src.routes.auth import auth_bp
 from src.routes.user import user_bp
 from src.routes.news import news_bp
 from src.routes.activities import activities_bp
-from src.routes.appointments import appointments_bp, init_time_slots
+from src.routes.appointments import appointments_bp, seed_time_slots
 from src.routes.admin import admin_bp
 from src.routes.videos import videos_bp
+from src.utils.media import is_media_file, send_media
+from src.utils.image_variants import is_variant_source, send_image_variant
+from src.utils.precompressed import send_precompressed
+from src.utils.compression import init_compression
+from src.utils.metrics import init_metrics
+from src.utils.db_engine import init_engine
+from src.utils.db_routing import init_db_routing
+from src.utils.index_cache import get_index_cache, install_reload_signal
+from src.utils.thumbnail_cache import get_thumbnail_cache
+from src.utils.server_session import init_session_backend
+from src.utils.rate_limit import init_rate_limit
+from src.utils.query_stats import init_query_stats
+from src.utils.slow_queries import init_slow_query_log
+from src.utils.profiler import init_profiler
+from src.utils.logging_setup import init_logging
+from src.utils.startup import StartupTimer, finish_startup, warm_up_database
+from src.utils.static_cache import is_hashed_asset, is_immutable_upload, set_cache_headers, set_revalidate_headers
+from src.cli import register_commands
 import logging
 from datetime import datetime
 import shutil
 import time
 from src.config import config as app_config
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+_import_seconds = time.perf_counter() - _import_started
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+# HLS分段的MIME类型（系统默认可能把.ts识别为TypeScript/Qt翻译文件）
+mimetypes.add_type('video/mp2t', '.ts')
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
 
 # 确保static_folder路径存在
 static_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
@@ -30,6 +58,11 @@ if not os.path.exists(static_folder):
     os.makedirs(static_folder)
 
 def create_app(config_name='default'):
+    # 只有第一次创建应用时包含模块导入耗时
+    global _import_seconds
+    startup_timer = StartupTimer(_import_seconds)
+    _import_seconds = 0.0
+    
     # 设置默认时区为北京时间
     import os
     os.environ['TZ'] = 'Asia/Shanghai'
@@ -45,8 +78,11 @@ def create_app(config_name='default'):
     # 从配置对象加载配置
     app.config.from_object(app_config[config_name])
     
+    # 异步日志输出，之后的日志不会阻塞请求
+    init_logging(app)
+    
     # 使用PostgreSQL数据库，确保在本地开发时使用PostgreSQL
-    print(f"使用PostgreSQL数据库: {app.config['SQLALCHEMY_DATABASE_URI']}")
+    logger.info("使用数据库: %s", make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True))
     
     # 额外配置
     app.config.update(
@@ -109,14 +145,48 @@ def create_app(config_name='default'):
         
         return response
     
+    # 数据库连接池大小和语句超时，需要在初始化数据库之前调用
+    init_engine(app)
+    
+    # Prometheus指标（/metrics），需要在初始化数据库之前调用
+    init_metrics(app)
+    
+    # 压缩JSON等文本响应
+    init_compression(app)
+    
+    # 登录、注册限流，在查询用户和计算密码哈希之前拒绝超出限制的请求
+    init_rate_limit(app)
+    
+    # 收到SIGHUP时重新加载内存中的index.html
+    install_reload_signal()
+    
     # 初始化数据库
     db.init_app(app)
     migrate.init_app(app, db)
+    # 只读请求使用只读副本
+    init_db_routing(app, db)
     
-    # 在生产环境中不自动创建表，避免与已有表冲突
-    if config_name == 'development':
+    # 每个请求的SQL查询次数和耗时统计
+    init_query_stats(app)
+    # 慢查询日志和执行计划
+    init_slow_query_log(app)
+    # 管理员采样分析（X-Profile 请求头）
+    init_profiler(app)
+    
+    # 可选的服务端会话存储
+    init_session_backend(app)
+    
+    # 注册命令行工具
+    register_commands(app)
+    startup_timer.mark('extensions')
+    
+    # 开发环境自动创建缺少的表（AUTO_CREATE_TABLES），生产环境由迁移管理表结构
+    if app.config['AUTO_CREATE_TABLES']:
         with app.app_context():
-            db.create_all()
+            # 只在主库上建表，只读副本的表结构由复制同步
+            db.create_all(bind_key=None)
+            seed_time_slots()
+        startup_timer.mark('create_all')
     
     # API测试端点
     @app.route('/api/test')
@@ -134,16 +204,16 @@ def create_app(config_name='default'):
     # 直接处理设置默认视频的请求
     @app.route('/api/videos/set-default', methods=['POST'])
     def set_default_video():
-        print("收到设置默认视频请求 - 主应用路由")
-        print(f"请求方法: {request.method}")
-        print(f"请求数据: {request.get_json()}")
+        logger.debug("收到设置默认视频请求 - 主应用路由")
+        logger.debug("请求方法: %s", request.method)
+        logger.debug("请求数据: %s", request.get_json())
         
         # 检查是否为管理员
         if 'user_id' not in session or session.get('user_role') != 'admin':
-            print("未登录，拒绝访问")
+            logger.info("未登录，拒绝访问")
             return jsonify({"error": "未授权访问"}), 401
         
-        print(f"权限验证通过: user_id={session.get('user_id')}, role={session.get('user_role')}")
+        logger.debug("权限验证通过: user_id=%s, role=%s", session.get('user_id'), session.get('user_role'))
         
         try:
             data = request.get_json()
@@ -154,7 +224,7 @@ def create_app(config_name='default'):
             # 从请求中获取模式，默认为light
             mode = data.get('mode', 'light').lower()
             
-            print(f"设置默认视频: {filename}, 模式: {mode}")
+            logger.debug("设置默认视频: %s, 模式: %s", filename, mode)
             
             if mode not in ['light', 'dark']:
                 return jsonify({"error": "模式必须是 light 或 dark"}), 400
@@ -185,9 +255,7 @@ def create_app(config_name='default'):
             })
             
         except Exception as e:
-            print(f"设置默认视频失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("设置默认视频失败: %s", e)
             return jsonify({"error": str(e)}), 500
     
     # 注册蓝图 - 所有API路由
@@ -198,40 +266,55 @@ def create_app(config_name='default'):
     app.register_blueprint(appointments_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/api')
     app.register_blueprint(videos_bp, url_prefix='/api')
+    startup_timer.mark('blueprints')
     
-    # 初始化时间段配置
-    with app.app_context():
-        init_time_slots()
+    # 预先建立数据库连接（只读）；默认时间段等初始数据由迁移写入，启动时不再写数据库。
+    # gunicorn预加载时关闭，改在每个worker中预热（见 gunicorn.conf.py）
+    if app.config['DB_WARMUP']:
+        with app.app_context():
+            warm_up_database(db)
+        startup_timer.mark('db_warmup')
     
     # 自定义静态文件处理
     @app.route('/static/<path:filename>')
     def serve_static(filename):
-        return send_from_directory(static_folder, filename)
+        # 视频走专用的媒体发送路径，支持Range/206和sendfile
+        if is_media_file(filename):
+            response = send_media(static_folder, filename)
+        # 带 ?w= 参数的图片返回缩小后的WebP/AVIF变体
+        elif request.args.get('w') and is_variant_source(filename):
+            response = send_image_variant(static_folder, filename)
+        else:
+            response = send_from_directory(static_folder, filename)
+        # 按内容或UUID命名的上传文件不会被覆盖，可以长期缓存
+        return set_cache_headers(response, immutable=is_immutable_upload(filename))
     
     # 直接处理视频缩略图请求
     @app.route('/api/videos/thumbnail/<filename>')
     def get_video_thumbnail(filename):
         """获取视频缩略图"""
-        print(f"请求视频缩略图: {filename}")
+        logger.debug("请求视频缩略图: %s", filename)
         
-        # 确保缩略图目录存在
         thumbnail_dir = os.path.join(static_folder, 'images')
-        if not os.path.exists(thumbnail_dir):
-            os.makedirs(thumbnail_dir)
+        # 文件是否存在的检查结果缓存在缩略图索引中
+        thumbnail_cache = get_thumbnail_cache()
             
         # 检查是否有特定的缩略图
         specific_thumbnail = os.path.join(thumbnail_dir, f"thumbnail-{filename}.jpg")
-        if os.path.exists(specific_thumbnail):
+        if thumbnail_cache.lookup(specific_thumbnail):
             return send_from_directory(os.path.dirname(specific_thumbnail), os.path.basename(specific_thumbnail))
             
         # 直接返回静态缩略图，避免404问题
         thumbnail_path = os.path.join(thumbnail_dir, 'video-thumbnail.jpg')
         
         # 如果默认缩略图不存在，创建一个空白图片作为默认缩略图
-        if not os.path.exists(thumbnail_path):
+        if not thumbnail_cache.lookup(thumbnail_path):
+            # 确保缩略图目录存在
+            os.makedirs(thumbnail_dir, exist_ok=True)
             # 创建一个空白的默认缩略图文件
             with open(thumbnail_path, 'w') as f:
                 f.write('')
+            thumbnail_cache.put(thumbnail_path)
                 
         return send_from_directory(os.path.dirname(thumbnail_path), os.path.basename(thumbnail_path))
     
@@ -240,11 +323,14 @@ def create_app(config_name='default'):
         assets_folder = os.path.join(static_folder, 'assets')
         if not os.path.exists(assets_folder):
             os.makedirs(assets_folder)
-        return send_from_directory(assets_folder, filename)
+        response = send_precompressed(assets_folder, filename)
+        # Vite构建的文件名带内容哈希，内容变化时文件名也会变化
+        return set_cache_headers(response, immutable=is_hashed_asset(filename))
     
     @app.route('/favicon.ico')
     def serve_favicon():
-        return send_from_directory(static_folder, 'favicon.ico')
+        response = send_from_directory(static_folder, 'favicon.ico')
+        return set_cache_headers(response, max_age=86400)
     
     # 所有其他路由返回index.html
     @app.route('/', defaults={'path': ''})
@@ -255,10 +341,14 @@ def create_app(config_name='default'):
             return "Not Found", 404
     
         try:
-            return send_from_directory(static_folder, 'index.html')
+            # index.html引用的构建文件名随每次发布变化，必须每次验证；内容缓存在内存中
+            index_cache = get_index_cache(os.path.join(static_folder, 'index.html'))
+            return set_revalidate_headers(index_cache.response())
         except:
             return "index.html not found", 404
-            
+    
+    startup_timer.mark('routes')
+    finish_startup(app, startup_timer)
     return app
 
 # 创建应用实例
@@ -1,15 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import text
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 
-db = SQLAlchemy()
+from src.utils.db_routing import RoutingSession
+
+# 只读请求的查询可以发送到只读副本（见 src/utils/db_routing.py）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
+# 仍占用名额的预约状态，预约时间段的部分索引只包含这些行
+ACTIVE_APPOINTMENT_STATUSES = text("status IN ('pending', 'confirmed')")
+
 # 用户表
 class User(db.Model):
     __tablename__ = 'users'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_users_created_at', 'created_at'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -40,7 +50,11 @@ class User(db.Model):
 # 新闻动态表 - 适应PostgreSQL数据库结构
 class News(db.Model):
     __tablename__ = 'News'  # PostgreSQL中使用大写表名
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_News_createdAt', 'createdAt'),
+        db.Index('ix_News_category_createdAt', 'category', 'createdAt'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.String(36), primary_key=True)  # PostgreSQL中使用UUID作为ID
     title = db.Column(db.String(200), nullable=False)
@@ -71,7 +85,11 @@ class News(db.Model):
 # 活动表
 class Activity(db.Model):
     __tablename__ = 'activities'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_activities_start_time', 'start_time'),
+        db.Index('ix_activities_status_category_start_time', 'status', 'category', 'start_time'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -95,7 +113,11 @@ class Activity(db.Model):
 # 活动报名表
 class Registration(db.Model):
     __tablename__ = 'registrations'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_registrations_activity_id_user_id_status', 'activity_id', 'user_id', 'status'),
+        db.Index('ix_registrations_user_id', 'user_id'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -107,7 +129,16 @@ class Registration(db.Model):
 # 参观预约表
 class Appointment(db.Model):
     __tablename__ = 'appointments'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_appointments_date_time_slot_status', 'date', 'time_slot', 'status'),
+        db.Index('ix_appointments_user_id_date', 'user_id', 'date'),
+        # 计算时间段已预约人数：只索引占用名额的预约，并带上人数列，可以只读索引完成求和
+        db.Index('ix_appointments_active_slot', 'date', 'time_slot',
+                 postgresql_where=ACTIVE_APPOINTMENT_STATUSES,
+                 postgresql_include=['visitor_count'],
+                 sqlite_where=ACTIVE_APPOINTMENT_STATUSES),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -180,3 +211,45 @@ class TimeSlotConfig(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     weekday_only = db.Column(db.Boolean, default=True)  # 是否仅工作日开放
 
+# 视频转码任务表（新闻视频转为HLS多码率）
+class TranscodeJob(db.Model):
+    __tablename__ = 'transcode_jobs'
+    __table_args__ = {'extend_existing': True}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source_url = db.Column(db.String(255), nullable=False, index=True)  # 原始视频URL，如 /static/media/ab/xxx.mp4
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'running', 'done', 'failed'
+    playlist_url = db.Column(db.String(255), nullable=True)  # 生成的HLS主播放列表URL
+    renditions = db.Column(db.String(100), nullable=True)  # 生成的清晰度，如 '360p,720p'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source_url': self.source_url,
+            'status': self.status,
+            'playlist_url': self.playlist_url,
+            'renditions': self.renditions.split(',') if self.renditions else [],
+            'attempts': self.attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+# 服务端会话表（SESSION_BACKEND=server 时使用）
+class ServerSession(db.Model):
+    __tablename__ = 'server_sessions'
+    __table_args__ = {'extend_existing': True}
+    
+    id = db.Column(db.String(64), primary_key=True)  # 随机生成的会话ID，保存在Cookie中
+    user_id = db.Column(db.Integer, nullable=True, index=True)  # 用于按用户撤销会话
+    data = db.Column(db.Text, nullable=False)  # JSON格式的会话内容
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, session
+import logging
 from src.models.database import db, Activity, Registration, User
 from datetime import datetime, date
 import math
@@ -6,6 +7,7 @@ import pytz
 from sqlalchemy import text
 
 activities_bp = Blueprint('activities', __name__)
+logger = logging.getLogger(__name__)
 
 # 获取北京时间
 def get_beijing_time():
@@ -138,7 +140,7 @@ def get_activities_list():
         }), 200
         
     except Exception as e:
-        print(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         return jsonify({'error': '获取活动列表失败'}), 500
 
 @activities_bp.route('/activities/<int:activity_id>', methods=['GET'])
@@ -152,7 +154,7 @@ def get_activity_detail(activity_id):
         is_registered = False
         if 'user_id' in session:
             user_id = session['user_id']
-            print(f"检查用户 {user_id} 是否报名活动 {activity_id}")
+            logger.debug("检查用户 %s 是否报名活动 %s", user_id, activity_id)
             
             # 直接查询数据库获取用户的报名记录
             # 使用原始SQL查询，避免字段顺序问题
@@ -168,7 +170,7 @@ def get_activity_detail(activity_id):
                 
                 # 检查是否有confirmed状态的报名记录
                 for reg in registrations:
-                    print(f"找到报名记录: id={reg[0]}, 用户ID={reg[1]}, 活动ID={reg[2]}, 状态={reg[3]}, 时间={reg[4]}")
+                    logger.debug("找到报名记录: id=%s, 用户ID=%s, 活动ID=%s, 状态=%s, 时间=%s", reg[0], reg[1], reg[2], reg[3], reg[4])
                     # 检查状态字段，可能在第3列或第4列
                     status = None
                     # 尝试确定哪个字段是状态
@@ -179,10 +181,10 @@ def get_activity_detail(activity_id):
                     
                     if status == 'confirmed':
                         is_registered = True
-                        print(f"用户已报名此活动，状态为confirmed")
+                        logger.debug("用户已报名此活动，状态为confirmed")
                         break
                     
-            print(f"用户 {user_id} 报名状态: {is_registered}")
+            logger.debug("用户 %s 报名状态: %s", user_id, is_registered)
         
         now = get_beijing_time()
         
@@ -216,11 +218,11 @@ def get_activity_detail(activity_id):
             }
         }
         
-        print(f"返回活动详情，is_registered: {is_registered}")
+        logger.debug("返回活动详情，is_registered: %s", is_registered)
         return jsonify(response_data), 200
         
     except Exception as e:
-        print(f"获取活动详情失败: {str(e)}")
+        logger.error("获取活动详情失败: %s", e)
         return jsonify({'error': '获取活动详情失败'}), 500
 
 @activities_bp.route('/activities/<int:activity_id>/register', methods=['POST'])
@@ -248,12 +250,12 @@ def register_activity(activity_id):
         registration_deadline_aware = beijing_tz.localize(registration_deadline_naive)
         
         if registration_deadline_aware <= now:
-            print(f"报名已截止: 当前时间={now}, 截止时间={registration_deadline_aware}")
+            logger.debug("报名已截止: 当前时间=%s, 截止时间=%s", now, registration_deadline_aware)
             return jsonify({'error': '报名已截止'}), 400
         
         # 检查名额
         if activity.registered_count >= activity.capacity:
-            print(f"活动名额已满: 已报名={activity.registered_count}, 容量={activity.capacity}")
+            logger.debug("活动名额已满: 已报名=%s, 容量=%s", activity.registered_count, activity.capacity)
             return jsonify({'error': '活动名额已满'}), 400
         
         current_user_id = session['user_id']
@@ -271,7 +273,7 @@ def register_activity(activity_id):
             registrations = result.fetchall()
             
             for reg in registrations:
-                print(f"找到报名记录: id={reg[0]}, 用户ID={reg[1]}, 活动ID={reg[2]}, 状态={reg[3]}, 时间={reg[4]}")
+                logger.debug("找到报名记录: id=%s, 用户ID=%s, 活动ID=%s, 状态=%s, 时间=%s", reg[0], reg[1], reg[2], reg[3], reg[4])
                 # 检查状态字段，可能在第3列或第4列
                 status = None
                 if reg[3] == 'confirmed' or reg[3] == 'cancelled':
@@ -284,7 +286,7 @@ def register_activity(activity_id):
                     break
         
         if is_registered:
-            print(f"用户已报名此活动: user_id={current_user_id}, activity_id={activity_id}")
+            logger.debug("用户已报名此活动: user_id=%s, activity_id=%s", current_user_id, activity_id)
             return jsonify({'error': '您已报名此活动'}), 400
         
         # 检查是否存在其他用户（可能已删除）的报名记录
@@ -298,9 +300,9 @@ def register_activity(activity_id):
         ).all()
         
         if orphaned_registrations:
-            print(f"发现已删除用户的报名记录: {len(orphaned_registrations)} 条")
+            logger.debug("发现已删除用户的报名记录: %s 条", len(orphaned_registrations))
             for reg in orphaned_registrations:
-                print(f"取消已删除用户的报名记录: registration_id={reg.id}, user_id={reg.user_id}")
+                logger.info("取消已删除用户的报名记录: registration_id=%s, user_id=%s", reg.id, reg.user_id)
                 reg.status = 'cancelled'
                 # 如果活动报名人数大于0，减少报名人数
                 if activity.registered_count > 0:
@@ -320,11 +322,11 @@ def register_activity(activity_id):
         db.session.add(registration)
         db.session.commit()
         
-        print(f"报名成功: user_id={current_user_id}, activity_id={activity_id}")
+        logger.info("报名成功: user_id=%s, activity_id=%s", current_user_id, activity_id)
         return jsonify({'message': '报名成功'}), 201
         
     except Exception as e:
-        print(f"活动报名失败: {str(e)}")
+        logger.error("活动报名失败: %s", e)
         db.session.rollback()
         return jsonify({'error': '报名失败，请稍后重试'}), 500
 
@@ -349,7 +351,7 @@ def cancel_registration(activity_id):
             registrations = result.fetchall()
             
             for reg in registrations:
-                print(f"找到报名记录: id={reg[0]}, 用户ID={reg[1]}, 活动ID={reg[2]}, 状态={reg[3]}, 时间={reg[4]}")
+                logger.debug("找到报名记录: id=%s, 用户ID=%s, 活动ID=%s, 状态=%s, 时间=%s", reg[0], reg[1], reg[2], reg[3], reg[4])
                 # 检查状态字段，可能在第3列或第4列
                 status = None
                 if reg[3] == 'confirmed' or reg[3] == 'cancelled':
@@ -364,7 +366,7 @@ def cancel_registration(activity_id):
                     break
         
         if not registration_id:
-            print(f"取消报名失败，未找到报名记录: user_id={current_user_id}, activity_id={activity_id}")
+            logger.warning("取消报名失败，未找到报名记录: user_id=%s, activity_id=%s", current_user_id, activity_id)
             return jsonify({'error': '您未报名此活动'}), 400
         
         activity = Activity.query.get(activity_id)
@@ -378,11 +380,11 @@ def cancel_registration(activity_id):
         
         db.session.commit()
         
-        print(f"取消报名成功: user_id={current_user_id}, activity_id={activity_id}")
+        logger.info("取消报名成功: user_id=%s, activity_id=%s", current_user_id, activity_id)
         return jsonify({'message': '取消报名成功'}), 200
         
     except Exception as e:
-        print(f"取消报名失败: {str(e)}")
+        logger.error("取消报名失败: %s", e)
         db.session.rollback()
         return jsonify({'error': '取消报名失败'}), 500
 
@@ -554,7 +556,7 @@ def admin_get_activity_registrations(activity_id):
         return jsonify({'error': '权限不足'}), 403
     
     try:
-        print(f"检查用户 {session.get('user_id')} 是否报名活动 {activity_id}")
+        logger.debug("检查用户 %s 是否报名活动 %s", session.get('user_id'), activity_id)
         
         # 获取所有报名记录
         all_registrations = db.session.query(Registration, User).join(
@@ -595,7 +597,7 @@ def admin_get_activity_registrations(activity_id):
             # 只显示状态为confirmed的记录
             if status == 'confirmed':
                 # 打印调试信息
-                print(f"用户 {user.id} 报名状态: {status == 'confirmed'}")
+                logger.debug("用户 %s 报名状态: %s", user.id, status == 'confirmed')
                 
                 results.append({
                     'id': reg.id,
@@ -615,7 +617,7 @@ def admin_get_activity_registrations(activity_id):
         }), 200
         
     except Exception as e:
-        print(f"获取报名列表失败: {str(e)}")
+        logger.error("获取报名列表失败: %s", e)
         return jsonify({'error': f'获取报名列表失败: {str(e)}'}), 500
 
 @activities_bp.route('/activities/categories', methods=['GET'])
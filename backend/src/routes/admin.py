@@ -1,17 +1,28 @@
 from flask import Blueprint, request, jsonify, session, send_file, current_app
+import logging
 import os
 import csv
 import json
 from datetime import datetime
 import io
 import uuid
-from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
-from src.models.database import db, User, News, Activity, Appointment, Registration, TimeSlotConfig
+from src.models.database import db, User, News, Activity, Appointment, Registration, TimeSlotConfig, TranscodeJob
+from src.utils.chunked_upload import UploadError, create_upload, load_upload, cleanup_stale_uploads
+from src.utils.media_store import store_upload, store_local_file, link_into
+from src.utils.image_variants import warm_variants
+from src.utils.transcode import enqueue_transcode, is_playlist_url
+from src.utils.compression import compression_stats
+from src.utils.slow_queries import get_slow_query_log
+from src.utils.profiler import start_worker_profile, read_profile
+from src.utils.server_session import revoke_user_sessions
+from src.utils.user_cache import invalidate_user
+from src.utils.passwords import hash_password
 import shutil
 import pytz
 
 admin_bp = Blueprint('admin', __name__)
+logger = logging.getLogger(__name__)
 
 # 获取北京时间
 def get_beijing_time():
@@ -22,20 +33,51 @@ def get_beijing_time():
 # 装饰器：检查管理员权限
 def admin_required(f):
     def decorated_function(*args, **kwargs):
-        print(f"检查管理员权限: session={session}")
+        logger.debug("检查管理员权限: user_id=%s", session.get('user_id'))
         if 'user_id' not in session or session.get('user_role') != 'admin':
             return jsonify({'error': '权限不足'}), 403
-        print(f"权限验证通过: user_id={session.get('user_id')}, role={session.get('user_role')}")
+        logger.debug("权限验证通过: user_id=%s, role=%s", session.get('user_id'), session.get('user_role'))
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+# 辅助函数：生成视频保存文件名，prefix为light/dark/news
+def build_video_filename(original_filename, prefix):
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    file_ext = original_filename.rsplit('.', 1)[1].lower()
+    
+    # 处理文件名，确保中文文件名也能正常处理
+    try:
+        # 尝试使用secure_filename处理文件名
+        safe_filename = secure_filename(str(original_filename))
+        # 如果处理后文件名为空（可能是纯中文名），则使用前缀+时间戳作为文件名
+        if not safe_filename or '.' not in safe_filename:
+            safe_filename = f"{prefix}_video.{file_ext}"
+        return f"{prefix}_{timestamp}_{safe_filename}"
+    except Exception as e:
+        logger.error("处理文件名失败: %s", e)
+        return f"{prefix}_{timestamp}_video.{file_ext}"
+
+# 辅助函数：把去重存储中的视频以具名文件放入背景视频目录，相同内容复用已有文件
+def install_background_video(stored, original_filename, video_mode):
+    videos_dir = os.path.join('static', 'videos')
+    return link_into(stored, videos_dir, lambda: build_video_filename(original_filename, video_mode))
+
+# 辅助函数：复制一份作为对应模式的默认背景视频
+def set_default_background_video(save_path, video_mode):
+    try:
+        default_path = os.path.join(os.path.dirname(save_path), f'{video_mode}.mp4')
+        shutil.copy2(save_path, default_path)
+    except Exception as e:
+        # 设置默认视频失败，但上传成功
+        logger.error("设置默认视频失败: %s", e)
+
 # 辅助函数：检查管理员权限
 def require_admin():
-    print(f"检查管理员权限: session={session}")
+    logger.debug("检查管理员权限: user_id=%s", session.get('user_id'))
     if 'user_id' not in session or session.get('user_role') != 'admin':
         return False
-    print(f"权限验证通过: user_id={session.get('user_id')}, role={session.get('user_role')}")
+    logger.debug("权限验证通过: user_id=%s, role=%s", session.get('user_id'), session.get('user_role'))
     return True
 
 # 导出活动报名表
@@ -136,7 +178,7 @@ def export_activity_registrations(activity_id):
             return jsonify({'error': f'不支持的导出格式: {format_type}'}), 400
             
     except Exception as e:
-        print(f"导出活动报名表失败: {str(e)}")
+        logger.error("导出活动报名表失败: %s", e)
         return jsonify({'error': f'导出活动报名表失败: {str(e)}'}), 500
 
 @admin_bp.route('/admin/dashboard', methods=['GET'])
@@ -311,7 +353,7 @@ def create_user():
         user = User(
             username=data['username'],
             email=data['email'],
-            password_hash=generate_password_hash(data['password']),
+            password_hash=hash_password(data['password']),
             role=data['role'],
             phone=data.get('phone', '')
         )
@@ -349,16 +391,25 @@ def update_user(user_id):
                 return jsonify({'error': '邮箱已被其他用户使用'}), 400
             user.email = data['email']
         
+        # 编辑表单总会提交role，只有角色真正变化时才算修改角色
+        role_changed = 'role' in data and data['role'] != user.role
         if 'role' in data:
             user.role = data['role']
         
         if 'phone' in data:
             user.phone = data['phone']
         
-        if 'password' in data and data['password']:
-            user.password_hash = generate_password_hash(data['password'])
+        password_changed = bool(data.get('password'))
+        if password_changed:
+            user.password_hash = hash_password(data['password'])
         
         db.session.commit()
+        invalidate_user(user_id)
+        
+        # 修改密码或角色后，该用户已登录的会话失效；管理员修改自己时保留当前会话
+        if password_changed or role_changed:
+            keep_sid = getattr(session, 'sid', None) if user_id == session.get('user_id') else None
+            revoke_user_sessions(current_app, user_id, keep_sid=keep_sid)
         
         return jsonify({
             'message': '用户信息更新成功',
@@ -374,6 +425,18 @@ def update_user(user_id):
         db.session.rollback()
         return jsonify({'error': f'更新用户信息失败: {str(e)}'}), 500
 
+# 强制用户退出登录（需要开启服务端会话）
+@admin_bp.route('/admin/users/<int:user_id>/sessions/revoke', methods=['POST'])
+@admin_required
+def revoke_sessions(user_id):
+    if current_app.config.get('SESSION_BACKEND') != 'server':
+        return jsonify({'error': '未开启服务端会话，无法强制退出'}), 400
+    try:
+        removed = revoke_user_sessions(current_app, user_id)
+        return jsonify({'message': f'已撤销{removed}个会话', 'revoked': removed}), 200
+    except Exception as e:
+        return jsonify({'error': f'撤销会话失败: {str(e)}'}), 500
+
 # 获取单个用户信息
 @admin_bp.route('/admin/users/<int:user_id>', methods=['GET'])
 @admin_required
@@ -417,6 +480,9 @@ def delete_user(user_id):
         db.session.delete(user)
         db.session.commit()
         
+        invalidate_user(user_id)
+        revoke_user_sessions(current_app, user_id)
+        
         return jsonify({'message': '用户删除成功'}), 200
         
     except Exception as e:
@@ -535,6 +601,81 @@ def export_data(data_type):
     except Exception as e:
         return jsonify({'error': f'导出数据失败: {str(e)}'}), 500
 
+# 响应压缩统计（当前worker进程）
+@admin_bp.route('/admin/metrics/compression', methods=['GET'])
+@admin_required
+def get_compression_metrics():
+    return jsonify({
+        'pid': os.getpid(),
+        'endpoints': compression_stats.snapshot()
+    }), 200
+
+@admin_bp.route('/admin/diagnostics/slow-queries', methods=['GET', 'DELETE'])
+@admin_required
+def slow_queries():
+    """当前worker最近的慢查询（每个worker分别记录），DELETE清空"""
+    slow_log = get_slow_query_log(current_app)
+    if slow_log is None:
+        return jsonify({'error': '未开启慢查询记录（SLOW_QUERY_THRESHOLD_MS）'}), 404
+
+    if request.method == 'DELETE':
+        slow_log.clear()
+        return jsonify({'message': '已清空慢查询记录'}), 200
+
+    return jsonify({
+        'pid': os.getpid(),
+        'threshold_ms': current_app.config['SLOW_QUERY_THRESHOLD_MS'],
+        'explain': current_app.config['SLOW_QUERY_EXPLAIN'],
+        'queries': slow_log.snapshot()
+    }), 200
+
+@admin_bp.route('/admin/diagnostics/profile', methods=['POST'])
+@admin_required
+def start_profile():
+    """对处理该请求的worker采样 seconds 秒，返回结果编号"""
+    if not current_app.config['PROFILER_ENABLED']:
+        return jsonify({'error': '未开启采样分析（PROFILER_ENABLED）'}), 404
+
+    seconds = request.args.get('seconds', 10, type=float)
+    interval = request.args.get('interval', current_app.config['PROFILER_INTERVAL'], type=float)
+    if not 0 < seconds <= current_app.config['PROFILER_MAX_SECONDS']:
+        return jsonify({'error': f"seconds必须在0到{current_app.config['PROFILER_MAX_SECONDS']}之间"}), 400
+    if not 0.001 <= interval <= 1:
+        return jsonify({'error': 'interval必须在0.001到1之间'}), 400
+
+    profile_id = start_worker_profile(current_app._get_current_object(), seconds, interval)
+    if profile_id is None:
+        return jsonify({'error': '该worker已有采样正在进行'}), 409
+    return jsonify({
+        'profile_id': profile_id,
+        'pid': os.getpid(),
+        'seconds': seconds,
+        'result_url': f'/api/admin/diagnostics/profile/{profile_id}'
+    }), 202
+
+@admin_bp.route('/admin/diagnostics/profile/<profile_id>', methods=['GET'])
+@admin_required
+def get_profile_result(profile_id):
+    """返回折叠栈格式的采样结果"""
+    status, content = read_profile(current_app, profile_id)
+    if status == 'running':
+        return jsonify({'status': 'running'}), 202
+    if status == 'missing':
+        return jsonify({'error': '采样结果不存在'}), 404
+    return current_app.response_class(content, mimetype='text/plain')
+
+@admin_bp.route('/admin/diagnostics/startup', methods=['GET'])
+@admin_required
+def get_startup_report():
+    """当前worker启动时各阶段的耗时"""
+    report = current_app.extensions.get('startup')
+    if report is None:
+        return jsonify({'error': '没有启动耗时记录'}), 404
+    return jsonify({
+        **report,
+        'budget_seconds': current_app.config['STARTUP_TIME_BUDGET']
+    }), 200
+
 # 预约管理
 @admin_bp.route('/admin/appointments', methods=['GET'])
 @admin_required
@@ -556,7 +697,7 @@ def get_appointments():
         }), 200
         
     except Exception as e:
-        print(f"获取预约列表失败: {str(e)}")
+        logger.error("获取预约列表失败: %s", e)
         return jsonify({'error': f'获取预约列表失败: {str(e)}'}), 500
 
 # 更新预约状态
@@ -644,7 +785,7 @@ def get_registrations(activity_id):
         }), 200
         
     except Exception as e:
-        print(f"获取活动报名列表失败: {str(e)}")
+        logger.error("获取活动报名列表失败: %s", e)
         return jsonify({'error': '获取活动报名列表失败'}), 500
 
 # 系统配置管理
@@ -768,26 +909,11 @@ def upload_image():
         if file_ext not in allowed_extensions:
             return jsonify({'error': '不支持的文件类型'}), 400
         
-        # 创建保存目录
-        upload_folder = os.path.join('static', 'images')
-        if request.args.get('type') == 'activity':
-            upload_folder = os.path.join('static', 'images', 'activities')
-        elif request.args.get('type') == 'news':
-            upload_folder = os.path.join('static', 'images', 'news')
-        
-        # 确保目录存在
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # 生成唯一文件名
-        safe_filename = secure_filename(str(filename))
-        unique_filename = f"{uuid.uuid4()}_{safe_filename}"
-        file_path = os.path.join(upload_folder, unique_filename)
-        
-        # 保存文件
-        image_file.save(file_path)
-        
-        # 返回文件URL
-        image_url = f"/{file_path.replace(os.sep, '/')}"
+        # 按内容去重保存，相同图片只保存一份
+        stored = store_upload(image_file, file_ext)
+        image_url = stored.url
+        # 按配置预先生成列表页使用的尺寸变体
+        warm_variants(stored.path, current_app.config['IMAGE_VARIANT_WARM_WIDTHS'])
         
         return jsonify({
             'message': '图片上传成功',
@@ -795,13 +921,18 @@ def upload_image():
         }), 200
         
     except Exception as e:
-        print(f"图片上传失败: {str(e)}")
+        logger.error("图片上传失败: %s", e)
         return jsonify({'error': f'图片上传失败: {str(e)}'}), 500 
 
 @admin_bp.route('/admin/upload/video', methods=['POST'])
 @admin_required
 def upload_background_video():
     try:
+        # 超过限制的请求在解析multipart之前拒绝，大文件请使用分片上传
+        max_size = current_app.config.get('BACKGROUND_VIDEO_MAX_SIZE', 500 * 1024 * 1024)
+        if request.content_length and request.content_length > max_size + 1024 * 1024:
+            return jsonify({'error': f'文件过大，最大允许{max_size // (1024 * 1024)}MB'}), 400
+        
         if 'video' not in request.files:
             return jsonify({'error': '没有上传文件'}), 400
         
@@ -825,47 +956,13 @@ def upload_background_video():
         if video_mode not in ['light', 'dark']:
             return jsonify({'error': '无效的视频模式'}), 400
         
-        # 确保目标目录存在
-        videos_dir = os.path.join('static', 'videos')
-        os.makedirs(videos_dir, exist_ok=True)
-        
-        # 生成唯一文件名
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        
-        # 处理文件名，确保中文文件名也能正常处理
-        try:
-            # 确保文件名是字符串类型
-            original_filename = str(video_file.filename) if video_file.filename else ""
-            # 尝试使用secure_filename处理文件名
-            safe_filename = secure_filename(original_filename)
-            # 如果处理后文件名为空（可能是纯中文名），则使用模式+时间戳作为文件名
-            if not safe_filename or safe_filename == '':
-                file_ext = filename.rsplit('.', 1)[1].lower()
-                safe_filename = f"{video_mode}_video.{file_ext}"
-            
-            unique_filename = f"{video_mode}_{timestamp}_{safe_filename}"
-        except Exception as e:
-            print(f"处理文件名失败: {str(e)}")
-            # 使用默认文件名
-            file_ext = filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"{video_mode}_{timestamp}_video.{file_ext}"
-            
-        save_path = os.path.join(videos_dir, unique_filename)
-        
-        # 保存文件
-        video_file.save(save_path)
+        # 边上传边计算摘要，保存到去重存储后在视频目录建立具名文件
+        stored = store_upload(video_file, file_ext)
+        unique_filename = install_background_video(stored, filename, video_mode)
+        save_path = os.path.join('static', 'videos', unique_filename)
         
         # 如果是默认视频，复制一份作为默认视频文件
-        try:
-            if video_mode == 'light':
-                default_path = os.path.join(videos_dir, 'light.mp4')
-                shutil.copy2(save_path, default_path)
-            elif video_mode == 'dark':
-                default_path = os.path.join(videos_dir, 'dark.mp4')
-                shutil.copy2(save_path, default_path)
-        except Exception as e:
-            # 设置默认视频失败，但上传成功，返回成功消息
-            print(f"设置默认视频失败: {str(e)}")
+        set_default_background_video(save_path, video_mode)
         
         # 返回成功响应
         return jsonify({
@@ -878,7 +975,7 @@ def upload_background_video():
         }), 200
         
     except Exception as e:
-        print(f"视频上传失败: {str(e)}")
+        logger.error("视频上传失败: %s", e)
         return jsonify({'error': f'视频上传失败: {str(e)}'}), 500
 
 @admin_bp.route('/admin/videos', methods=['GET'])
@@ -988,6 +1085,11 @@ def set_default_video():
 @admin_required
 def upload_news_video():
     try:
+        # 请求体明显超过限制时直接拒绝，避免先解析整个multipart请求
+        max_size = current_app.config.get('NEWS_VIDEO_MAX_SIZE', 50 * 1024 * 1024)
+        if request.content_length and request.content_length > max_size + 1024 * 1024:
+            return jsonify({'error': f'文件过大，最大允许{max_size // (1024 * 1024)}MB'}), 400
+        
         if 'video' not in request.files:
             return jsonify({'error': '没有上传文件'}), 400
         
@@ -1006,59 +1108,244 @@ def upload_news_video():
         if file_ext not in allowed_extensions:
             return jsonify({'error': '不支持的文件类型'}), 400
         
-        # 检查文件大小 (限制为 50MB)
-        max_size = 50 * 1024 * 1024  # 50MB
+        # 检查文件大小
         # 先读取文件内容以获取大小
         video_file.seek(0, os.SEEK_END)
         file_size = video_file.tell()
         video_file.seek(0)  # 重置文件指针到开始位置
         
         if file_size > max_size:
-            return jsonify({'error': '文件过大，最大允许50MB'}), 400
-        
-        # 确保目标目录存在
-        videos_dir = os.path.join('static', 'videos', 'news')
-        os.makedirs(videos_dir, exist_ok=True)
+            return jsonify({'error': f'文件过大，最大允许{max_size // (1024 * 1024)}MB'}), 400
         
-        # 生成唯一文件名
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        # 按内容去重保存
+        stored = store_upload(video_file, file_ext)
         
-        # 处理文件名，确保中文文件名也能正常处理
+        # 返回成功响应
+        return jsonify({
+            'message': '视频上传成功',
+            'video': news_video_response(stored)
+        }), 200
+    
+    except Exception as e:
+        logger.error("上传新闻视频失败: %s", e)
+        return jsonify({'error': '上传视频失败'}), 500 
+
+# 辅助函数：新闻视频上传完成后的响应数据，开启转码时同时创建HLS转码任务
+def news_video_response(stored):
+    video = {
+        'filename': os.path.basename(stored.path),
+        'url': stored.url,
+        'size': stored.size
+    }
+    if current_app.config.get('TRANSCODE_ENABLED'):
         try:
-            # 确保文件名是字符串类型
-            original_filename = str(video_file.filename) if video_file.filename else ""
-            # 尝试使用secure_filename处理文件名
-            safe_filename = secure_filename(original_filename)
-            # 如果处理后文件名为空（可能是纯中文名），则使用news+时间戳作为文件名
-            if not safe_filename or safe_filename == '':
-                file_ext = filename.rsplit('.', 1)[1].lower()
-                safe_filename = f"news_video.{file_ext}"
-            
-            unique_filename = f"news_{timestamp}_{safe_filename}"
+            job = enqueue_transcode(stored.url)
+            video['transcode'] = {'job_id': job.id, 'status': job.status}
         except Exception as e:
-            print(f"处理文件名失败: {str(e)}")
-            # 使用默认文件名
-            file_ext = filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"news_{timestamp}_video.{file_ext}"
-            
-        save_path = os.path.join(videos_dir, unique_filename)
+            # 转码任务创建失败不影响上传，视频仍可按原格式播放
+            db.session.rollback()
+            logger.error("创建转码任务失败: %s", e)
+    return video
+
+@admin_bp.route('/admin/transcode/jobs', methods=['GET'])
+@admin_required
+def get_transcode_jobs():
+    try:
+        status = request.args.get('status')
+        limit = min(request.args.get('limit', 50, type=int), 200)
         
-        # 保存文件
-        video_file.save(save_path)
+        query = TranscodeJob.query
+        if status:
+            query = query.filter_by(status=status)
+        jobs = query.order_by(TranscodeJob.id.desc()).limit(limit).all()
+        
+        return jsonify({'jobs': [job.to_dict() for job in jobs]}), 200
+    except Exception as e:
+        logger.error("获取转码任务失败: %s", e)
+        return jsonify({'error': '获取转码任务失败'}), 500
+
+@admin_bp.route('/admin/transcode/jobs', methods=['POST'])
+@admin_required
+def create_transcode_job():
+    try:
+        data = request.get_json() or {}
+        source_url = data.get('source_url')
+        if not source_url and data.get('news_id'):
+            news = News.query.get(data['news_id'])
+            if not news:
+                return jsonify({'error': '新闻不存在'}), 404
+            source_url = news.video_url
+        
+        if not source_url or not source_url.startswith('/static/'):
+            return jsonify({'error': '只能转码本地上传的视频'}), 400
+        if is_playlist_url(source_url):
+            return jsonify({'error': '该视频已经是HLS格式'}), 400
+        
+        job = enqueue_transcode(source_url)
+        return jsonify({'message': '已加入转码队列', 'job': job.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error("创建转码任务失败: %s", e)
+        return jsonify({'error': '创建转码任务失败'}), 500
+
+# 分片上传：支持大视频的可续传上传
+# 流程: POST /admin/upload/chunked 创建会话 -> PUT /admin/upload/chunked/<id>?offset=N 上传分片
+#      -> GET /admin/upload/chunked/<id> 查询已上传偏移量（用于续传） -> POST /admin/upload/chunked/<id>/complete
+CHUNKED_UPLOAD_TYPES = {
+    'background': 'BACKGROUND_VIDEO_MAX_SIZE',
+    'news': 'NEWS_VIDEO_MAX_SIZE',
+}
+
+def _chunked_upload_dir():
+    return current_app.config['CHUNKED_UPLOAD_DIR']
+
+def _upload_error_response(e):
+    body = {'error': e.message}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status_code
+
+@admin_bp.route('/admin/upload/chunked', methods=['POST'])
+@admin_required
+def init_chunked_upload():
+    try:
+        data = request.get_json() or {}
+        
+        upload_type = data.get('type', 'background')
+        if upload_type not in CHUNKED_UPLOAD_TYPES:
+            return jsonify({'error': '不支持的上传类型'}), 400
+        
+        # 检查文件类型
+        allowed_extensions = {'mp4', 'webm', 'ogg'}
+        filename = data.get('filename')
+        if not filename or '.' not in filename:
+            return jsonify({'error': '不支持的文件类型'}), 400
+        
+        file_ext = filename.rsplit('.', 1)[1].lower()
+        if file_ext not in allowed_extensions:
+            return jsonify({'error': '不支持的文件类型'}), 400
+        
+        # 检查文件大小
+        try:
+            total_size = int(data.get('size', 0))
+        except (TypeError, ValueError):
+            total_size = 0
+        if total_size <= 0:
+            return jsonify({'error': '文件大小无效'}), 400
+        
+        max_size = current_app.config[CHUNKED_UPLOAD_TYPES[upload_type]]
+        if total_size > max_size:
+            return jsonify({'error': f'文件过大，最大允许{max_size // (1024 * 1024)}MB'}), 400
+        
+        # 获取视频模式（明亮/暗黑），仅背景视频需要
+        video_mode = data.get('mode', 'light')
+        if upload_type == 'background' and video_mode not in ['light', 'dark']:
+            return jsonify({'error': '无效的视频模式'}), 400
+        
+        # 顺便清理过期的未完成上传
+        cleanup_stale_uploads(_chunked_upload_dir(), current_app.config['CHUNKED_UPLOAD_EXPIRE'])
+        
+        upload = create_upload(
+            _chunked_upload_dir(),
+            filename,
+            total_size,
+            type=upload_type,
+            mode=video_mode,
+            user_id=session.get('user_id')
+        )
+        
+        result = upload.to_dict()
+        result['chunk_size'] = current_app.config['CHUNKED_UPLOAD_CHUNK_SIZE']
+        return jsonify(result), 201
+        
+    except Exception as e:
+        logger.error("创建分片上传失败: %s", e)
+        return jsonify({'error': f'创建分片上传失败: {str(e)}'}), 500
+
+@admin_bp.route('/admin/upload/chunked/<upload_id>', methods=['GET'])
+@admin_required
+def get_chunked_upload(upload_id):
+    try:
+        upload = load_upload(_chunked_upload_dir(), upload_id)
+        return jsonify(upload.to_dict()), 200
+    except UploadError as e:
+        return _upload_error_response(e)
+
+@admin_bp.route('/admin/upload/chunked/<upload_id>', methods=['PUT'])
+@admin_required
+def put_chunked_upload(upload_id):
+    try:
+        upload = load_upload(_chunked_upload_dir(), upload_id)
+        
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'error': '缺少offset参数', 'offset': upload.offset}), 400
+        
+        length = request.content_length
+        if length is not None and length > current_app.config['CHUNKED_UPLOAD_CHUNK_SIZE']:
+            return jsonify({'error': '分片过大', 'offset': upload.offset}), 413
+        
+        # 直接从请求流写入临时文件，不经过表单解析
+        new_offset = upload.write_chunk(offset, request.stream, length)
+        return jsonify({'offset': new_offset, 'complete': new_offset == upload.total_size}), 200
+        
+    except UploadError as e:
+        return _upload_error_response(e)
+    except Exception as e:
+        logger.error("写入分片失败: %s", e)
+        return jsonify({'error': f'写入分片失败: {str(e)}'}), 500
+
+@admin_bp.route('/admin/upload/chunked/<upload_id>', methods=['DELETE'])
+@admin_required
+def abort_chunked_upload(upload_id):
+    try:
+        upload = load_upload(_chunked_upload_dir(), upload_id)
+        upload.discard()
+        return jsonify({'message': '上传已取消'}), 200
+    except UploadError as e:
+        return _upload_error_response(e)
+
+@admin_bp.route('/admin/upload/chunked/<upload_id>/complete', methods=['POST'])
+@admin_required
+def complete_chunked_upload(upload_id):
+    try:
+        upload = load_upload(_chunked_upload_dir(), upload_id)
+        part_path = upload.finalize()
+        
+        upload_type = upload.manifest['type']
+        filename = upload.manifest['filename']
+        
+        # 移入去重存储
+        stored = store_local_file(part_path, filename.rsplit('.', 1)[1].lower())
+        upload.discard()
+        
+        if upload_type == 'news':
+            return jsonify({
+                'message': '视频上传成功',
+                'video': news_video_response(stored)
+            }), 200
+        
+        video_mode = upload.manifest['mode']
+        unique_filename = install_background_video(stored, filename, video_mode)
+        save_path = os.path.join('static', 'videos', unique_filename)
+        
+        # 与普通上传一致，同时设置为对应模式的默认视频
+        set_default_background_video(save_path, video_mode)
         
-        # 返回成功响应
         return jsonify({
             'message': '视频上传成功',
             'video': {
                 'filename': unique_filename,
-                'url': f'/static/videos/news/{unique_filename}',
-                'size': os.path.getsize(save_path)
+                'url': f'/static/videos/{unique_filename}',
+                'mode': video_mode
             }
         }), 200
-    
+        
+    except UploadError as e:
+        return _upload_error_response(e)
     except Exception as e:
-        print(f"上传新闻视频失败: {str(e)}")
-        return jsonify({'error': '上传视频失败'}), 500 
+        logger.error("完成分片上传失败: %s", e)
+        return jsonify({'error': f'完成分片上传失败: {str(e)}'}), 500
 
 @admin_bp.route('/admin/upload/news/image', methods=['POST'])
 @admin_required
@@ -1082,34 +1369,21 @@ def upload_news_image():
         if file_ext not in allowed_extensions:
             return jsonify({'error': '不支持的文件类型'}), 400
         
-        # 生成安全的文件名
-        safe_filename = secure_filename(filename)
-        # 添加UUID前缀避免文件名冲突
-        unique_filename = f"{uuid.uuid4()}_{safe_filename}"
-        
-        # 确保目标目录存在
-        upload_folder = os.path.join('static', 'images', 'news')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # 保存文件
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
-        
-        # 返回图片URL
-        image_url = f"/static/images/news/{unique_filename}"
+        # 按内容去重保存，重复上传同一图片时复用已有文件
+        stored = store_upload(file, file_ext)
+        # 按配置预先生成列表页使用的尺寸变体
+        warm_variants(stored.path, current_app.config['IMAGE_VARIANT_WARM_WIDTHS'])
         
         return jsonify({
             'success': True,
             'image': {
-                'url': image_url,
-                'filename': unique_filename
+                'url': stored.url,
+                'filename': os.path.basename(stored.path)
             }
         }), 200
         
     except Exception as e:
-        print(f"上传图片失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("上传图片失败: %s", e)
         return jsonify({'error': str(e)}), 500 
 
 @admin_bp.route('/admin/upload/activity/image', methods=['POST'])
@@ -1134,34 +1408,21 @@ def upload_activity_image():
         if file_ext not in allowed_extensions:
             return jsonify({'error': '不支持的文件类型'}), 400
         
-        # 生成安全的文件名
-        safe_filename = secure_filename(filename)
-        # 添加UUID前缀避免文件名冲突
-        unique_filename = f"{uuid.uuid4()}_{safe_filename}"
-        
-        # 确保目标目录存在
-        upload_folder = os.path.join('static', 'images', 'activities')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # 保存文件
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
-        
-        # 返回图片URL
-        image_url = f"/static/images/activities/{unique_filename}"
+        # 按内容去重保存，重复上传同一图片时复用已有文件
+        stored = store_upload(file, file_ext)
+        # 按配置预先生成列表页使用的尺寸变体
+        warm_variants(stored.path, current_app.config['IMAGE_VARIANT_WARM_WIDTHS'])
         
         return jsonify({
             'success': True,
             'image': {
-                'url': image_url,
-                'filename': unique_filename
+                'url': stored.url,
+                'filename': os.path.basename(stored.path)
             }
         }), 200
         
     except Exception as e:
-        print(f"上传活动图片失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("上传活动图片失败: %s", e)
         return jsonify({'error': str(e)}), 500 
 
 # 删除活动
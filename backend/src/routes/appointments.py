@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify, request, session
+import logging
 from src.models.database import db, Appointment, TimeSlotConfig, User
 from src.routes.auth import require_login, require_admin, is_admin
 from datetime import datetime, timedelta, time, date
@@ -7,46 +8,30 @@ import pytz
 from sqlalchemy import text
 
 appointments_bp = Blueprint('appointments', __name__)
+logger = logging.getLogger(__name__)
 
-# 初始化时间段配置
-def init_time_slots():
+# 默认的预约时间段，与迁移 seed_time_slot_configs 写入的数据相同
+DEFAULT_TIME_SLOTS = [
+    '09:00-10:00', '10:00-11:00', '11:00-12:00',
+    '13:00-14:00', '14:00-15:00', '15:00-16:00', '16:00-17:00',
+]
+
+
+def seed_time_slots():
+    """时间段表为空时写入默认时间段（允许周末预约），已有配置时不做任何修改。
+    生产环境由迁移写入，这里只用于开发环境 create_all 建出的空库"""
     try:
-        # 检查是否已有时间段配置
-        existing_slots = TimeSlotConfig.query.count()
-        if existing_slots == 0:
-            print("初始化预约时间段配置...")
-            # 创建默认的时间段配置
-            default_slots = [
-                {'time_slot': '09:00-10:00', 'max_visitors': 30, 'is_active': True},
-                {'time_slot': '10:00-11:00', 'max_visitors': 30, 'is_active': True},
-                {'time_slot': '11:00-12:00', 'max_visitors': 30, 'is_active': True},
-                {'time_slot': '13:00-14:00', 'max_visitors': 30, 'is_active': True},
-                {'time_slot': '14:00-15:00', 'max_visitors': 30, 'is_active': True},
-                {'time_slot': '15:00-16:00', 'max_visitors': 30, 'is_active': True},
-                {'time_slot': '16:00-17:00', 'max_visitors': 30, 'is_active': True}
-            ]
-            
-            for slot_data in default_slots:
-                slot = TimeSlotConfig(
-                    time_slot=slot_data['time_slot'],
-                    max_visitors=slot_data['max_visitors'],
-                    is_active=slot_data['is_active'],
-                    weekday_only=False  # 允许周末预约
-                )
-                db.session.add(slot)
-            
-            db.session.commit()
-            print(f"成功创建{len(default_slots)}个默认时间段")
-        else:
-            # 更新现有时间段配置，允许周末预约
-            time_slots = TimeSlotConfig.query.all()
-            for slot in time_slots:
-                slot.weekday_only = False
-            db.session.commit()
-            print(f"已更新{len(time_slots)}个时间段配置，允许周末预约")
+        if db.session.query(TimeSlotConfig.id).first() is not None:
+            return
+        for time_slot in DEFAULT_TIME_SLOTS:
+            db.session.add(TimeSlotConfig(
+                time_slot=time_slot, max_visitors=30, is_active=True, weekday_only=False
+            ))
+        db.session.commit()
+        logger.info("成功创建%s个默认时间段", len(DEFAULT_TIME_SLOTS))
     except Exception as e:
         db.session.rollback()
-        print(f"初始化时间段配置失败: {str(e)}")
+        logger.error("初始化时间段配置失败: %s", e)
 
 # 获取北京时间
 def get_beijing_time():
@@ -91,14 +76,17 @@ def get_available_slots():
         # 获取时间段配置
         time_slots = TimeSlotConfig.query.filter_by(is_active=True).all()
         
+        # 一次查询当天各时间段已预约人数
+        booked_counts = dict(db.session.query(
+            Appointment.time_slot, db.func.sum(Appointment.visitor_count)
+        ).filter(
+            Appointment.date == appointment_date,
+            Appointment.status.in_(['pending', 'confirmed'])
+        ).group_by(Appointment.time_slot).all())
+        
         available_slots = []
         for slot_config in time_slots:
-            # 计算该时间段已预约人数
-            booked_count = db.session.query(db.func.sum(Appointment.visitor_count)).filter(
-                Appointment.date == appointment_date,
-                Appointment.time_slot == slot_config.time_slot,
-                Appointment.status.in_(['pending', 'confirmed'])
-            ).scalar() or 0
+            booked_count = booked_counts.get(slot_config.time_slot) or 0
             
             available_count = slot_config.max_visitors - booked_count
             
@@ -200,7 +188,7 @@ def create_appointment():
         
     except Exception as e:
         db.session.rollback()
-        print(f"预约失败: {str(e)}")
+        logger.error("预约失败: %s", e)
         return jsonify({'error': '预约失败，请稍后重试'}), 500
 
 @appointments_bp.route('/user/appointments', methods=['GET'])
@@ -238,22 +226,22 @@ def cancel_appointment(appointment_id):
         return jsonify({'error': '请先登录'}), 401
     
     try:
-        print(f"尝试取消预约 ID: {appointment_id}, 用户 ID: {session['user_id']}")
+        logger.debug("尝试取消预约 ID: %s, 用户 ID: %s", appointment_id, session['user_id'])
         appointment = Appointment.query.filter_by(
             id=appointment_id,
             user_id=session['user_id']
         ).first()
         
         if not appointment:
-            print(f"预约不存在或不属于当前用户: ID {appointment_id}")
+            logger.debug("预约不存在或不属于当前用户: ID %s", appointment_id)
             return jsonify({'error': '预约不存在'}), 404
         
         if appointment.status == 'cancelled':
-            print(f"预约已经是取消状态: ID {appointment_id}")
+            logger.info("预约已经是取消状态: ID %s", appointment_id)
             return jsonify({'error': '预约已取消'}), 400
         
         if appointment.status == 'completed':
-            print(f"已完成的预约不能取消: ID {appointment_id}")
+            logger.info("已完成的预约不能取消: ID %s", appointment_id)
             return jsonify({'error': '已完成的预约不能取消'}), 400
         
         # 直接更新数据库字段
@@ -265,20 +253,20 @@ def cancel_appointment(appointment_id):
         )
         db.session.commit()
         
-        print(f"预约取消成功: ID {appointment_id}")
+        logger.info("预约取消成功: ID %s", appointment_id)
         return jsonify({'message': '预约已取消'}), 200
     
     except Exception as e:
         db.session.rollback()
-        print(f"取消预约失败: {str(e)}")
+        logger.error("取消预约失败: %s", e)
         return jsonify({'error': '取消预约失败，请稍后重试'}), 500
 
 # 管理员接口
 @appointments_bp.route('/admin/appointments', methods=['GET'])
 def admin_get_appointments():
     if not require_admin():
-        print("检查管理员权限: session={}".format(session))
-        print("未登录，拒绝访问")
+        logger.debug("检查管理员权限: user_id=%s", session.get('user_id'))
+        logger.debug("未登录，拒绝访问")
         return jsonify({'error': '权限不足'}), 403
     
     try:
@@ -342,9 +330,7 @@ def admin_get_appointments():
         }), 200
         
     except Exception as e:
-        print(f"获取预约列表失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("获取预约列表失败: %s", e)
         return jsonify({'error': '获取预约列表失败'}), 500
 
 
@@ -352,8 +338,8 @@ def admin_get_appointments():
 def admin_get_appointment_counts():
     """获取预约数量统计信息"""
     if not require_admin():
-        print("检查管理员权限: session={}".format(session))
-        print("未登录，拒绝访问")
+        logger.debug("检查管理员权限: user_id=%s", session.get('user_id'))
+        logger.debug("未登录，拒绝访问")
         return jsonify({'error': '权限不足'}), 401
     
     try:
@@ -408,9 +394,7 @@ def admin_get_appointment_counts():
             'upcoming': upcoming_count
         }), 200
     except Exception as e:
-        print(f"获取预约统计信息失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("获取预约统计信息失败: %s", e)
         return jsonify({'error': '获取预约统计信息失败', 'details': str(e)}), 500
 
 @appointments_bp.route('/admin/appointments/<int:appointment_id>', methods=['PUT'])
@@ -420,17 +404,17 @@ def admin_update_appointment(appointment_id):
         return jsonify({'error': '无权访问'}), 403
     
     try:
-        print(f"开始更新预约 ID: {appointment_id}")
+        logger.debug("开始更新预约 ID: %s", appointment_id)
         appointment = Appointment.query.get(appointment_id)
         
         if not appointment:
             return jsonify({'error': '预约不存在'}), 404
         
         data = request.json
-        print(f"接收到的数据: {data}")
+        logger.debug("接收到的数据: %s", data)
         
         if 'status' in data:
-            print(f"更新状态为: {data['status']}")
+            logger.debug("更新状态为: %s", data['status'])
             appointment.status = data['status']
         
         # 使用SQL更新admin_notes字段
@@ -451,7 +435,7 @@ def admin_update_appointment(appointment_id):
         return jsonify({'message': '预约已更新'}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"更新预约失败: {str(e)}")
+        logger.error("更新预约失败: %s", e)
         return jsonify({'error': '更新预约失败，请稍后重试'}), 500
 
 @appointments_bp.route('/admin/time-slots', methods=['GET'])
@@ -587,9 +571,7 @@ def get_appointment_detail(appointment_id):
         return jsonify({'appointment': appointment_data}), 200
         
     except Exception as e:
-        print(f"获取预约详情失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("获取预约详情失败: %s", e)
         return jsonify({'error': '获取预约详情失败'}), 500
 
 @appointments_bp.route('/appointments', methods=['GET'])
@@ -685,8 +667,6 @@ def get_appointments():
         }), 200
         
     except Exception as e:
-        print(f"获取预约列表失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("获取预约列表失败: %s", e)
         return jsonify({'error': '获取预约列表失败'}), 500
 
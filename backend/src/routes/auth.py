@@ -1,10 +1,16 @@
 from flask import Blueprint, request, jsonify, session
+import logging
 import re
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from src.models.database import db
 from src.models.user import User
-from werkzeug.security import check_password_hash, generate_password_hash
+from src.utils.user_cache import get_user_info
+from src.utils.passwords import hash_password, verify_and_upgrade
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
 
 def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -14,6 +20,18 @@ def validate_phone(phone):
     pattern = r'^1[3-9]\d{9}$'
     return re.match(pattern, phone) is not None
 
+def duplicate_field(error):
+    """根据唯一约束冲突判断重复的字段（'username' 或 'email'），无法判断时返回None"""
+    # PostgreSQL（psycopg2）提供约束名，如 users_email_key
+    diag = getattr(error.orig, 'diag', None)
+    constraint = (getattr(diag, 'constraint_name', None) or '').lower()
+    # PostgreSQL: Key (email)=(...) already exists；SQLite: UNIQUE constraint failed: users.email
+    message = str(error.orig).lower()
+    for field in ('username', 'email'):
+        if field in constraint or f'({field})' in message or f'users.{field}' in message:
+            return field
+    return None
+
 def require_login():
     """检查用户是否已登录"""
     if 'user_id' not in session:
@@ -22,10 +40,10 @@ def require_login():
 
 def is_admin():
     """检查当前用户是否为管理员"""
-    print(f"检查管理员权限: session={session}")
+    logger.debug("检查管理员权限: user_id=%s", session.get('user_id'))
     if 'user_id' not in session or session.get('user_role') != 'admin':
         return False
-    print(f"权限验证通过: user_id={session.get('user_id')}, role={session.get('user_role')}")
+    logger.debug("权限验证通过: user_id=%s, role=%s", session.get('user_id'), session.get('user_role'))
     return True
 
 def require_admin():
@@ -51,48 +69,36 @@ def register():
         if data.get('phone') and not validate_phone(data['phone']):
             return jsonify({'error': '手机号格式不正确'}), 400
         
-        # 检查用户名是否已存在
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': '用户名已被使用'}), 400
-        
-        # 检查邮箱是否已存在
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': '邮箱已被注册'}), 400
+        # 用户名、邮箱的唯一性由数据库约束保证，插入并直接返回新用户，一次往返完成注册，
+        # 并发注册同一用户名时也不会出现先查询后插入的竞态；
+        # 重复注册同样要计算密码哈希，由 auth.register 的限流（RATELIMIT_REGISTER_IP）限制次数
+        sql = text("""
+        INSERT INTO users (username, email, phone, password_hash, role, created_at)
+        VALUES (:username, :email, :phone, :password_hash, :role, :created_at)
+        RETURNING id, username, email
+        """)
+        
+        params = {
+            'username': data['username'],
+            'email': data['email'],
+            'phone': data.get('phone'),
+            'password_hash': hash_password(data['password']),
+            'role': 'user',
+            'created_at': datetime.utcnow()
+        }
         
-        # 创建新用户 - 直接使用手动SQL方式创建用户，避免ORM模型字段不匹配问题
         try:
-            from datetime import datetime
-            from werkzeug.security import generate_password_hash
-            
-            # 使用SQLAlchemy的text函数来构建SQL
-            from sqlalchemy import text
-            
-            sql = text("""
-            INSERT INTO users (username, email, phone, password_hash, role, created_at)
-            VALUES (:username, :email, :phone, :password_hash, :role, :created_at)
-            """)
-            
-            params = {
-                'username': data['username'],
-                'email': data['email'],
-                'phone': data.get('phone'),
-                'password_hash': generate_password_hash(data['password']),
-                'role': 'user',
-                'created_at': datetime.utcnow()
-            }
-            
-            db.session.execute(sql, params)
+            user = db.session.execute(sql, params).one()
             db.session.commit()
-            
-            # 获取新创建的用户
-            user = User.query.filter_by(username=data['username']).first()
-            if not user:
-                raise Exception("用户创建成功但无法获取用户信息")
-                
-        except Exception as e:
+        except IntegrityError as e:
             db.session.rollback()
-            print(f"创建用户失败: {str(e)}")
-            raise e
+            field = duplicate_field(e)
+            if field == 'username':
+                return jsonify({'error': '用户名已被使用'}), 400
+            if field == 'email':
+                return jsonify({'error': '邮箱已被注册'}), 400
+            logger.error("创建用户失败: %s", e)
+            raise
         
         # 返回成功信息
         return jsonify({
@@ -106,18 +112,18 @@ def register():
         
     except Exception as e:
         db.session.rollback()
-        print(f"注册失败: {str(e)}")
+        logger.error("注册失败: %s", e)
         return jsonify({'error': '注册失败', 'details': str(e)}), 500
 
 @auth_bp.route('/auth/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
-        print(f"收到登录请求: {data}")
+        logger.debug("收到登录请求: 用户=%s", data.get('username') if data else None)
         
         # 验证必填字段
         if not data.get('username') or not data.get('password'):
-            print("用户名或密码为空")
+            logger.debug("用户名或密码为空")
             return jsonify({'error': '用户名和密码是必填字段'}), 400
         
         # 查找用户
@@ -125,17 +131,19 @@ def login():
         
         # 验证用户名和密码
         if not user:
-            print(f"找不到用户: {data['username']}")
+            logger.debug("找不到用户: %s", data['username'])
             return jsonify({'error': '用户名或密码错误'}), 401
         
-        print(f"找到用户: {user.username}, 密码哈希: {user.password_hash}")
-        
-        # 直接使用werkzeug.security.check_password_hash
-        if not check_password_hash(user.password_hash, data['password']):
-            print(f"密码校验失败: 用户={user.username}, 提供的密码={data['password']}")
+        # 校验密码，哈希参数与当前配置不一致时顺便升级
+        old_hash = user.password_hash
+        if not verify_and_upgrade(user, data['password']):
+            logger.info("密码校验失败: 用户=%s", user.username)
             return jsonify({'error': '用户名或密码错误'}), 401
         
-        print(f"密码校验成功")
+        logger.debug("密码校验成功: 用户=%s", user.username)
+        if user.password_hash != old_hash:
+            db.session.commit()
+            logger.info("已按新的哈希参数更新密码: 用户=%s", user.username)
         
         # 设置会话
         session['user_id'] = user.id
@@ -143,7 +151,7 @@ def login():
         # 确保会话持久性
         session.permanent = True
         
-        print(f"会话已设置: user_id={user.id}, role={user.role}, permanent={session.permanent}")
+        logger.debug("会话已设置: user_id=%s, role=%s, permanent=%s", user.id, user.role, session.permanent)
         
         # 返回成功信息
         return jsonify({
@@ -157,9 +165,7 @@ def login():
         }), 200
         
     except Exception as e:
-        print(f"登录失败，发生异常: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("登录失败，发生异常: %s", e)
         return jsonify({'error': '登录失败', 'details': str(e)}), 500
 
 @auth_bp.route('/auth/logout', methods=['POST'])
@@ -174,31 +180,31 @@ def logout():
 def check_auth():
     """检查用户是否已登录"""
     if 'user_id' not in session:
-        print("会话中没有user_id，未认证")
+        logger.debug("会话中没有user_id，未认证")
         return jsonify({'authenticated': False}), 200
     
     try:
-        # 处理数据库中的用户
-        user = User.query.get(session['user_id'])
+        # 用户信息有短时间的进程内缓存，前端频繁检查登录状态时不必每次查询数据库
+        user = get_user_info(session['user_id'])
         if not user:
-            print(f"找不到会话中的用户ID: {session['user_id']}")
+            logger.debug("找不到会话中的用户ID: %s", session['user_id'])
             # 清除无效会话
             session.pop('user_id', None)
             session.pop('user_role', None)
             return jsonify({'authenticated': False}), 200
         
-        print(f"用户已认证: id={user.id}, username={user.username}, role={user.role}")
+        logger.debug("用户已认证: id=%s, username=%s, role=%s", user['id'], user['username'], user['role'])
         
         return jsonify({
             'authenticated': True,
             'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'role': user.role
+                'id': user['id'],
+                'username': user['username'],
+                'email': user['email'],
+                'role': user['role']
             }
         }), 200
     except Exception as e:
-        print(f"验证用户状态失败: {str(e)}")
+        logger.error("验证用户状态失败: %s", e)
         return jsonify({'authenticated': False, 'error': str(e)}), 500
 
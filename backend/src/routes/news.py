@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify, session, current_app
 from src.models.database import db, News
+from src.utils.transcode import is_playlist_url, find_playlist_url, find_source_url
 from datetime import datetime
 import math
-import traceback
 import uuid
 import pytz
 
@@ -44,7 +44,7 @@ def get_news_list():
         total = query.count()
         news_list = query.offset((page - 1) * per_page).limit(per_page).all()
         
-        current_app.logger.info(f"获取新闻列表成功: 总数={total}, 页数={page}, 每页={per_page}")
+        current_app.logger.debug("获取新闻列表成功: 总数=%s, 页数=%s, 每页=%s", total, page, per_page)
         
         return jsonify({
             'news': [{
@@ -66,8 +66,7 @@ def get_news_list():
         
     except Exception as e:
         error_msg = f"获取新闻列表失败: {str(e)}"
-        stack_trace = traceback.format_exc()
-        current_app.logger.error(f"{error_msg}\n{stack_trace}")
+        current_app.logger.exception("获取新闻列表失败: %s", e)
         return jsonify({'error': error_msg}), 500
 
 @news_bp.route('/news/<news_id>', methods=['GET'])
@@ -78,6 +77,17 @@ def get_news_detail(news_id):
         if not news:
             return jsonify({'error': '新闻不存在'}), 404
         
+        # 本地视频转码为HLS后，同时返回播放列表和原视频地址，由前端按浏览器能力选择
+        video_playlist_url = None
+        video_fallback_url = None
+        if news.video_source == 'local' and news.video_url:
+            if is_playlist_url(news.video_url):
+                video_playlist_url = news.video_url
+                video_fallback_url = find_source_url(news.video_url)
+            else:
+                video_playlist_url = find_playlist_url(news.video_url)
+                video_fallback_url = news.video_url
+        
         return jsonify({
             'news': {
                 'id': news.id,
@@ -89,14 +99,15 @@ def get_news_detail(news_id):
                 'updated_at': news.updatedAt.isoformat(),
                 'image_url': news.imageUrl,
                 'video_url': news.video_url,
-                'video_source': news.video_source
+                'video_source': news.video_source,
+                'video_playlist_url': video_playlist_url,
+                'video_fallback_url': video_fallback_url
             }
         }), 200
         
     except Exception as e:
         error_msg = f"获取新闻详情失败: {str(e)}"
-        stack_trace = traceback.format_exc()
-        current_app.logger.error(f"{error_msg}\n{stack_trace}")
+        current_app.logger.exception("获取新闻详情失败: %s", e)
         return jsonify({'error': error_msg}), 500
 
 @news_bp.route('/admin/news', methods=['GET'])
@@ -148,8 +159,7 @@ def admin_get_news_list():
         
     except Exception as e:
         error_msg = f"获取管理员新闻列表失败: {str(e)}"
-        stack_trace = traceback.format_exc()
-        current_app.logger.error(f"{error_msg}\n{stack_trace}")
+        current_app.logger.exception("获取管理员新闻列表失败: %s", e)
         return jsonify({'error': error_msg}), 500
 
 @news_bp.route('/admin/news', methods=['POST'])
@@ -197,8 +207,7 @@ def admin_create_news():
     except Exception as e:
         db.session.rollback()
         error_msg = f"创建新闻失败: {str(e)}"
-        stack_trace = traceback.format_exc()
-        current_app.logger.error(f"{error_msg}\n{stack_trace}")
+        current_app.logger.exception("创建新闻失败: %s", e)
         return jsonify({'error': error_msg}), 500
 
 @news_bp.route('/admin/news/<news_id>', methods=['PUT'])
@@ -248,8 +257,7 @@ def admin_update_news(news_id):
     except Exception as e:
         db.session.rollback()
         error_msg = f"更新新闻失败: {str(e)}"
-        stack_trace = traceback.format_exc()
-        current_app.logger.error(f"{error_msg}\n{stack_trace}")
+        current_app.logger.exception("更新新闻失败: %s", e)
         return jsonify({'error': error_msg}), 500
 
 @news_bp.route('/admin/news/<news_id>', methods=['DELETE'])
@@ -270,8 +278,7 @@ def admin_delete_news(news_id):
     except Exception as e:
         db.session.rollback()
         error_msg = f"删除新闻失败: {str(e)}"
-        stack_trace = traceback.format_exc()
-        current_app.logger.error(f"{error_msg}\n{stack_trace}")
+        current_app.logger.exception("删除新闻失败: %s", e)
         return jsonify({'error': error_msg}), 500
 
 @news_bp.route('/news/categories', methods=['GET'])
@@ -1,8 +1,12 @@
-from flask import Blueprint, jsonify, request, session
-from werkzeug.security import generate_password_hash
+from flask import Blueprint, jsonify, request, session, current_app
+import logging
 from src.models.database import db, User
+from src.utils.server_session import revoke_user_sessions
+from src.utils.user_cache import get_user_info, invalidate_user
+from src.utils.passwords import hash_password
 
 user_bp = Blueprint('user', __name__)
+logger = logging.getLogger(__name__)
 
 @user_bp.route('/users', methods=['GET'])
 def get_users():
@@ -30,6 +34,7 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    invalidate_user(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -37,6 +42,7 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_user(user_id)
     return '', 204
 
 @user_bp.route('/user/profile', methods=['GET'])
@@ -46,26 +52,17 @@ def get_profile():
         return jsonify({'error': '未登录'}), 401
     
     try:
-        # 获取用户信息
-        user = User.query.get(session['user_id'])
+        # 获取用户信息（进程内短时间缓存）
+        user = get_user_info(session['user_id'])
             
         if not user:
             return jsonify({'error': '用户不存在'}), 404
         
         # 返回用户信息
-        return jsonify({
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'phone': user.phone if hasattr(user, 'phone') else None,
-                'role': user.role,
-                'created_at': user.created_at.isoformat() if hasattr(user, 'created_at') else None
-            }
-        }), 200
+        return jsonify({'user': user}), 200
 
     except Exception as e:
-        print(f"获取用户信息失败: {str(e)}")
+        logger.error("获取用户信息失败: %s", e)
         return jsonify({'error': '获取用户信息失败'}), 500
 
 @user_bp.route('/user/profile', methods=['PUT'])
@@ -93,9 +90,14 @@ def update_profile():
             user.phone = data['phone']
         
         if data and 'password' in data and data['password']:
-            user.password_hash = generate_password_hash(data['password'])
+            user.password_hash = hash_password(data['password'])
         
         db.session.commit()
+        invalidate_user(user.id)
+        
+        # 修改密码后其他设备上的会话失效，保留当前会话
+        if data and 'password' in data and data['password']:
+            revoke_user_sessions(current_app, user.id, keep_sid=getattr(session, 'sid', None))
         
         return jsonify({
             'message': '用户信息更新成功',
@@ -110,7 +112,7 @@ def update_profile():
         
     except Exception as e:
         db.session.rollback()
-        print(f"更新用户信息失败: {str(e)}")
+        logger.error("更新用户信息失败: %s", e)
         return jsonify({'error': '更新用户信息失败'}), 500
 
 # 测试API接口
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app, send_file, session, url_for
+import logging
 import os
 import shutil
 import time
@@ -8,6 +9,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 from functools import wraps
 from flask import send_from_directory
+from src.utils.thumbnail_cache import get_thumbnail_cache
 
 # 尝试导入PIL库，用于生成缩略图
 try:
@@ -17,16 +19,17 @@ except ImportError:
     HAS_PIL = False
 
 videos_bp = Blueprint('videos', __name__)
+logger = logging.getLogger(__name__)
 
 # 检查是否为管理员
 def requires_admin(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        print(f"检查管理员权限: session={session}")
+        logger.debug("检查管理员权限: user_id=%s", session.get('user_id'))
         if 'user_id' not in session or session.get('user_role') != 'admin':
-            print("未登录或非管理员，拒绝访问")
+            logger.debug("未登录或非管理员，拒绝访问")
             return jsonify({"error": "未授权访问"}), 401
-        print(f"权限验证通过: user_id={session.get('user_id')}, role={session.get('user_role')}")
+        logger.debug("权限验证通过: user_id=%s, role=%s", session.get('user_id'), session.get('user_role'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -63,7 +66,7 @@ def get_videos():
         if os.path.exists(dark_file_path):
             default_dark = os.path.basename(os.path.realpath(dark_file_path))
     except Exception as e:
-        current_app.logger.error(f"Error reading default videos: {str(e)}")
+        current_app.logger.error("Error reading default videos: %s", e)
     
     # 遍历视频目录
     for filename in os.listdir(videos_dir):
@@ -103,7 +106,7 @@ def set_default_video():
     filename = data.get('filename')
     mode = data.get('mode', 'light')  # 默认为light模式
     
-    print(f"设置默认视频: {filename}, 模式: {mode}")
+    logger.debug("设置默认视频: %s, 模式: %s", filename, mode)
     
     if not filename:
         return jsonify({'error': 'No filename provided'}), 400
@@ -118,26 +121,26 @@ def set_default_video():
     try:
         # 检查源文件是否存在
         if not os.path.exists(source_path):
-            print(f"源文件不存在: {source_path}")
+            logger.debug("源文件不存在: %s", source_path)
             return jsonify({'error': f'Source file {filename} not found'}), 404
         
-        print(f"源文件存在: {source_path}")
+        logger.debug("源文件存在: %s", source_path)
         
         # 如果目标文件已存在，直接覆盖
         if os.path.exists(target_path):
             # 删除现有的目标文件
             os.remove(target_path)
-            print(f"删除现有目标文件: {target_path}")
+            logger.debug("删除现有目标文件: %s", target_path)
         
         # 复制源文件到目标路径
         shutil.copy2(source_path, target_path)
-        print(f"复制文件: {source_path} -> {target_path}")
+        logger.debug("复制文件: %s -> %s", source_path, target_path)
         
         return jsonify({'success': True, 'message': f'Default {mode} video set to {filename}'})
     
     except Exception as e:
-        print(f"设置默认视频时出错: {str(e)}")
-        current_app.logger.error(f"Error setting default video: {str(e)}")
+        logger.error("设置默认视频时出错: %s", e)
+        current_app.logger.error("Error setting default video: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # 删除视频
@@ -162,67 +165,79 @@ def delete_video(filename):
         os.remove(file_path)
         return jsonify({'success': True})
     except Exception as e:
-        current_app.logger.error(f"Error deleting video: {str(e)}")
+        current_app.logger.error("Error deleting video: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # 获取视频缩略图
 @videos_bp.route('/videos/thumbnail', methods=['GET'])
 def get_video_thumbnail():
     video_url = request.args.get('url', '')
-    print(f"获取视频缩略图请求: url={video_url}")
+    logger.debug("获取视频缩略图请求: url=%s", video_url)
     
     # 默认缩略图路径（使用相对路径）
     default_thumbnail = os.path.join('static', 'images', 'video-thumbnail.jpg')
     
     if not video_url:
-        print("未提供视频URL，返回默认缩略图")
+        logger.debug("未提供视频URL，返回默认缩略图")
         return send_file(os.path.join(current_app.root_path, '..', default_thumbnail))
     
     # 清理URL参数
     if '?' in video_url:
         video_url = video_url.split('?')[0]
-        print(f"清理后的URL: {video_url}")
+        logger.debug("清理后的URL: %s", video_url)
     
     # 确保URL解码正确，处理编码后的空格和其他特殊字符
     from urllib.parse import unquote
     video_url = unquote(video_url)
     
-    print(f"解码后的URL: {video_url}")
+    logger.debug("解码后的URL: %s", video_url)
     
     # 从URL中提取文件路径（使用相对路径）
     if video_url.startswith('/static/'):
         # 移除开头的斜杠，使用相对路径
         rel_path = video_url[1:]  # 去掉开头的斜杠
         video_path = os.path.join(current_app.root_path, '..', rel_path)
-        print(f"从静态路径构建视频路径: {video_path}")
+        logger.debug("从静态路径构建视频路径: %s", video_path)
     elif video_url.startswith('http'):
         # 从URL中提取文件名
         filename = os.path.basename(video_url)
         rel_path = os.path.join('static', 'videos', filename)
         video_path = os.path.join(current_app.root_path, '..', rel_path)
-        print(f"从URL构建视频路径: {video_path}")
+        logger.debug("从URL构建视频路径: %s", video_path)
     else:
         # 假设是文件名，构建到videos目录的相对路径
         rel_path = os.path.join('static', 'videos', os.path.basename(video_url))
         video_path = os.path.join(current_app.root_path, '..', rel_path)
-        print(f"从文件名构建视频路径: {video_path}")
+        logger.debug("从文件名构建视频路径: %s", video_path)
+    
+    # 缩略图索引命中时直接返回，不检查文件
+    thumbnail_cache = get_thumbnail_cache()
+    thumbnails_dir = current_app.config['THUMBNAIL_DIR']
+    thumbnail_path = os.path.join(
+        thumbnails_dir, f"{os.path.splitext(secure_filename(os.path.basename(video_path)))[0]}_thumb.jpg"
+    )
+    if thumbnail_cache.lookup(thumbnail_path, video_path):
+        try:
+            return send_file(thumbnail_path)
+        except FileNotFoundError:
+            # 已被其他worker淘汰，重新生成
+            thumbnail_cache.forget(thumbnail_path)
     
     # 检查文件是否存在
     if not os.path.exists(video_path):
-        print(f"视频文件不存在: {video_path}")
+        logger.debug("视频文件不存在: %s", video_path)
         # 尝试处理可能的空格编码问题
         alternative_path = video_path.replace('%20', ' ')
         if os.path.exists(alternative_path):
             video_path = alternative_path
-            print(f"找到替代路径: {video_path}")
+            logger.debug("找到替代路径: %s", video_path)
         else:
             return send_file(os.path.join(current_app.root_path, '..', default_thumbnail))
     
-    print(f"视频文件存在: {video_path}")
+    logger.debug("视频文件存在: %s", video_path)
     
     # 生成缩略图
     # 创建缩略图目录（如果不存在）
-    thumbnails_dir = os.path.join(current_app.root_path, '..', 'static', 'thumbnails')
     if not os.path.exists(thumbnails_dir):
         os.makedirs(thumbnails_dir)
     
@@ -233,14 +248,14 @@ def get_video_thumbnail():
     thumbnail_filename = f"{os.path.splitext(safe_basename)[0]}_thumb.jpg"
     thumbnail_path = os.path.join(thumbnails_dir, thumbnail_filename)
     
-    print(f"缩略图路径: {thumbnail_path}")
+    logger.debug("缩略图路径: %s", thumbnail_path)
     
     # 如果缩略图已存在且比视频文件新，直接使用
-    if os.path.exists(thumbnail_path) and os.path.getmtime(thumbnail_path) > os.path.getmtime(video_path):
-        print(f"使用已存在的缩略图: {thumbnail_path}")
+    if thumbnail_cache.lookup(thumbnail_path, video_path):
+        logger.debug("使用已存在的缩略图: %s", thumbnail_path)
         return send_file(thumbnail_path)
     
-    print(f"需要生成新的缩略图: {thumbnail_path}")
+    logger.debug("需要生成新的缩略图: %s", thumbnail_path)
     
     # 尝试使用ffmpeg提取视频的第一帧
     ffmpeg_success = False
@@ -250,7 +265,7 @@ def get_video_thumbnail():
         
         # 检查ffmpeg是否可用
         if shutil.which('ffmpeg'):
-            print("检测到ffmpeg可用，使用ffmpeg生成缩略图")
+            logger.debug("检测到ffmpeg可用，使用ffmpeg生成缩略图")
             
             # 构建ffmpeg命令，提取视频的第一帧
             ffmpeg_cmd = [
@@ -268,23 +283,24 @@ def get_video_thumbnail():
             result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
             
             if result.returncode == 0 and os.path.exists(thumbnail_path):
-                print(f"成功使用ffmpeg生成缩略图: {thumbnail_path}")
+                logger.info("成功使用ffmpeg生成缩略图: %s", thumbnail_path)
                 ffmpeg_success = True
             else:
-                print(f"ffmpeg执行失败: {result.stderr.decode('utf-8')}")
+                logger.warning("ffmpeg执行失败: %s", result.stderr.decode('utf-8'))
         else:
-            print("ffmpeg不可用")
+            logger.debug("ffmpeg不可用")
     except Exception as e:
-        print(f"使用ffmpeg生成缩略图时出错: {str(e)}")
+        logger.error("使用ffmpeg生成缩略图时出错: %s", e)
     
     # 如果ffmpeg成功生成了缩略图，直接返回
     if ffmpeg_success:
+        thumbnail_cache.put(thumbnail_path, video_path)
         return send_file(thumbnail_path)
     
     # 如果ffmpeg失败，尝试使用PIL生成缩略图
     if HAS_PIL:
         try:
-            print("使用PIL生成缩略图")
+            logger.debug("使用PIL生成缩略图")
             # 创建一个彩色缩略图
             width, height = 640, 360
             img = Image.new('RGB', (width, height), color=(40, 40, 40))
@@ -323,7 +339,7 @@ def get_video_thumbnail():
                     title_font = ImageFont.truetype(font_path, 24)
                     info_font = ImageFont.truetype(font_path, 16)
                 except Exception as e:
-                    print(f"加载字体失败: {str(e)}")
+                    logger.warning("加载字体失败: %s", e)
                     # 如果无法加载字体，使用默认字体
                     title_font = ImageFont.load_default()
                     info_font = ImageFont.load_default()
@@ -363,19 +379,20 @@ def get_video_thumbnail():
                 ], fill=(255, 255, 255))
                 
             except Exception as e:
-                print(f"添加文本时出错: {str(e)}")
+                logger.error("添加文本时出错: %s", e)
             
             # 保存缩略图
             img.save(thumbnail_path, 'JPEG', quality=90)
-            print(f"成功使用PIL生成缩略图: {thumbnail_path}")
+            logger.info("成功使用PIL生成缩略图: %s", thumbnail_path)
+            thumbnail_cache.put(thumbnail_path, video_path)
             return send_file(thumbnail_path)
             
         except Exception as e:
-            print(f"使用PIL生成缩略图时出错: {str(e)}")
+            logger.error("使用PIL生成缩略图时出错: %s", e)
             # 出错时返回默认缩略图
     
     # 如果没有PIL或生成失败，返回默认缩略图
-    print("无法生成缩略图，返回默认缩略图")
+    logger.debug("无法生成缩略图，返回默认缩略图")
     return send_file(os.path.join(current_app.root_path, '..', default_thumbnail)) 
 
 # 手动为特定视频生成缩略图
@@ -383,18 +400,18 @@ def get_video_thumbnail():
 @requires_admin
 def generate_thumbnail_for_video(filename):
     try:
-        print(f"手动为视频生成缩略图: {filename}")
+        logger.debug("手动为视频生成缩略图: %s", filename)
         
         # 构建视频路径
         videos_dir = os.path.join(current_app.root_path, '..', 'static', 'videos')
         video_path = os.path.join(videos_dir, filename)
         
         if not os.path.exists(video_path):
-            print(f"视频文件不存在: {video_path}")
+            logger.debug("视频文件不存在: %s", video_path)
             return jsonify({"error": "视频文件不存在"}), 404
         
         # 创建缩略图目录（如果不存在）
-        thumbnails_dir = os.path.join(current_app.root_path, '..', 'static', 'thumbnails')
+        thumbnails_dir = current_app.config['THUMBNAIL_DIR']
         if not os.path.exists(thumbnails_dir):
             os.makedirs(thumbnails_dir)
         
@@ -411,7 +428,7 @@ def generate_thumbnail_for_video(filename):
             
             # 检查ffmpeg是否可用
             if shutil.which('ffmpeg'):
-                print("检测到ffmpeg可用，使用ffmpeg生成缩略图")
+                logger.debug("检测到ffmpeg可用，使用ffmpeg生成缩略图")
                 
                 # 构建ffmpeg命令
                 ffmpeg_cmd = [
@@ -429,19 +446,19 @@ def generate_thumbnail_for_video(filename):
                 result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                 
                 if result.returncode == 0 and os.path.exists(thumbnail_path):
-                    print(f"成功使用ffmpeg生成缩略图: {thumbnail_path}")
+                    logger.info("成功使用ffmpeg生成缩略图: %s", thumbnail_path)
                     success = True
                 else:
-                    print(f"ffmpeg执行失败: {result.stderr.decode('utf-8')}")
+                    logger.warning("ffmpeg执行失败: %s", result.stderr.decode('utf-8'))
             else:
-                print("ffmpeg不可用")
+                logger.debug("ffmpeg不可用")
         except Exception as e:
-            print(f"使用ffmpeg生成缩略图时出错: {str(e)}")
+            logger.error("使用ffmpeg生成缩略图时出错: %s", e)
         
         # 如果ffmpeg失败，尝试使用PIL
         if not success and HAS_PIL:
             try:
-                print("使用PIL生成缩略图")
+                logger.debug("使用PIL生成缩略图")
                 # 创建一个彩色缩略图
                 width, height = 640, 360
                 img = Image.new('RGB', (width, height), color=(40, 40, 40))
@@ -477,7 +494,7 @@ def generate_thumbnail_for_video(filename):
                     title_font = ImageFont.truetype(font_path, 24)
                     info_font = ImageFont.truetype(font_path, 16)
                 except Exception as e:
-                    print(f"加载字体失败: {str(e)}")
+                    logger.warning("加载字体失败: %s", e)
                     title_font = ImageFont.load_default()
                     info_font = ImageFont.load_default()
                 
@@ -492,13 +509,14 @@ def generate_thumbnail_for_video(filename):
                 
                 # 保存缩略图
                 img.save(thumbnail_path, 'JPEG', quality=90)
-                print(f"成功使用PIL生成缩略图: {thumbnail_path}")
+                logger.info("成功使用PIL生成缩略图: %s", thumbnail_path)
                 success = True
                 
             except Exception as e:
-                print(f"使用PIL生成缩略图时出错: {str(e)}")
+                logger.error("使用PIL生成缩略图时出错: %s", e)
         
         if success:
+            get_thumbnail_cache().put(thumbnail_path, video_path)
             return jsonify({
                 "success": True,
                 "message": f"已成功为视频 {filename} 生成缩略图",
@@ -508,5 +526,5 @@ def generate_thumbnail_for_video(filename):
             return jsonify({"error": "生成缩略图失败"}), 500
             
     except Exception as e:
-        print(f"生成缩略图过程中出错: {str(e)}")
+        logger.error("生成缩略图过程中出错: %s", e)
         return jsonify({"error": str(e)}), 500 
\ No newline at end of file
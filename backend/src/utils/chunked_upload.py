@@ -0,0 +1,190 @@
+"""
+分片、可续传的大文件上传
+
+上传流程：
+1. init     创建上传会话，返回 upload_id
+2. PUT      按偏移量写入分片，数据直接从请求流写入临时文件，内存占用只有一个读缓冲
+3. status   查询已接收的字节数，上传中断后从该偏移量继续
+4. finalize 校验大小后交给调用方移动到最终位置
+
+会话信息（manifest）与临时文件都保存在磁盘上，多个 gunicorn worker 之间共享；
+已接收字节数以临时文件的实际大小为准，进程崩溃后也能正确续传。
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # Windows下没有fcntl，退化为不加锁
+    HAS_FCNTL = False
+
+# 从请求流读取的块大小
+COPY_BUFFER_SIZE = 64 * 1024
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """分片上传错误，status_code 对应返回给客户端的HTTP状态码"""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.offset = offset
+
+
+class ChunkedUpload:
+    """单个分片上传会话"""
+
+    def __init__(self, upload_dir, manifest):
+        self.upload_dir = upload_dir
+        self.manifest = manifest
+
+    @property
+    def id(self):
+        return self.manifest['id']
+
+    @property
+    def total_size(self):
+        return self.manifest['total_size']
+
+    @property
+    def part_path(self):
+        return os.path.join(self.upload_dir, f'{self.id}.part')
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.upload_dir, f'{self.id}.json')
+
+    @property
+    def offset(self):
+        """已接收的字节数"""
+        try:
+            return os.path.getsize(self.part_path)
+        except OSError:
+            return 0
+
+    def to_dict(self):
+        return {
+            'upload_id': self.id,
+            'filename': self.manifest['filename'],
+            'size': self.total_size,
+            'offset': self.offset,
+            'complete': self.offset == self.total_size,
+        }
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def write_chunk(self, offset, stream, length):
+        """从 stream 读取 length 字节写入 offset 处，返回新的偏移量
+
+        offset 必须等于当前已接收字节数，否则返回 409 和服务端偏移量，客户端据此续传。
+        """
+        if length is None:
+            raise UploadError('缺少Content-Length', 411)
+        if offset + length > self.total_size:
+            raise UploadError('分片超出文件大小', 400, self.offset)
+
+        with open(self.part_path, 'r+b') as f:
+            if HAS_FCNTL:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    raise UploadError('该上传正在写入其他分片', 409, self.offset)
+
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                raise UploadError('分片偏移量不匹配', 409, current)
+
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                data = stream.read(min(COPY_BUFFER_SIZE, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+            f.flush()
+
+        self.manifest['updated_at'] = time.time()
+        self._save_manifest()
+
+        if remaining > 0:
+            # 连接中断，已写入的部分保留，客户端从新的偏移量继续
+            raise UploadError('分片数据不完整', 400, self.offset)
+        return self.offset
+
+    def finalize(self):
+        """校验上传完整后返回临时文件路径，调用方负责移动该文件并调用 discard()"""
+        if self.offset != self.total_size:
+            raise UploadError('文件尚未上传完成', 409, self.offset)
+        return self.part_path
+
+    def discard(self):
+        """删除临时文件和会话信息"""
+        for path in (self.part_path, self.manifest_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def create_upload(upload_dir, filename, total_size, **extra):
+    """创建上传会话"""
+    os.makedirs(upload_dir, exist_ok=True)
+    now = time.time()
+    manifest = dict(extra)
+    manifest.update({
+        'id': uuid.uuid4().hex,
+        'filename': filename,
+        'total_size': int(total_size),
+        'created_at': now,
+        'updated_at': now,
+    })
+    upload = ChunkedUpload(upload_dir, manifest)
+    open(upload.part_path, 'wb').close()
+    upload._save_manifest()
+    return upload
+
+
+def load_upload(upload_dir, upload_id):
+    """读取上传会话，不存在时抛出 404"""
+    if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+        raise UploadError('上传会话不存在', 404)
+    try:
+        with open(os.path.join(upload_dir, f'{upload_id}.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        raise UploadError('上传会话不存在', 404)
+    return ChunkedUpload(upload_dir, manifest)
+
+
+def cleanup_stale_uploads(upload_dir, max_age):
+    """删除超过 max_age 秒未更新的上传会话，返回删除的数量"""
+    if not os.path.isdir(upload_dir):
+        return 0
+
+    removed = 0
+    cutoff = time.time() - max_age
+    for name in os.listdir(upload_dir):
+        if not name.endswith('.json'):
+            continue
+        try:
+            upload = load_upload(upload_dir, name[:-len('.json')])
+        except UploadError:
+            continue
+        if upload.manifest.get('updated_at', 0) < cutoff:
+            upload.discard()
+            removed += 1
+    return removed
@@ -0,0 +1,207 @@
+"""
+API响应压缩
+
+在 after_request 中按 Accept-Encoding 压缩JSON、CSV等文本响应（优先brotli，其次gzip）：
+- 小于 COMPRESS_MIN_SIZE 的响应不压缩，压缩收益抵不上CPU开销
+- 流式响应（生成器、send_file导出的文件）逐块压缩，不会先把全部内容读入内存
+- /static/ 和 /assets/ 下的文件使用预压缩副本（见 precompressed.py），这里不处理
+
+每个端点的压缩次数、压缩前后字节数和压缩耗费的CPU时间记录在进程内，
+可通过 GET /api/admin/metrics/compression 查看。
+"""
+
+import threading
+import time
+import zlib
+
+from flask import current_app, request
+
+from src.utils.metrics import record_compression
+
+# 尝试导入brotli库，没有时只使用gzip
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# 可压缩的响应类型
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'text/plain',
+    'text/javascript',
+    'image/svg+xml',
+)
+
+# 已由文件服务处理的路径
+SKIP_PATH_PREFIXES = ('/static/', '/assets/')
+
+
+class CompressionStats:
+    """按端点统计压缩效果"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {
+                'responses': 0,
+                'bytes_in': 0,
+                'bytes_out': 0,
+                'cpu_seconds': 0.0,
+                'encodings': {},
+            })
+            stats['responses'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['cpu_seconds'] += cpu_seconds
+            stats['encodings'][encoding] = stats['encodings'].get(encoding, 0) + 1
+        record_compression(encoding, bytes_in, bytes_out)
+
+    def snapshot(self):
+        """返回各端点的统计，附带压缩率和平均CPU耗时"""
+        with self.lock:
+            result = {}
+            for endpoint, stats in self.endpoints.items():
+                item = dict(stats, encodings=dict(stats['encodings']))
+                item['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else None
+                item['avg_cpu_ms'] = round(stats['cpu_seconds'] * 1000 / stats['responses'], 3)
+                result[endpoint] = item
+            return result
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+
+compression_stats = CompressionStats()
+
+
+class _Compressor:
+    """gzip/brotli增量压缩，统计输入输出字节数和CPU时间"""
+
+    def __init__(self, encoding, config):
+        self.encoding = encoding
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=config['COMPRESS_BR_LEVEL'])
+        else:
+            # wbits=31 输出带gzip头的数据
+            self._obj = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+
+    def _measure(self, func, *args):
+        began = time.thread_time()
+        data = func(*args)
+        self.cpu_seconds += time.thread_time() - began
+        self.bytes_out += len(data)
+        return data
+
+    def compress(self, chunk, flush=False):
+        """压缩一块数据；flush=True 时立即输出已压缩的内容（流式响应需要）"""
+        self.bytes_in += len(chunk)
+        if self.encoding == 'br':
+            data = self._measure(self._obj.process, chunk)
+            if flush:
+                data += self._measure(self._obj.flush)
+        else:
+            data = self._measure(self._obj.compress, chunk)
+            if flush:
+                data += self._measure(self._obj.flush, zlib.Z_SYNC_FLUSH)
+        return data
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._measure(self._obj.finish)
+        return self._measure(self._obj.flush)
+
+
+def _choose_encoding():
+    accept = request.accept_encodings
+    if HAS_BROTLI and accept['br'] > 0:
+        return 'br'
+    if accept['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def _is_candidate(response):
+    if response.status_code != 200 or request.method == 'HEAD':
+        return False
+    if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+        return False
+    if request.path.startswith(SKIP_PATH_PREFIXES):
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _weaken_etag(response):
+    """压缩后内容变化，强ETag改为弱ETag"""
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _stream_compressed(iterable, compressor, endpoint):
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                data = compressor.compress(chunk, flush=True)
+                if data:
+                    yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        compression_stats.record(endpoint, compressor.encoding, compressor.bytes_in,
+                                 compressor.bytes_out, compressor.cpu_seconds)
+
+
+def compress_response(response):
+    """after_request钩子：按需压缩响应"""
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED') or not _is_candidate(response):
+        return response
+
+    if not response.is_streamed:
+        length = response.calculate_content_length()
+        if length is not None and length < config['COMPRESS_MIN_SIZE']:
+            return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    endpoint = request.endpoint or 'unknown'
+    compressor = _Compressor(encoding, config)
+
+    if response.is_streamed:
+        # 生成器或文件响应：逐块压缩，长度未知
+        response.response = _stream_compressed(response.response, compressor, endpoint)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        data = compressor.compress(response.get_data()) + compressor.finish()
+        response.set_data(data)
+        compression_stats.record(endpoint, encoding, compressor.bytes_in,
+                                 compressor.bytes_out, compressor.cpu_seconds)
+
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+
+def init_compression(app):
+    """在应用上注册响应压缩"""
+    app.after_request(compress_response)
@@ -0,0 +1,172 @@
+"""
+数据库引擎（连接池、超时）配置
+
+连接池按gunicorn的进程和线程数确定大小：每个worker是一个独立进程，各有一个连接池，
+一个线程同一时间最多使用一个连接，所以 pool_size 默认等于每个worker的线程数（GUNICORN_THREADS），
+另外留 DB_MAX_OVERFLOW 个溢出连接给后台线程（慢查询EXPLAIN等）。
+整个服务最多占用 WEB_CONCURRENCY × (pool_size + max_overflow) 个连接，超过 DB_MAX_CONNECTIONS 时启动时打印警告。
+
+语句超时分两层（仅PostgreSQL）：
+- DB_STATEMENT_TIMEOUT_MS：连接级默认值，对命令行任务（转码、清理）同样有效
+- DB_REQUEST_STATEMENT_TIMEOUT_MS：请求中的超时，可以按端点放宽：
+  DB_STATEMENT_TIMEOUTS="admin.export_users=60000"，或在视图函数上使用 @statement_timeout(60000)
+  事务开始时如果连接当前的超时与需要的不同，用会话级 SET 修改并记在连接上，
+  相同时不发送任何语句，大多数请求不会因此多一次往返；请求之外使用连接时恢复为连接级默认值
+
+语句因超时被取消时记录警告日志和 db_statement_timeouts_total 指标。
+"""
+
+import logging
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from src.config import Config
+from src.utils.db_routing import REPLICA_BIND
+from src.utils.logging_setup import parse_module_settings
+from src.utils.metrics import record_statement_timeout
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL中 "canceling statement due to statement timeout" 的错误码
+QUERY_CANCELED = '57014'
+
+_listening = False
+
+
+def statement_timeout(ms):
+    """设置视图函数中SQL语句的超时时间（毫秒），0表示不限制"""
+    def decorator(view):
+        view.statement_timeout_ms = ms
+        return view
+    return decorator
+
+
+def engine_options(config):
+    """根据 DB_* 配置生成 SQLALCHEMY_ENGINE_OPTIONS；SQLite使用SQLAlchemy的默认连接池"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        return {}
+
+    pool_size = config['DB_POOL_SIZE'] or config['GUNICORN_THREADS']
+    server_options = [f"-c timezone={config['DB_TIMEZONE']}"]
+    if config['DB_STATEMENT_TIMEOUT_MS']:
+        server_options.append(f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}")
+    if config['DB_IDLE_IN_TRANSACTION_TIMEOUT_MS']:
+        server_options.append(f"-c idle_in_transaction_session_timeout={config['DB_IDLE_IN_TRANSACTION_TIMEOUT_MS']}")
+
+    return {
+        'pool_size': pool_size,
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'connect_args': {
+            'options': ' '.join(server_options),
+            'connect_timeout': config['DB_CONNECT_TIMEOUT'],
+            'application_name': config['DB_APPLICATION_NAME'],
+        },
+    }
+
+
+def _request_timeout():
+    """当前请求的语句超时（毫秒），None表示使用连接级默认值"""
+    if 'statement_timeout_ms' in g:
+        return g.statement_timeout_ms
+    timeout = None
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    if view is not None:
+        timeout = getattr(view, 'statement_timeout_ms', None)
+    if timeout is None:
+        timeout = current_app.extensions['db_engine']['timeouts'].get(request.endpoint)
+    if timeout is None:
+        timeout = current_app.config['DB_REQUEST_STATEMENT_TIMEOUT_MS'] or None
+    g.statement_timeout_ms = timeout
+    return timeout
+
+
+def _on_begin(conn):
+    if conn.dialect.name != 'postgresql':
+        return
+    # None 表示连接级默认值（连接参数中的 DB_STATEMENT_TIMEOUT_MS）
+    timeout = None
+    if has_request_context() and 'db_engine' in current_app.extensions:
+        timeout = _request_timeout()
+
+    # 连接当前的会话级超时记在连接池的连接信息中，新连接为默认值
+    info = conn.connection.info
+    if info.get('statement_timeout') == timeout:
+        return
+    statement = 'RESET statement_timeout' if timeout is None else f'SET statement_timeout = {int(timeout)}'
+
+    # 直接使用DBAPI游标，不计入请求的查询统计；在自动提交模式下执行，
+    # 避免设置随事务回滚（只读请求结束时都会回滚）而失效
+    dbapi_connection = conn.connection.dbapi_connection
+    autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+    info['statement_timeout'] = timeout
+
+
+def _on_error(context):
+    orig = context.original_exception
+    if getattr(orig, 'pgcode', None) != QUERY_CANCELED:
+        return
+    endpoint = request.endpoint if has_request_context() else None
+    record_statement_timeout(endpoint or 'none')
+    logger.warning("SQL语句超时被取消 [%s]: %s", endpoint, ' '.join((context.statement or '').split())[:500])
+
+
+def _install_listeners():
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'begin', _on_begin)
+        event.listen(Engine, 'handle_error', _on_error)
+        _listening = True
+
+
+def init_engine(app):
+    """生成连接池和超时参数，需要在 init_metrics 和 db.init_app 之前调用；
+    SQLALCHEMY_ENGINE_OPTIONS 中显式设置的值优先"""
+    options = engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    # 只读副本作为 replica 绑定，使用与主库相同的引擎参数，由 src/utils/db_routing.py 选择
+    # （Flask-SQLAlchemy 不把 SQLALCHEMY_ENGINE_OPTIONS 用于其他绑定，需要写在绑定的配置中）
+    if app.config.get('REPLICA_DATABASE_URL'):
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, {
+            **options,
+            'url': Config.get_database_url(app.config['REPLICA_DATABASE_URL']),
+        })
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+    app.extensions['db_engine'] = {
+        'timeouts': parse_module_settings(app.config['DB_STATEMENT_TIMEOUTS'], int),
+    }
+    _install_listeners()
+
+    if 'pool_size' not in options:
+        return
+    per_worker = options['pool_size'] + options.get('max_overflow', 0)
+    total = app.config['WEB_CONCURRENCY'] * per_worker
+    logger.info("数据库连接池: 每个worker %d+%d 个连接，%d 个worker最多 %d 个连接",
+                options['pool_size'], options.get('max_overflow', 0), app.config['WEB_CONCURRENCY'], total)
+    if app.config['DB_MAX_CONNECTIONS'] and total > app.config['DB_MAX_CONNECTIONS']:
+        logger.warning("数据库连接数上限可能不足: 需要 %d 个连接，DB_MAX_CONNECTIONS=%d",
+                       total, app.config['DB_MAX_CONNECTIONS'])
+
+
+def dispose_engines(app, db):
+    """丢弃从父进程继承的数据库连接（gunicorn预加载应用后在fork出的worker中调用），
+    不关闭这些连接，父进程仍可继续使用"""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,124 @@
+"""
+只读请求路由到只读副本
+
+设置 REPLICA_DATABASE_URL 后，只读请求中的查询发送到副本，其他查询仍发送到主库：
+- GET/HEAD 请求默认是只读的；其他方法的视图函数加 @read_only 后也按只读处理，
+  GET请求中需要读取最新数据的视图函数加 @primary_only。两个装饰器都要紧挨着 route 装饰器
+- 只读请求中的写入（flush）、INSERT/UPDATE/DELETE 和 SELECT ... FOR UPDATE 始终发送到主库，
+  写入之后同一请求中的查询也发送到主库
+- 读写一致：写请求成功后设置一个 REPLICA_STICKY_SECONDS 秒后过期的Cookie，
+  期间该客户端的所有请求都读主库，避免刚提交的数据因复制延迟在副本上还看不到
+- 副本连接失败时在 REPLICA_RETRY_INTERVAL 秒内改为读主库，之后先检查能否连接再切回副本
+
+本地测试可以用两个SQLite数据库：
+    DATABASE_URL=sqlite:////tmp/primary.db REPLICA_DATABASE_URL=sqlite:////tmp/replica.db
+"""
+
+import logging
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'db_primary'
+READ_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def read_only(view):
+    """视图函数只读数据库，查询可以发送到副本"""
+    view.db_read_only = True
+    return view
+
+
+def primary_only(view):
+    """视图函数总是读主库"""
+    view.db_read_only = False
+    return view
+
+
+class RoutingSession(Session):
+    """只读请求中的查询使用副本引擎，其他情况与 Flask-SQLAlchemy 的会话相同"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            replica = _available_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not has_request_context() or not g.get('db_read_only'):
+            return False
+        if self._flushing or getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None:
+            # 写入之后本请求的查询都读主库
+            g.db_read_only = False
+            g.db_wrote = True
+            return False
+        return True
+
+
+def _available_replica():
+    state = current_app.extensions.get('db_routing')
+    if state is None or time.monotonic() < state['down_until']:
+        return None
+    if not state['checked']:
+        # 首次使用或上次失败后重试时先确认能连上，连不上时本次请求直接读主库
+        try:
+            with state['engine'].connect():
+                pass
+        except SQLAlchemyError:
+            return None
+        state['checked'] = True
+    return state['engine']
+
+
+def _route_request():
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    read = getattr(view, 'db_read_only', None)
+    if read is None:
+        read = request.method in READ_METHODS
+    g.db_read_only = read and not request.cookies.get(STICKY_COOKIE)
+
+
+def _set_sticky_cookie(response):
+    wrote = g.get('db_wrote') or request.method in WRITE_METHODS
+    if wrote and response.status_code < 400:
+        config = current_app.config
+        response.set_cookie(
+            STICKY_COOKIE, '1',
+            max_age=config['REPLICA_STICKY_SECONDS'],
+            path='/',
+            secure=config['SESSION_COOKIE_SECURE'],
+            httponly=True,
+            samesite=config['SESSION_COOKIE_SAMESITE'],
+        )
+    return response
+
+
+def init_db_routing(app, db):
+    """有 replica 绑定时注册请求钩子，需要在 db.init_app 之后调用"""
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    with app.app_context():
+        engine = db.engines[REPLICA_BIND]
+    state = {'engine': engine, 'down_until': 0.0, 'checked': False}
+    retry_interval = app.config['REPLICA_RETRY_INTERVAL']
+
+    @event.listens_for(engine, 'handle_error')
+    def mark_replica_down(context):
+        if context.is_disconnect or context.connection is None:
+            state['down_until'] = time.monotonic() + retry_interval
+            state['checked'] = False
+            logger.warning("只读副本不可用，%d秒内改为读主库: %s", retry_interval, context.original_exception)
+
+    app.extensions['db_routing'] = state
+    app.before_request(_route_request)
+    app.after_request(_set_sticky_cookie)
+    logger.info("只读请求使用副本: %s", engine.url.render_as_string(hide_password=True))
@@ -0,0 +1,276 @@
+"""
+响应式图片尺寸变体
+
+新闻、活动列表中的图片按显示宽度请求缩小后的版本：
+    /static/media/ab/<摘要>.png?w=480          按 Accept 头协商 AVIF/WebP
+    /static/images/news/award.jpg?w=320&fmt=webp   显式指定格式
+
+请求宽度向上取整到固定档位（WIDTH_BUCKETS），不会放大原图。
+生成的变体缓存在磁盘上，缓存总大小超过 IMAGE_VARIANT_CACHE_MAX_BYTES 时按最近最少使用淘汰。
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request, send_file, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from src.utils.metrics import record_cache
+
+# 尝试导入PIL库，没有PIL时直接返回原图
+try:
+    from PIL import Image, ImageOps
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# 可生成变体的源图片类型（GIF可能是动图，保持原样）
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# 宽度档位，与前端 srcset 保持一致
+WIDTH_BUCKETS = (160, 320, 480, 640, 960, 1280, 1920)
+
+# 输出格式：(PIL格式名, mimetype, 扩展名)
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', 'avif'),
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+    'png': ('PNG', 'image/png', 'png'),
+}
+
+# 命中缓存时最多每隔这么久刷新一次文件修改时间，供其他worker/重启后重建LRU顺序
+TOUCH_INTERVAL = 3600
+
+
+def _supported_formats():
+    if not HAS_PIL:
+        return set()
+    from PIL import features
+    supported = {'jpeg', 'png'}
+    if features.check('webp'):
+        supported.add('webp')
+    try:
+        if features.check('avif'):
+            supported.add('avif')
+    except ValueError:
+        # 旧版Pillow不认识avif特性名
+        pass
+    return supported
+
+
+SUPPORTED_FORMATS = _supported_formats()
+
+
+def is_variant_source(filename):
+    """判断文件是否可以生成尺寸变体"""
+    return HAS_PIL and filename.lower().endswith(SOURCE_EXTENSIONS)
+
+
+def pick_width(requested):
+    """把请求宽度向上取整到档位"""
+    for width in WIDTH_BUCKETS:
+        if requested <= width:
+            return width
+    return WIDTH_BUCKETS[-1]
+
+
+def negotiate_format(filename):
+    """根据 fmt 参数或 Accept 头选择输出格式，返回 (格式, 是否依赖Accept)"""
+    explicit = request.args.get('fmt', '').lower()
+    if explicit == 'jpg':
+        explicit = 'jpeg'
+    if explicit in SUPPORTED_FORMATS:
+        return explicit, False
+
+    accept = request.headers.get('Accept', '')
+    if 'avif' in SUPPORTED_FORMATS and 'image/avif' in accept:
+        return 'avif', True
+    if 'webp' in SUPPORTED_FORMATS and 'image/webp' in accept:
+        return 'webp', True
+
+    # 不支持现代格式的浏览器保持原格式
+    fallback = 'png' if filename.lower().endswith('.png') else 'jpeg'
+    return fallback, True
+
+
+class VariantCache:
+    """磁盘变体缓存的进程内LRU索引"""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """启动时按修改时间重建LRU顺序"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat_result.st_mtime, path, stat_result.st_size))
+        for _, path, size in sorted(files):
+            self.entries[path] = size
+            self.total_bytes += size
+
+    def path_for(self, key, ext):
+        return os.path.join(self.cache_dir, f'{key}.{ext}')
+
+    def get(self, path):
+        """命中时返回True并更新LRU顺序"""
+        with self.lock:
+            if path not in self.entries:
+                # 可能是其他worker生成的
+                if not os.path.exists(path):
+                    return False
+                size = os.path.getsize(path)
+                self.entries[path] = size
+                self.total_bytes += size
+            self.entries.move_to_end(path)
+
+        try:
+            if time.time() - os.path.getmtime(path) > TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            # 已被其他worker淘汰
+            self._forget(path)
+            return False
+        return True
+
+    def put(self, path, size):
+        with self.lock:
+            if path in self.entries:
+                self.total_bytes -= self.entries[path]
+            self.entries[path] = size
+            self.total_bytes += size
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_path, old_size = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted.append(old_path)
+
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _forget(self, path):
+        with self.lock:
+            size = self.entries.pop(path, None)
+            if size is not None:
+                self.total_bytes -= size
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VariantCache(
+                    current_app.config['IMAGE_VARIANT_CACHE_DIR'],
+                    current_app.config['IMAGE_VARIANT_CACHE_MAX_BYTES']
+                )
+    return _cache
+
+
+def _variant_key(source_path, stat_result, width):
+    """源文件路径、大小和修改时间决定缓存键，源文件变化后旧变体自然被淘汰"""
+    raw = f'{source_path}:{stat_result.st_size}:{stat_result.st_mtime_ns}:{width}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _render_variant(source_path, target_path, width, fmt):
+    """生成变体并原子地写入缓存目录，返回文件大小"""
+    pil_format = FORMATS[fmt][0]
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        elif img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            img = img.convert('RGBA')
+
+        options = {'quality': 80}
+        if pil_format == 'WEBP':
+            options['method'] = 4
+        elif pil_format == 'JPEG':
+            options.update(optimize=True, progressive=True)
+        elif pil_format == 'PNG':
+            options = {'optimize': True}
+
+        directory = os.path.dirname(target_path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, pil_format, **options)
+            os.replace(tmp_path, target_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return os.path.getsize(target_path)
+
+
+def get_variant(source_path, width, fmt):
+    """返回变体文件路径，缓存未命中时生成"""
+    stat_result = os.stat(source_path)
+    cache = get_cache()
+    target_path = cache.path_for(_variant_key(source_path, stat_result, width), FORMATS[fmt][2])
+    hit = cache.get(target_path)
+    record_cache('image_variant', hit)
+    if not hit:
+        size = _render_variant(source_path, target_path, width, fmt)
+        cache.put(target_path, size)
+    return target_path
+
+
+def send_image_variant(directory, filename):
+    """发送 ?w= 指定宽度的图片变体，无法生成时退回原图"""
+    source_path = safe_join(directory, filename)
+    if source_path is None or not os.path.isfile(source_path):
+        raise NotFound()
+
+    width = pick_width(request.args.get('w', type=int) or WIDTH_BUCKETS[-1])
+    fmt, negotiated = negotiate_format(filename)
+
+    try:
+        variant_path = get_variant(source_path, width, fmt)
+    except Exception as e:
+        current_app.logger.warning("生成图片变体失败，返回原图: %s, %s", filename, e)
+        return send_from_directory(directory, filename)
+
+    response = send_file(variant_path, mimetype=FORMATS[fmt][1], conditional=True)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+
+def warm_variants(source_path, widths, fmt='webp'):
+    """上传后预先生成常用宽度的变体"""
+    if not HAS_PIL or fmt not in SUPPORTED_FORMATS:
+        return
+    for width in widths:
+        try:
+            get_variant(source_path, pick_width(width), fmt)
+        except Exception as e:
+            current_app.logger.warning("预生成图片变体失败: %s, %s", source_path, e)
+            return
@@ -0,0 +1,108 @@
+"""
+SPA入口 index.html 的内存缓存
+
+前端的每个路由（/news/xxx、/activities 等）都返回 index.html。
+文件内容、各压缩版本和ETag缓存在每个worker的内存中：
+- 最多每隔 INDEX_HTML_CHECK_INTERVAL 秒检查一次修改时间，其余请求不访问文件系统
+- 收到 SIGHUP 时在下一次请求立即重新加载（发布后可 kill -HUP 对应进程）
+- 支持 If-None-Match / If-Modified-Since，未修改时返回304
+"""
+
+import hashlib
+import os
+import signal
+import threading
+import time
+
+from flask import Response, current_app, request
+
+from src.utils.precompressed import accepted_encodings, available_encodings, compress_bytes, MIN_COMPRESS_SIZE
+
+
+class IndexHtmlCache:
+    """单个HTML文件的内存缓存"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # {编码: (内容, ETag)}，编码为 None 表示未压缩
+        self.variants = {}
+        self.mtime = None
+        self.checked_at = 0
+        self.force_reload = False
+
+    def _load(self, stat_result):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()[:16]
+
+        variants = {None: (data, digest)}
+        if len(data) >= MIN_COMPRESS_SIZE:
+            for encoding, suffix in available_encodings():
+                variants[encoding] = (compress_bytes(data, encoding), f'{digest}-{suffix[1:]}')
+
+        self.variants = variants
+        self.mtime = stat_result.st_mtime
+
+    def refresh(self, check_interval):
+        """按需检查修改时间并重新加载，文件不存在时抛出 FileNotFoundError"""
+        now = time.monotonic()
+        if self.variants and not self.force_reload and now - self.checked_at < check_interval:
+            return
+        with self.lock:
+            if self.variants and not self.force_reload and now - self.checked_at < check_interval:
+                return
+            stat_result = os.stat(self.path)
+            if self.force_reload or stat_result.st_mtime != self.mtime:
+                self._load(stat_result)
+            self.force_reload = False
+            self.checked_at = now
+
+    def invalidate(self):
+        self.force_reload = True
+
+    def response(self):
+        """按 Accept-Encoding 选择版本并返回支持条件请求的响应"""
+        self.refresh(current_app.config['INDEX_HTML_CHECK_INTERVAL'])
+        variants = self.variants
+
+        encoding = None
+        for candidate, _ in accepted_encodings():
+            if candidate in variants:
+                encoding = candidate
+                break
+        data, etag = variants[encoding]
+
+        response = Response(data, mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(etag)
+        response.last_modified = self.mtime
+        return response.make_conditional(request)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_index_cache(path):
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(path, IndexHtmlCache(path))
+    return cache
+
+
+def invalidate_index_caches(*_):
+    """清空所有 index.html 缓存，下一次请求重新读取文件"""
+    for cache in list(_caches.values()):
+        cache.invalidate()
+
+
+def install_reload_signal():
+    """注册 SIGHUP 处理，只能在主线程调用；不支持时（Windows、非主线程）忽略"""
+    try:
+        signal.signal(signal.SIGHUP, invalidate_index_caches)
+    except (AttributeError, ValueError):
+        pass
@@ -0,0 +1,158 @@
+"""
+日志配置
+
+请求处理线程只把日志记录放进内存队列（QueueHandler），由后台线程（QueueListener）写到标准输出，
+请求不会因为写日志而阻塞；队列满时丢弃新的日志并计数，不会让请求等待。
+
+- LOG_LEVEL：根日志级别；LOG_LEVELS：按模块设置级别，如 "src.routes.videos=WARNING,sqlalchemy.engine=INFO"
+- LOG_FORMAT：'text'（默认）或 'json'（每行一个JSON对象，包含请求方法、路径和端点，便于日志系统采集）
+- LOG_SAMPLE_RATES：按模块对INFO及以下级别的日志采样，如 "src.routes.videos=0.1" 只保留10%；WARNING及以上总是保留
+
+代码中使用 logger.info("...: %s", value) 的形式，被级别或采样过滤掉的日志不会格式化字符串。
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import has_request_context, request
+from flask.logging import default_handler
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_handler = None
+_listener = None
+_lock = threading.Lock()
+
+
+def parse_module_settings(value, convert):
+    """'a.b=X,c=Y' -> {'a.b': convert('X'), 'c': convert('Y')}"""
+    settings = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, setting = item.split('=', 1)
+        settings[name.strip()] = convert(setting.strip())
+    return settings
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in ('method', 'path', 'endpoint'):
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """按日志名前缀对WARNING以下的日志采样"""
+
+    def __init__(self, rates):
+        super().__init__()
+        # 前缀越长越优先
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return random.random() < rate
+        return True
+
+
+class RequestQueueHandler(QueueHandler):
+    """在请求线程中补充请求信息、格式化消息和异常栈，然后不阻塞地放入队列"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _start_listener(queue_size, output_handler):
+    """创建队列和后台写日志线程（fork出的子进程中需要重新创建）"""
+    global _listener
+    log_queue = queue.Queue(maxsize=queue_size)
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, output_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def init_logging(app):
+    """把根日志替换为异步队列输出，每个进程只配置一次"""
+    global _handler
+    app.logger.removeHandler(default_handler)
+
+    with _lock:
+        if _handler is not None:
+            return
+
+        if app.config['LOG_FORMAT'] == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(TEXT_FORMAT)
+        output_handler = logging.StreamHandler(sys.stdout)
+        output_handler.setFormatter(formatter)
+
+        queue_size = app.config['LOG_QUEUE_SIZE']
+        _handler = RequestQueueHandler(None)
+        _handler.addFilter(SamplingFilter(parse_module_settings(app.config['LOG_SAMPLE_RATES'], float)))
+        _start_listener(queue_size, output_handler)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel(app.config['LOG_LEVEL'].upper())
+        for name, level in parse_module_settings(app.config['LOG_LEVELS'], str.upper).items():
+            logging.getLogger(name).setLevel(level)
+
+        atexit.register(_stop_listener)
+        # gunicorn预加载应用后fork出的worker中没有后台线程，需要重新启动
+        os.register_at_fork(after_in_child=lambda: _start_listener(queue_size, output_handler))
+
+
+def dropped_log_records():
+    """队列满时丢弃的日志条数"""
+    return _handler.dropped if _handler is not None else 0
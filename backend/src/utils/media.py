@@ -0,0 +1,188 @@
+"""
+媒体文件（视频）服务工具
+
+为背景视频和新闻视频提供支持 Range 请求的专用发送路径：
+- 支持单段字节范围请求（206 Partial Content）和 If-Range
+- 返回 Accept-Ranges 与基于 inode/大小/修改时间的强 ETag
+- 在 gunicorn 下通过 wsgi.file_wrapper 走系统 sendfile，不占用 Python 读缓冲
+- 可选 X-Accel-Redirect（nginx）/ X-Sendfile（Apache、lighttpd）卸载给前置代理
+"""
+
+import mimetypes
+import os
+from email.utils import formatdate
+
+from flask import Response, current_app, request
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+# 需要走媒体发送路径的扩展名
+MEDIA_EXTENSIONS = ('.mp4', '.webm', '.ogg', '.m4v', '.mov')
+
+# 非 sendfile 时每次读取的块大小
+READ_CHUNK_SIZE = 256 * 1024
+
+
+def is_media_file(filename):
+    """判断文件名是否属于需要 Range 支持的媒体文件"""
+    return filename.lower().endswith(MEDIA_EXTENSIONS)
+
+
+def make_strong_etag(stat_result):
+    """根据 inode、文件大小和纳秒级修改时间生成强 ETag
+
+    覆盖上传或设置默认视频（copy2 会保留 mtime，但 inode 会变化）都会得到新的 ETag，
+    同一文件在多个 worker 之间得到的 ETag 一致。
+    """
+    return '"%x-%x-%x"' % (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+
+def parse_byte_range(range_header, file_size):
+    """解析单段 Range 头，返回 (start, end) 闭区间
+
+    - 无法解析或包含多段时返回 None，调用方按完整文件响应
+    - 范围无法满足时抛出 ValueError，调用方返回 416
+    """
+    if not range_header:
+        return None
+
+    units, _, spec = range_header.partition('=')
+    if units.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    start_str, sep, end_str = spec.strip().partition('-')
+    if not sep:
+        return None
+
+    start_str, end_str = start_str.strip(), end_str.strip()
+    if not (start_str or end_str).isdigit() or (start_str and end_str and not end_str.isdigit()):
+        return None
+
+    if start_str == '':
+        # 后缀范围: bytes=-500 表示最后500字节
+        suffix = int(end_str)
+        if suffix == 0:
+            raise ValueError('empty suffix range')
+        start = max(file_size - suffix, 0)
+        end = file_size - 1
+    else:
+        start = int(start_str)
+        if end_str and int(end_str) < start:
+            # 语法无效的范围按规范忽略
+            return None
+        end = min(int(end_str), file_size - 1) if end_str else file_size - 1
+
+    if start > end or start >= file_size:
+        raise ValueError('unsatisfiable range')
+
+    return start, end
+
+
+def _iter_file_range(file_obj, length):
+    """在没有 sendfile 的服务器上按块读取指定长度"""
+    try:
+        remaining = length
+        while remaining > 0:
+            chunk = file_obj.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()
+
+
+def _can_bound_file_wrapper(environ):
+    """gunicorn 的 file_wrapper 会按 Content-Length 截断 sendfile，可安全用于中间区间"""
+    return environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+
+
+def _offload_response(directory, filename, headers):
+    """生成交给前置代理发送文件的空响应，Range 由代理自行处理"""
+    mode = current_app.config.get('MEDIA_OFFLOAD')
+    if mode == 'x-accel':
+        prefix = current_app.config.get('MEDIA_OFFLOAD_PREFIX', '/protected-static/')
+        rel_path = os.path.relpath(os.path.join(directory, filename), current_app.config['MEDIA_ROOT'])
+        headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + rel_path.replace(os.sep, '/')
+    elif mode == 'x-sendfile':
+        headers['X-Sendfile'] = os.path.abspath(os.path.join(directory, filename))
+    else:
+        return None
+    # 由代理补充 Content-Length / Content-Range
+    headers.pop('Content-Length', None)
+    return Response(status=200, headers=headers)
+
+
+def send_media(directory, filename):
+    """发送媒体文件，支持 Range/If-Range/If-None-Match"""
+    path = safe_join(directory, filename)
+    if path is None:
+        raise NotFound()
+
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise NotFound()
+    if not os.path.isfile(path):
+        raise NotFound()
+
+    file_size = stat_result.st_size
+    etag = make_strong_etag(stat_result)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Last-Modified': formatdate(stat_result.st_mtime, usegmt=True),
+        'Content-Type': mimetype,
+        'Content-Length': str(file_size),
+    }
+
+    # 条件请求：客户端已有相同版本
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in [t.strip() for t in if_none_match.split(',')]):
+        headers.pop('Content-Length')
+        return Response(status=304, headers=headers)
+
+    offloaded = _offload_response(directory, filename, dict(headers))
+    if offloaded is not None:
+        return offloaded
+
+    # If-Range 与当前 ETag 不一致时忽略 Range，返回完整文件
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and if_range and if_range.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_byte_range(range_header, file_size)
+    except ValueError:
+        headers.pop('Content-Length')
+        headers['Content-Range'] = f'bytes */{file_size}'
+        return Response(status=416, headers=headers)
+
+    status = 200
+    start, end = 0, file_size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+    length = end - start + 1 if file_size else 0
+    headers['Content-Length'] = str(length)
+
+    if request.method == 'HEAD':
+        return Response(status=status, headers=headers)
+
+    file_obj = open(path, 'rb')
+    if start:
+        file_obj.seek(start)
+
+    environ = request.environ
+    if end == file_size - 1 or _can_bound_file_wrapper(environ):
+        # 读到文件末尾，或服务器会按 Content-Length 截断：交给 file_wrapper（gunicorn 下为 sendfile）
+        body = wrap_file(environ, file_obj, READ_CHUNK_SIZE)
+    else:
+        body = _iter_file_range(file_obj, length)
+
+    return Response(body, status=status, headers=headers, direct_passthrough=True)
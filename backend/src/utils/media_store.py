@@ -0,0 +1,231 @@
+"""
+内容寻址的上传文件存储
+
+上传的图片和视频在写入时同步计算 SHA-256，按摘要保存为 static/media/<前两位>/<摘要>.<扩展名>，
+相同内容只保存一份，数据库中记录的仍然是普通的 /static/... URL。
+
+不再被 News.imageUrl、News.video_url、Activity.image_url 等字段引用的文件，
+由 `flask media gc` 命令清理（见 src/cli.py）。
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from flask import current_app
+
+# 读取上传流的块大小
+HASH_CHUNK_SIZE = 256 * 1024
+
+StoredFile = namedtuple('StoredFile', ['url', 'path', 'digest', 'size', 'deduplicated'])
+
+# 旧版上传目录中由上传接口生成的文件名（uuid前缀或news_时间戳前缀）
+LEGACY_UPLOAD_DIRS = (
+    os.path.join('images', 'news'),
+    os.path.join('images', 'activities'),
+    os.path.join('images'),
+    os.path.join('videos', 'news'),
+)
+_LEGACY_NAME_RE = re.compile(r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}_|news_\d{14}_)')
+
+
+def _store_dir():
+    return current_app.config['MEDIA_STORE_DIR']
+
+
+def _url_for_path(path):
+    """把存储中的绝对路径转换为 /static/... URL"""
+    rel_path = os.path.relpath(path, current_app.config['MEDIA_ROOT'])
+    return '/static/' + rel_path.replace(os.sep, '/')
+
+
+def _blob_path(digest, file_ext):
+    return os.path.join(_store_dir(), digest[:2], f'{digest}.{file_ext.lower()}')
+
+
+def _commit_temp_file(tmp_path, digest, size, file_ext):
+    """把已计算摘要的临时文件放入存储，内容已存在时丢弃临时文件"""
+    target = _blob_path(digest, file_ext)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    if os.path.exists(target):
+        os.remove(tmp_path)
+        # 刷新修改时间，避免刚被重新上传的文件在宽限期内被GC清理
+        os.utime(target)
+        return StoredFile(_url_for_path(target), target, digest, size, True)
+
+    os.replace(tmp_path, target)
+    return StoredFile(_url_for_path(target), target, digest, size, False)
+
+
+def store_stream(stream, file_ext):
+    """边读边计算摘要，把流写入存储"""
+    store_dir = _store_dir()
+    os.makedirs(store_dir, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        return _commit_temp_file(tmp_path, hasher.hexdigest(), size, file_ext)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def store_upload(file_storage, file_ext):
+    """保存 request.files 中的上传文件"""
+    file_storage.stream.seek(0)
+    return store_stream(file_storage.stream, file_ext)
+
+
+def store_local_file(path, file_ext):
+    """把本地已有的文件（如分片上传完成的临时文件）移入存储"""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+
+    store_dir = _store_dir()
+    os.makedirs(store_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix='.upload')
+    os.close(fd)
+    shutil.move(path, tmp_path)
+    return _commit_temp_file(tmp_path, hasher.hexdigest(), size, file_ext)
+
+
+def link_into(stored, target_dir, filename_factory):
+    """在 target_dir 中为存储文件建立一个具名硬链接（背景视频需要按文件名管理）
+
+    目录中已有指向同一内容的文件时直接复用，返回文件名。
+    不支持硬链接的文件系统上退化为复制。
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    blob_stat = os.stat(stored.path)
+    for name in os.listdir(target_dir):
+        try:
+            if os.path.samestat(os.stat(os.path.join(target_dir, name)), blob_stat):
+                return name
+        except OSError:
+            continue
+
+    filename = filename_factory()
+    target = os.path.join(target_dir, filename)
+    try:
+        os.link(stored.path, target)
+    except OSError:
+        shutil.copy2(stored.path, target)
+    return filename
+
+
+def normalize_media_url(url):
+    """把数据库中的URL（可能带域名或查询参数）转换为 /static/... 路径"""
+    if not url:
+        return None
+    path = urlparse(url).path
+    return path or None
+
+
+def collect_referenced_urls():
+    """收集数据库中引用的所有上传文件URL"""
+    from src.models.database import db, News, Activity, BaseInfo, PromotionalPage, TranscodeJob
+
+    columns = [
+        News.imageUrl,
+        News.video_url,
+        Activity.image_url,
+        BaseInfo.image_url,
+        PromotionalPage.image_url,
+    ]
+    referenced = set()
+    for column in columns:
+        for (value,) in db.session.query(column).filter(column.isnot(None)).distinct():
+            path = normalize_media_url(value)
+            if path:
+                referenced.add(path)
+
+    # 新闻改为HLS播放列表后，原视频仍作为不支持HLS的浏览器的备用地址；
+    # 只在仍有新闻引用该视频或它的播放列表时保留，新闻删除或更换视频后原视频可以被清理
+    jobs = db.session.query(TranscodeJob.source_url, TranscodeJob.playlist_url).distinct()
+    for source_url, playlist_url in jobs:
+        source = normalize_media_url(source_url)
+        if source and (source in referenced or normalize_media_url(playlist_url) in referenced):
+            referenced.add(source)
+    return referenced
+
+
+def _iter_candidates(include_legacy):
+    """遍历可被GC清理的文件，返回 (路径, 是否为内容寻址文件)"""
+    store_dir = _store_dir()
+    if os.path.isdir(store_dir):
+        for root, _, files in os.walk(store_dir):
+            for name in files:
+                yield os.path.join(root, name), True
+
+    if include_legacy:
+        media_root = current_app.config['MEDIA_ROOT']
+        for rel_dir in LEGACY_UPLOAD_DIRS:
+            directory = os.path.join(media_root, rel_dir)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path) and _LEGACY_NAME_RE.match(name):
+                    yield path, False
+
+
+def garbage_collect(grace_period=24 * 3600, include_legacy=False, dry_run=False):
+    """删除未被数据库引用的上传文件
+
+    - grace_period 秒内写入的文件不删除：管理员先上传图片、再保存表单，中间存在时间差
+    - 存在其他硬链接（如背景视频具名文件）的存储文件视为仍在使用
+    返回 (删除的文件列表, 释放的字节数)
+    """
+    referenced = collect_referenced_urls()
+    cutoff = time.time() - grace_period
+
+    removed = []
+    freed = 0
+    for path, in_store in _iter_candidates(include_legacy):
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            continue
+
+        if path.endswith('.upload'):
+            # 上传中断遗留的临时文件
+            if stat_result.st_mtime >= cutoff:
+                continue
+        else:
+            if _url_for_path(path) in referenced:
+                continue
+            if stat_result.st_mtime >= cutoff:
+                continue
+            if in_store and stat_result.st_nlink > 1:
+                continue
+
+        if not dry_run:
+            os.remove(path)
+        removed.append(path)
+        freed += stat_result.st_size
+
+    return removed, freed
@@ -0,0 +1,209 @@
+"""
+Prometheus 指标（GET /metrics）
+
+记录的指标：
+- http_request_duration_seconds / http_requests_total：按蓝图、端点、方法（和状态码）统计的请求耗时和次数
+- http_requests_in_progress：正在处理的请求数
+- db_pool_checkout_wait_seconds、db_pool_checked_out、db_pool_overflow、db_pool_size、db_pool_checkout_timeouts_total：
+  PostgreSQL连接池取连接的等待时间、已借出连接数、溢出连接数、连接池大小和取连接超时次数，
+  按数据库绑定区分（bind="default"为主库，"replica"为只读副本）
+- http_request_db_pool_wait_seconds：按端点统计每个请求等待连接池的总时间
+- db_statement_timeouts_total：按端点统计因超过 statement_timeout 被取消的SQL语句数
+- cache_requests_total：各进程内缓存（用户信息、服务端会话、缩略图）的命中和未命中次数
+- compression_bytes_total：API响应压缩前后的字节数
+
+gunicorn多进程部署时需要在启动前设置环境变量 PROMETHEUS_MULTIPROC_DIR 为一个空目录
+（每次启动前清空），各worker把指标写入该目录，/metrics 汇总所有worker的数据。
+需要安装 prometheus_client，未安装时所有记录函数不做任何事，/metrics 返回503。
+"""
+
+import logging
+import os
+import time
+
+from flask import Response, current_app, g, request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from src.utils.query_stats import current_pool_wait, record_pool_wait
+
+# 尝试导入prometheus_client，没有时不记录指标
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                                   REGISTRY, generate_latest, multiprocess)
+    HAS_PROMETHEUS = True
+except ImportError:
+    HAS_PROMETHEUS = False
+
+logger = logging.getLogger(__name__)
+
+if HAS_PROMETHEUS:
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', '请求处理耗时',
+        ['blueprint', 'endpoint', 'method']
+    )
+    REQUEST_COUNT = Counter(
+        'http_requests_total', '请求次数',
+        ['blueprint', 'endpoint', 'method', 'status']
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        'http_requests_in_progress', '正在处理的请求数',
+        multiprocess_mode='livesum'
+    )
+    POOL_CHECKOUT_WAIT = Histogram(
+        'db_pool_checkout_wait_seconds', '从连接池取得数据库连接的等待时间',
+        ['bind'],
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    POOL_CHECKED_OUT = Gauge(
+        'db_pool_checked_out', '已借出的数据库连接数', ['bind'], multiprocess_mode='livesum'
+    )
+    POOL_OVERFLOW = Gauge(
+        'db_pool_overflow', '超出pool_size的溢出连接数', ['bind'], multiprocess_mode='livesum'
+    )
+    POOL_SIZE = Gauge(
+        'db_pool_size', '连接池大小（pool_size）', ['bind'], multiprocess_mode='livesum'
+    )
+    POOL_TIMEOUTS = Counter(
+        'db_pool_checkout_timeouts_total', '取数据库连接超时的次数',
+        ['bind']
+    )
+    REQUEST_POOL_WAIT = Histogram(
+        'http_request_db_pool_wait_seconds', '每个请求等待数据库连接的总时间',
+        ['blueprint', 'endpoint'],
+        buckets=(0.001, 0.005, 0.025, 0.1, 0.5, 1, 5, 30)
+    )
+    STATEMENT_TIMEOUTS = Counter(
+        'db_statement_timeouts_total', '超过statement_timeout被取消的SQL语句数',
+        ['endpoint']
+    )
+    CACHE_REQUESTS = Counter(
+        'cache_requests_total', '进程内缓存的查找次数',
+        ['cache', 'result']
+    )
+    COMPRESSION_BYTES = Counter(
+        'compression_bytes_total', 'API响应压缩前后的字节数',
+        ['encoding', 'stage']
+    )
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录取连接等待时间、借出连接数和溢出连接数的连接池，bind 为指标中的数据库绑定标签"""
+
+    bind = 'default'
+
+    def _do_get(self):
+        began = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(self.bind).inc()
+            raise
+        waited = time.perf_counter() - began
+        POOL_CHECKOUT_WAIT.labels(self.bind).observe(waited)
+        record_pool_wait(waited)
+        self._report()
+        return conn
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
+
+    def _report(self):
+        POOL_SIZE.labels(self.bind).set(self.size())
+        POOL_CHECKED_OUT.labels(self.bind).set(self.checkedout())
+        POOL_OVERFLOW.labels(self.bind).set(max(self.overflow(), 0))
+
+
+def _pool_class(bind):
+    """每个绑定使用单独的子类（engine.dispose() 重建连接池时沿用同一个类，标签不会丢失）"""
+    if bind is None:
+        return InstrumentedQueuePool
+    return type('InstrumentedQueuePool', (InstrumentedQueuePool,), {'bind': bind})
+
+
+def record_cache(cache, hit):
+    """记录一次缓存查找"""
+    if HAS_PROMETHEUS:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_statement_timeout(endpoint):
+    """记录一条因超时被取消的SQL语句"""
+    if HAS_PROMETHEUS:
+        STATEMENT_TIMEOUTS.labels(endpoint).inc()
+
+
+def record_compression(encoding, bytes_in, bytes_out):
+    """记录一次响应压缩"""
+    if HAS_PROMETHEUS:
+        COMPRESSION_BYTES.labels(encoding, 'in').inc(bytes_in)
+        COMPRESSION_BYTES.labels(encoding, 'out').inc(bytes_out)
+
+
+def _labels():
+    return request.blueprint or 'app', request.endpoint or 'unmatched', request.method
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_PROGRESS.inc()
+
+
+def _record_request(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        blueprint, endpoint, method = _labels()
+        REQUEST_LATENCY.labels(blueprint, endpoint, method).observe(time.perf_counter() - started)
+        REQUEST_COUNT.labels(blueprint, endpoint, method, str(response.status_code)).inc()
+        pool_wait = current_pool_wait()
+        if pool_wait:
+            REQUEST_POOL_WAIT.labels(blueprint, endpoint).observe(pool_wait)
+    return response
+
+
+def _finish_request(exc):
+    if g.pop('metrics_started', None) is not None:
+        REQUESTS_IN_PROGRESS.dec()
+
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('unauthorized\n', status=401, mimetype='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """注册请求指标钩子和 /metrics 端点，需要在 db.init_app 之前调用（替换连接池类型）"""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    if not HAS_PROMETHEUS:
+        logger.warning("未安装prometheus_client，不记录Prometheus指标")
+        app.add_url_rule('/metrics', 'metrics', lambda: Response('prometheus_client not installed\n', status=503,
+                                                                 mimetype='text/plain'))
+        return
+
+    # SQLite等使用其他连接池的数据库不替换
+    if str(app.config.get('SQLALCHEMY_DATABASE_URI', '')).startswith('postgresql'):
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        options.setdefault('poolclass', _pool_class(None))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for key, value in binds.items():
+        bind_options = {'url': value} if not isinstance(value, dict) else dict(value)
+        if str(bind_options.get('url', '')).startswith('postgresql'):
+            bind_options.setdefault('poolclass', _pool_class(key))
+            binds[key] = bind_options
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    app.teardown_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
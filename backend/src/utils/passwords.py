@@ -0,0 +1,86 @@
+"""
+密码哈希服务
+
+- 算法和强度由 PASSWORD_HASH_METHOD 配置，格式与 werkzeug 相同，例如
+  'scrypt:32768:8:1'（默认）、'scrypt:16384:8:1'、'pbkdf2:sha256:600000'
+- 登录成功时如果已保存的哈希与当前配置不一致，自动用新配置重新哈希（调整强度后逐步迁移）
+- PASSWORD_HASH_WORKERS > 0 时在独立的进程池中计算哈希：
+  同一时间最多占用该数量的CPU核，活动开始时的集中登录不会让所有worker进程都被哈希计算占满；
+  gthread/gevent worker 中等待结果时不持有GIL，其他请求可以继续处理
+
+性能测试见 benchmark_passwords.py。
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+_pool = None
+_pool_lock = threading.Lock()
+_normalized_methods = {}
+
+
+def _get_pool():
+    global _pool
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def _run(func, *args):
+    pool = _get_pool()
+    if pool is None:
+        return func(*args)
+    return pool.submit(func, *args).result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+
+
+def shutdown_pool():
+    """关闭进程池（fork出的子进程不能继续使用父进程的进程池）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _method_prefix(method):
+    """把配置的算法补全为哈希值中实际记录的形式，如 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000'"""
+    prefix = _normalized_methods.get(method)
+    if prefix is None:
+        prefix = generate_password_hash('', method=method).split('$', 1)[0]
+        _normalized_methods[method] = prefix
+    return prefix
+
+
+def hash_password(password):
+    """按当前配置生成密码哈希"""
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(password_hash, password):
+    """校验密码"""
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """已保存的哈希是否使用了与当前配置不同的算法或强度"""
+    stored = password_hash.split('$', 1)[0]
+    return stored != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_and_upgrade(user, password):
+    """校验密码，成功且需要升级时更新 user.password_hash（由调用方提交），返回是否校验成功"""
+    if not verify_password(user.password_hash, password):
+        return False
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+    return True
@@ -0,0 +1,145 @@
+"""
+预压缩的前端静态文件
+
+前端构建产物（js、css、html、svg、json）在发布时生成 .br / .gz 压缩副本：
+
+    FLASK_APP=src.main flask assets compress
+
+请求时根据 Accept-Encoding 直接发送压缩副本（优先brotli），不在每次请求时压缩。
+发布后没有运行上面的命令时，首次请求会生成缺失的副本（PRECOMPRESS_ON_DEMAND）。
+没有安装 brotli 时只生成和发送 gzip。
+"""
+
+import gzip
+import mimetypes
+import os
+import tempfile
+
+from flask import current_app, request, send_file, send_from_directory
+from werkzeug.security import safe_join
+
+# 尝试导入brotli库，没有时只使用gzip
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# 需要压缩的文本类型
+TEXT_EXTENSIONS = ('.js', '.mjs', '.css', '.html', '.svg', '.json')
+
+# 小于该大小的文件压缩收益不明显
+MIN_COMPRESS_SIZE = 1024
+
+# (Content-Encoding, 副本扩展名)，按优先级排序
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def is_compressible(filename):
+    return filename.lower().endswith(TEXT_EXTENSIONS)
+
+
+def available_encodings():
+    return [(encoding, suffix) for encoding, suffix in ENCODINGS if encoding != 'br' or HAS_BROTLI]
+
+
+def compress_bytes(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    # mtime=0 使同一内容的压缩结果完全相同，ETag在多台服务器之间一致
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _is_fresh(sibling_path, source_mtime):
+    try:
+        return os.path.getmtime(sibling_path) >= source_mtime
+    except OSError:
+        return False
+
+
+def compress_file(path, encodings=None):
+    """为单个文件生成压缩副本，已是最新的副本跳过，返回新生成的副本路径列表"""
+    source_stat = os.stat(path)
+    if source_stat.st_size < MIN_COMPRESS_SIZE:
+        return []
+
+    data = None
+    written = []
+    for encoding, suffix in encodings or available_encodings():
+        sibling_path = path + suffix
+        if _is_fresh(sibling_path, source_stat.st_mtime):
+            continue
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        compressed = compress_bytes(data, encoding)
+        if len(compressed) >= len(data):
+            # 压缩后没有变小（如已压缩过的svg），不生成副本，并删除源文件修改前留下的旧副本
+            try:
+                os.remove(sibling_path)
+            except FileNotFoundError:
+                pass
+            continue
+        _write_atomic(sibling_path, compressed)
+        written.append(sibling_path)
+    return written
+
+
+def compress_directory(root):
+    """为目录下所有文本文件生成压缩副本，返回新生成的副本路径列表"""
+    written = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if is_compressible(name):
+                written.extend(compress_file(os.path.join(dirpath, name)))
+    return written
+
+
+def accepted_encodings():
+    """按客户端 Accept-Encoding 过滤可用编码，q=0 表示拒绝"""
+    accept = request.accept_encodings
+    return [(encoding, suffix) for encoding, suffix in available_encodings() if accept[encoding] > 0]
+
+
+def send_precompressed(directory, filename):
+    """发送静态文件，文本文件按 Accept-Encoding 发送预压缩副本"""
+    if not is_compressible(filename):
+        return send_from_directory(directory, filename)
+
+    path = safe_join(directory, filename)
+    if path is not None and os.path.isfile(path):
+        source_mtime = os.path.getmtime(path)
+        for encoding, suffix in accepted_encodings():
+            sibling_path = path + suffix
+            if not _is_fresh(sibling_path, source_mtime):
+                if not current_app.config.get('PRECOMPRESS_ON_DEMAND'):
+                    continue
+                try:
+                    compress_file(path, [(encoding, suffix)])
+                except OSError as e:
+                    current_app.logger.warning("生成压缩文件失败: %s, %s", path, e)
+                    continue
+                if not os.path.isfile(sibling_path):
+                    continue
+
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_file(sibling_path, mimetype=mimetype, conditional=True)
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+
+    response = send_from_directory(directory, filename)
+    response.vary.add('Accept-Encoding')
+    return response
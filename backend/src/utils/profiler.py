@@ -0,0 +1,207 @@
+"""
+采样分析器
+
+后台线程每隔固定时间读取一次线程的调用栈（sys._current_frames），统计每条调用栈出现的次数，
+输出为折叠栈格式（每行 "根;...;叶 次数"），可直接交给 flamegraph.pl 或 speedscope 生成火焰图。
+被采样的线程不需要任何插桩，开销只与采样频率有关。
+
+两种用法（都需要管理员登录）：
+- POST /api/admin/diagnostics/profile?seconds=10：在处理该请求的worker中对所有线程采样N秒
+- 任意请求带上 X-Profile: 1 头：只对处理这个请求的线程采样，响应头 X-Profile-Id 返回结果编号
+
+结果写入 PROFILER_OUTPUT_DIR，由 GET /api/admin/diagnostics/profile/<编号> 读取，任何worker都能返回。
+gevent worker 中协程共用一个线程，只能看到当前正在运行的协程。
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import current_app, g, request, session
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+# 保留的结果文件数量
+MAX_PROFILES = 50
+# 调用栈中的文件名去掉这些前缀，缩短输出
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_running_lock = threading.Lock()
+_running = False
+
+
+def _frame_label(frame, base_dirs):
+    code = frame.f_code
+    filename = code.co_filename
+    for base in base_dirs:
+        if filename.startswith(base):
+            filename = filename[len(base):].lstrip(os.sep)
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """按固定间隔采样线程调用栈"""
+
+    def __init__(self, interval, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.counts = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+        self.started_at = None
+        self.base_dirs = sorted({BACKEND_DIR} | {path for path in sys.path if path}, key=len, reverse=True)
+
+    def sample(self):
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        if self.thread_id is not None:
+            frames = {self.thread_id: frames[self.thread_id]} if self.thread_id in frames else {}
+        for thread_id, frame in frames.items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame, self.base_dirs))
+                frame = frame.f_back
+            self.counts[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.sample()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def collapsed(self):
+        """折叠栈格式的结果"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+def _output_dir(app):
+    path = app.config['PROFILER_OUTPUT_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _write_profile(app, profile_id, sampler, description):
+    directory = _output_dir(app)
+    elapsed = time.monotonic() - sampler.started_at
+    header = (f'# {description} pid={os.getpid()} samples={sampler.samples} '
+              f'interval={sampler.interval * 1000:g}ms elapsed={elapsed:.2f}s\n')
+    tmp_path = os.path.join(directory, f'{profile_id}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(header)
+        f.write(sampler.collapsed())
+    os.replace(tmp_path, os.path.join(directory, f'{profile_id}.folded'))
+
+    # 只保留最近的结果
+    files = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.folded')),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in files[:-MAX_PROFILES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def start_worker_profile(app, seconds, interval):
+    """在后台对当前worker的所有线程采样seconds秒，返回结果编号；已有采样在运行时返回None"""
+    global _running
+    with _running_lock:
+        if _running:
+            return None
+        _running = True
+
+    profile_id = uuid.uuid4().hex
+    try:
+        running_marker = os.path.join(_output_dir(app), f'{profile_id}.running')
+        open(running_marker, 'w').close()
+    except OSError:
+        with _running_lock:
+            _running = False
+        raise
+
+    def run():
+        global _running
+        sampler = StackSampler(interval)
+        try:
+            sampler.start()
+            time.sleep(seconds)
+            sampler.stop()
+            _write_profile(app, profile_id, sampler, f'worker profile {seconds:g}s')
+            logger.info("采样分析完成: %s, 采样%d次", profile_id, sampler.samples)
+        except Exception as e:
+            logger.exception("采样分析失败: %s", e)
+        finally:
+            try:
+                os.remove(running_marker)
+            except OSError:
+                pass
+            with _running_lock:
+                _running = False
+
+    threading.Thread(target=run, name='profile-worker', daemon=True).start()
+    return profile_id
+
+
+def read_profile(app, profile_id):
+    """返回 (状态, 内容)：('done', 折叠栈文本)、('running', None) 或 ('missing', None)"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return 'missing', None
+    directory = _output_dir(app)
+    path = os.path.join(directory, f'{profile_id}.folded')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return 'done', f.read()
+    if os.path.exists(os.path.join(directory, f'{profile_id}.running')):
+        return 'running', None
+    return 'missing', None
+
+
+def _start_request_profile():
+    if not request.headers.get('X-Profile') or session.get('user_role') != 'admin':
+        return
+    sampler = StackSampler(current_app.config['PROFILER_REQUEST_INTERVAL'], thread_id=threading.get_ident())
+    sampler.start()
+    g.request_profiler = sampler
+
+
+def _finish_request_profile(response):
+    sampler = g.pop('request_profiler', None)
+    if sampler is None:
+        return response
+    sampler.stop()
+    profile_id = uuid.uuid4().hex
+    try:
+        _write_profile(current_app, profile_id, sampler, f'request {request.method} {request.path}')
+        response.headers['X-Profile-Id'] = profile_id
+    except OSError as e:
+        logger.warning("保存请求采样结果失败: %s", e)
+    return response
+
+
+def init_profiler(app):
+    """PROFILER_ENABLED 时允许管理员通过 X-Profile 头分析单个请求"""
+    if not app.config.get('PROFILER_ENABLED'):
+        return
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
@@ -0,0 +1,175 @@
+"""
+每个请求的SQL查询统计
+
+通过SQLAlchemy引擎事件记录每个请求执行的查询次数和数据库耗时：
+- DEBUG模式（或 QUERY_SERVER_TIMING=true）下在响应中添加 Server-Timing 头，浏览器开发者工具中可直接查看
+  （db：查询耗时，db-pool：等待连接池分配连接的时间）
+- 查询次数超过 QUERY_COUNT_LOG_THRESHOLD 的请求打印日志
+- 同一条SQL在一个请求中重复执行超过 QUERY_REPEAT_LOG_THRESHOLD 次时打印日志（通常是循环中逐条查询的N+1问题）
+
+测试或手工检查时可以用 assert_max_queries 限制一段代码的查询次数：
+
+    with assert_max_queries(5):
+        client.get('/api/appointments/available-slots?date=2025-01-01')
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# assert_max_queries / count_queries 在当前线程中收集的查询
+_capture = threading.local()
+logger = logging.getLogger(__name__)
+_listening = False
+_listen_lock = threading.Lock()
+# 每条查询执行后调用的函数（如慢查询记录），参数为 (连接, statement, parameters, executemany, 耗时秒数)
+_observers = []
+
+
+class QueryRecorder:
+    """一段时间内执行的查询：次数、总耗时、每条SQL的执行次数和等待连接池的时间"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.pool_wait = 0.0
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """执行次数不少于threshold的SQL，按次数从多到少"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start_time')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    if has_request_context():
+        recorder = g.get('query_recorder')
+        if recorder is not None:
+            recorder.record(statement, elapsed)
+
+    for recorder in getattr(_capture, 'recorders', ()):
+        recorder.record(statement, elapsed)
+
+    for observer in _observers:
+        observer(conn, statement, parameters, executemany, elapsed)
+
+
+def _install_listeners():
+    """在所有引擎上监听查询（包括会话存储等直接使用 db.engine 的连接），只安装一次"""
+    global _listening
+    with _listen_lock:
+        if not _listening:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _listening = True
+
+
+def add_query_observer(observer):
+    """注册每条查询执行后调用的函数"""
+    _install_listeners()
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def record_pool_wait(elapsed):
+    """记录当前请求从连接池取得连接的等待时间（由连接池调用）"""
+    if has_request_context():
+        recorder = g.get('query_recorder')
+        if recorder is not None:
+            recorder.pool_wait += elapsed
+
+
+def current_pool_wait():
+    """当前请求到目前为止等待连接池的秒数，不在请求中时返回 0.0"""
+    recorder = g.get('query_recorder') if has_request_context() else None
+    return recorder.pool_wait if recorder is not None else 0.0
+
+
+def current_query_stats():
+    """当前请求到目前为止的 (查询次数, 数据库耗时秒数)，不在请求中时返回 (0, 0.0)"""
+    recorder = g.get('query_recorder') if has_request_context() else None
+    if recorder is None:
+        return 0, 0.0
+    return recorder.count, recorder.duration
+
+
+@contextmanager
+def count_queries():
+    """统计代码块中当前线程执行的查询，返回 QueryRecorder"""
+    _install_listeners()
+    recorder = QueryRecorder()
+    recorders = getattr(_capture, 'recorders', None)
+    if recorders is None:
+        recorders = _capture.recorders = []
+    recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        recorders.remove(recorder)
+
+
+@contextmanager
+def assert_max_queries(max_count):
+    """代码块中的查询超过 max_count 次时抛出 AssertionError，并列出执行次数最多的SQL"""
+    with count_queries() as recorder:
+        yield recorder
+    if recorder.count > max_count:
+        top = '\n'.join(f'  {n}x {statement[:200]}' for statement, n in recorder.statements.most_common(5))
+        raise AssertionError(f'执行了{recorder.count}次查询，超过上限{max_count}次:\n{top}')
+
+
+def init_query_stats(app):
+    """注册查询统计的请求钩子"""
+    if not app.config.get('QUERY_STATS_ENABLED'):
+        return
+    _install_listeners()
+
+    server_timing = app.debug or app.config.get('QUERY_SERVER_TIMING')
+    count_threshold = app.config['QUERY_COUNT_LOG_THRESHOLD']
+    repeat_threshold = app.config['QUERY_REPEAT_LOG_THRESHOLD']
+
+    @app.before_request
+    def start_query_stats():
+        g.query_recorder = QueryRecorder()
+        g.query_stats_started = time.perf_counter()
+
+    @app.after_request
+    def report_query_stats(response):
+        recorder = g.get('query_recorder')
+        if recorder is None:
+            return response
+
+        if server_timing:
+            total_ms = (time.perf_counter() - g.query_stats_started) * 1000
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f'db-pool;dur={recorder.pool_wait * 1000:.1f}, app;dur={total_ms:.1f}'
+            )
+
+        if recorder.count > count_threshold:
+            logger.warning("查询次数过多: %s %s (%s) 执行了%d次查询，耗时%.1fms",
+                           request.method, request.path, request.endpoint, recorder.count, recorder.duration * 1000)
+        for statement, n in recorder.repeated(repeat_threshold):
+            logger.warning("疑似N+1查询: %s %s 中同一SQL执行了%d次: %s",
+                           request.method, request.path, n, ' '.join(statement.split())[:200])
+        return response
@@ -0,0 +1,183 @@
+"""
+登录、注册等接口的限流（令牌桶）
+
+RATELIMIT_RULES 按端点名配置，例如 {'auth.login': {'ip': '20/60', 'username': '5/60'}}：
+'N/S' 表示桶容量为N，每S秒补满N个令牌；'ip' 按客户端IP限流，'username' 按请求体中的用户名限流。
+限流检查在 before_request 中进行，早于查询用户和计算密码哈希，被拒绝的请求不访问数据库，
+无论用户是否存在都返回相同的429响应。
+
+令牌桶默认保存在每个worker的内存中（N个worker时实际上限约为N倍）；
+配置 RATELIMIT_STORAGE_URL（redis://...）并安装 redis 包后，所有worker和服务器共享同一组令牌桶。
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from flask import current_app, jsonify, request
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate(rate):
+    """'N/S' -> (容量N, 周期S秒)"""
+    capacity, period = rate.split('/', 1)
+    return int(capacity), float(period)
+
+
+class MemoryBackend:
+    """进程内的令牌桶：key -> [剩余令牌, 更新时间]，超过 max_entries 时淘汰最久未使用的桶"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, period):
+        """取一个令牌，返回 (是否允许, 需要等待的秒数)"""
+        now = time.monotonic()
+        rate = capacity / period
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = [capacity, now]
+                self.buckets[key] = bucket
+                while len(self.buckets) > self.max_entries:
+                    self.buckets.popitem(last=False)
+            else:
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self.buckets.move_to_end(key)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0
+            return False, (1 - bucket[0]) / rate
+
+
+# 在Redis中原子地补充并取出令牌，返回 {是否允许, 需要等待的毫秒数}
+_REDIS_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local rate = capacity / period
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+end
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(period * 1000))
+return {allowed, wait}
+"""
+
+
+class RedisBackend:
+    """多个worker、多台服务器共享的令牌桶；Redis不可用时退回进程内令牌桶"""
+
+    def __init__(self, url, fallback):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.script = self.client.register_script(_REDIS_SCRIPT)
+        self.fallback = fallback
+
+    def consume(self, key, capacity, period):
+        try:
+            allowed, wait_ms = self.script(keys=[key], args=[capacity, period, time.time()])
+        except redis.RedisError as e:
+            logger.warning("限流存储不可用，使用进程内令牌桶: %s", e)
+            return self.fallback.consume(key, capacity, period)
+        return bool(allowed), wait_ms / 1000
+
+
+class RateLimiter:
+    """按端点配置的限流器"""
+
+    def __init__(self, rules, backend, proxy_count=0):
+        self.rules = {
+            endpoint: {scope: parse_rate(rate) for scope, rate in scopes.items()}
+            for endpoint, scopes in rules.items()
+        }
+        self.backend = backend
+        self.proxy_count = proxy_count
+        self.rejected = Counter()
+
+    def client_ip(self):
+        """客户端IP；在nginx等反向代理之后时从 X-Forwarded-For 中取倒数第 proxy_count 个地址"""
+        if self.proxy_count > 0:
+            forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+            if len(forwarded) >= self.proxy_count:
+                return forwarded[-self.proxy_count]
+        return request.remote_addr or 'unknown'
+
+    def _request_username(self):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('username'), str):
+            return None
+        return data['username'].strip().lower()[:80] or None
+
+    def check(self):
+        """before_request 钩子：超出限制时返回429响应"""
+        scopes = self.rules.get(request.endpoint)
+        if not scopes or request.method == 'OPTIONS':
+            return None
+
+        for scope, (capacity, period) in scopes.items():
+            if scope == 'ip':
+                identity = self.client_ip()
+            elif scope == 'username':
+                identity = self._request_username()
+                if identity is None:
+                    continue
+            else:
+                continue
+
+            allowed, wait = self.backend.consume(f'ratelimit:{request.endpoint}:{scope}:{identity}', capacity, period)
+            if not allowed:
+                self.rejected[f'{request.endpoint}:{scope}'] += 1
+                response = jsonify({'error': '请求过于频繁，请稍后再试'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+                return response
+        return None
+
+
+def get_rate_limiter():
+    """当前应用的限流器，未开启限流时返回None"""
+    return current_app.extensions.get('rate_limiter')
+
+
+def init_rate_limit(app):
+    """RATELIMIT_ENABLED 时按 RATELIMIT_RULES 为对应端点注册限流检查"""
+    if not app.config.get('RATELIMIT_ENABLED'):
+        return
+
+    backend = MemoryBackend(app.config['RATELIMIT_MEMORY_SIZE'])
+    storage_url = app.config.get('RATELIMIT_STORAGE_URL')
+    if storage_url:
+        if HAS_REDIS:
+            backend = RedisBackend(storage_url, backend)
+        else:
+            logger.warning("已配置RATELIMIT_STORAGE_URL但未安装redis包，使用进程内令牌桶")
+
+    limiter = RateLimiter(app.config['RATELIMIT_RULES'], backend, app.config['RATELIMIT_PROXY_COUNT'])
+    app.extensions['rate_limiter'] = limiter
+    app.before_request(limiter.check)
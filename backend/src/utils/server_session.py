@@ -0,0 +1,230 @@
+"""
+服务端会话（SESSION_BACKEND=server）
+
+默认的Flask会话把 user_id、user_role 签名后整个存在Cookie里，每个请求都要校验签名，
+而且无法让已登录的会话失效。开启服务端会话后：
+- Cookie中只有一个随机的会话ID，会话内容保存在 server_sessions 表中
+- 每个worker用LRU缓存最近访问的会话，缓存项超过 SESSION_CACHE_TTL 秒后重新从数据库读取，
+  因此删除数据库中的会话（撤销）最多 SESSION_CACHE_TTL 秒后在所有worker上生效
+- 过期会话由 `flask sessions cleanup` 分批删除
+
+会话的读写使用独立的数据库连接，不影响视图函数中的 db.session 事务。
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import CallbackDict
+
+from src.models.database import db, ServerSession
+from src.utils.metrics import record_cache
+
+_table = ServerSession.__table__
+_serializer = TaggedJSONSerializer()
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """保存在服务端的会话，sid 为空表示尚未写入数据库"""
+
+    def __init__(self, initial=None, sid=None, user_id=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = sid is None
+        # 数据库中记录的用户ID，登录用户变化时更换会话ID，防止会话固定攻击
+        self.stored_user_id = user_id
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class _SessionCache:
+    """每个worker内的会话LRU缓存：sid -> (数据, 用户ID, 过期时间, 读取时间)"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, sid):
+        with self.lock:
+            item = self.entries.get(sid)
+            if item is None:
+                return None
+            if time.monotonic() - item[3] >= self.ttl:
+                # 超过TTL，需要重新从数据库确认会话没有被撤销
+                del self.entries[sid]
+                return None
+            self.entries.move_to_end(sid)
+            return item
+
+    def put(self, sid, data, user_id, expires_at):
+        with self.lock:
+            self.entries[sid] = (data, user_id, expires_at, time.monotonic())
+            self.entries.move_to_end(sid)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, sid):
+        with self.lock:
+            self.entries.pop(sid, None)
+
+    def discard_user(self, user_id, keep_sid=None):
+        with self.lock:
+            for sid in [sid for sid, item in self.entries.items() if item[1] == user_id and sid != keep_sid]:
+                del self.entries[sid]
+
+
+class ServerSessionInterface(SessionInterface):
+    """把会话保存在 server_sessions 表中的会话接口"""
+
+    def __init__(self, cache_size=10000, cache_ttl=5):
+        self.cache = _SessionCache(cache_size, cache_ttl)
+
+    def _load(self, sid):
+        cached = self.cache.get(sid)
+        record_cache('session', cached is not None)
+        if cached is not None:
+            data, user_id, expires_at, _ = cached
+        else:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(_table.c.data, _table.c.user_id, _table.c.expires_at).where(_table.c.id == sid)
+                ).first()
+            if row is None:
+                return None
+            data, user_id, expires_at = _serializer.loads(row.data), row.user_id, row.expires_at
+            self.cache.put(sid, data, user_id, expires_at)
+
+        if expires_at <= datetime.utcnow():
+            self.cache.discard(sid)
+            return None
+        return ServerSideSession(dict(data), sid=sid, user_id=user_id, expires_at=expires_at)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and len(sid) <= 64:
+            session = self._load(sid)
+            if session is not None:
+                return session
+        return ServerSideSession()
+
+    def _delete(self, sid):
+        with db.engine.begin() as conn:
+            conn.execute(delete(_table).where(_table.c.id == sid))
+        self.cache.discard(sid)
+
+    def _write(self, session, expires_at):
+        data = dict(session)
+        user_id = data.get('user_id')
+        payload = _serializer.dumps(data)
+        now = datetime.utcnow()
+
+        with db.engine.begin() as conn:
+            if session.sid is not None and user_id != session.stored_user_id:
+                # 登录或切换用户时换新的会话ID
+                conn.execute(delete(_table).where(_table.c.id == session.sid))
+                self.cache.discard(session.sid)
+                session.sid = None
+
+            if session.sid is None:
+                session.sid = secrets.token_urlsafe(32)
+                conn.execute(insert(_table).values(
+                    id=session.sid, user_id=user_id, data=payload,
+                    expires_at=expires_at, created_at=now, updated_at=now
+                ))
+            else:
+                conn.execute(update(_table).where(_table.c.id == session.sid).values(
+                    user_id=user_id, data=payload, expires_at=expires_at, updated_at=now
+                ))
+
+        session.stored_user_id = user_id
+        session.expires_at = expires_at
+        self.cache.put(session.sid, data, user_id, expires_at)
+
+    def _extend(self, session, expires_at):
+        with db.engine.begin() as conn:
+            conn.execute(update(_table).where(_table.c.id == session.sid).values(expires_at=expires_at))
+        session.expires_at = expires_at
+        self.cache.put(session.sid, dict(session), session.stored_user_id, expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # 会话被清空（退出登录）时删除服务端记录和Cookie；只剩 _permanent 标记也视为空会话
+        if not any(key != '_permanent' for key in session):
+            if session.modified and session.sid is not None:
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime
+        expires_at = datetime.utcnow() + lifetime
+        if session.modified or session.sid is None:
+            self._write(session, expires_at)
+        elif session.expires_at - datetime.utcnow() < lifetime / 2:
+            # 剩余有效期不足一半时才延长，避免每个请求都写数据库
+            self._extend(session, expires_at)
+        elif not self.should_set_cookie(app, session):
+            return
+
+        response.vary.add('Cookie')
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def revoke_user_sessions(app, user_id, keep_sid=None):
+    """删除用户的所有服务端会话（可保留当前会话），返回删除的数量；未开启服务端会话时返回0"""
+    interface = app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        return 0
+
+    stmt = delete(_table).where(_table.c.user_id == user_id)
+    if keep_sid is not None:
+        stmt = stmt.where(_table.c.id != keep_sid)
+    with db.engine.begin() as conn:
+        removed = conn.execute(stmt).rowcount
+    interface.cache.discard_user(user_id, keep_sid)
+    return removed
+
+
+def cleanup_expired_sessions(batch_size=1000):
+    """分批删除过期会话，避免一次删除大量行长时间锁表，返回删除的数量"""
+    removed = 0
+    while True:
+        with db.engine.begin() as conn:
+            ids = conn.execute(
+                select(_table.c.id).where(_table.c.expires_at < datetime.utcnow()).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return removed
+            conn.execute(delete(_table).where(_table.c.id.in_(ids)))
+        removed += len(ids)
+        if len(ids) < batch_size:
+            return removed
+
+
+def init_session_backend(app):
+    """SESSION_BACKEND=server 时替换Flask默认的Cookie会话"""
+    if app.config.get('SESSION_BACKEND') == 'server':
+        app.session_interface = ServerSessionInterface(
+            cache_size=app.config['SESSION_CACHE_SIZE'],
+            cache_ttl=app.config['SESSION_CACHE_TTL']
+        )
@@ -0,0 +1,174 @@
+"""
+慢查询记录
+
+执行时间超过 SLOW_QUERY_THRESHOLD_MS 的SQL会：
+- 写入日志，附带发起查询的端点和参数的“形状”（类型和长度，不记录参数值，避免日志中出现个人信息）
+- 保存在每个worker的环形缓冲区中（最近 SLOW_QUERY_BUFFER_SIZE 条），
+  管理员可通过 GET /api/admin/diagnostics/slow-queries 查看
+- SLOW_QUERY_EXPLAIN=true 且使用PostgreSQL时，由后台线程用独立连接执行
+  EXPLAIN (ANALYZE, BUFFERS) 并把执行计划附加到记录上。ANALYZE会真正执行语句，
+  因此只对普通SELECT执行，并在事务中执行后回滚；同一条SQL在 SLOW_QUERY_EXPLAIN_INTERVAL 秒内只分析一次
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import has_request_context, request
+
+from src.utils.query_stats import add_query_observer
+
+logger = logging.getLogger(__name__)
+
+# 执行计划的最长执行时间（毫秒），超时放弃
+EXPLAIN_TIMEOUT_MS = 10000
+MAX_STATEMENT_LENGTH = 4000
+
+
+def parameter_shape(parameters, executemany=False):
+    """把绑定参数转换为只包含类型和长度的描述"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return {'rows': len(parameters), 'row': first}
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return _value_shape(parameters)
+
+
+def _value_shape(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, (str, bytes)):
+        return f'{type(value).__name__}({len(value)})'
+    if isinstance(value, (list, tuple, set)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+
+def _explainable(engine, statement):
+    if engine.dialect.name != 'postgresql':
+        return False
+    upper = statement.lstrip().upper()
+    return upper.startswith('SELECT') and ' FOR UPDATE' not in upper and ' FOR SHARE' not in upper
+
+
+class SlowQueryLog:
+    """每个worker内最近的慢查询"""
+
+    def __init__(self, threshold_ms, buffer_size, explain=False, explain_interval=300):
+        self.threshold = threshold_ms / 1000
+        self.entries = deque(maxlen=buffer_size)
+        self.lock = threading.Lock()
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explained_at = {}
+        self.explain_queue = None
+        self.worker = None
+        self.worker_pid = None
+        self.local = threading.local()
+
+    def observe(self, conn, statement, parameters, executemany, elapsed):
+        if elapsed < self.threshold or getattr(self.local, 'explaining', False):
+            return
+
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'duration_ms': round(elapsed * 1000, 1),
+            'statement': statement[:MAX_STATEMENT_LENGTH],
+            'parameters': parameter_shape(parameters, executemany),
+            'endpoint': None,
+            'method': None,
+            'path': None,
+            'plan': None,
+        }
+        if has_request_context():
+            entry['endpoint'] = request.endpoint
+            entry['method'] = request.method
+            entry['path'] = request.path
+
+        with self.lock:
+            self.entries.append(entry)
+
+        logger.warning("慢查询 %.1fms [%s %s] %s 参数: %s", entry['duration_ms'], entry['method'], entry['endpoint'],
+                       ' '.join(statement.split())[:500], entry['parameters'])
+
+        if self.explain and not executemany and _explainable(conn.engine, statement):
+            self._schedule_explain(conn.engine, statement, parameters, entry)
+
+    def _schedule_explain(self, engine, statement, parameters, entry):
+        now = time.monotonic()
+        with self.lock:
+            last = self.explained_at.get(statement)
+            if last is not None and now - last < self.explain_interval:
+                return
+            self.explained_at[statement] = now
+            if len(self.explained_at) > 1000:
+                self.explained_at.clear()
+            self._ensure_worker()
+        try:
+            self.explain_queue.put_nowait((engine, statement, parameters, entry))
+        except queue.Full:
+            pass
+
+    def _ensure_worker(self):
+        """启动执行EXPLAIN的后台线程（fork出的子进程中重新创建），调用方持有锁"""
+        if self.worker is not None and self.worker_pid == os.getpid() and self.worker.is_alive():
+            return
+        self.explain_queue = queue.Queue(maxsize=100)
+        self.worker = threading.Thread(target=self._explain_loop, args=(self.explain_queue,),
+                                       name='slow-query-explain', daemon=True)
+        self.worker_pid = os.getpid()
+        self.worker.start()
+
+    def _explain_loop(self, explain_queue):
+        self.local.explaining = True
+        while True:
+            engine, statement, parameters, entry = explain_queue.get()
+            try:
+                with engine.connect() as conn:
+                    trans = conn.begin()
+                    try:
+                        conn.exec_driver_sql(f'SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}')
+                        rows = conn.exec_driver_sql('EXPLAIN (ANALYZE, BUFFERS) ' + statement, parameters).fetchall()
+                    finally:
+                        trans.rollback()
+                entry['plan'] = '\n'.join(row[0] for row in rows)
+                logger.info("慢查询执行计划 [%s]:\n%s", entry['endpoint'], entry['plan'])
+            except Exception as e:
+                entry['plan'] = f'EXPLAIN失败: {str(e)}'
+                logger.warning("获取慢查询执行计划失败: %s", e)
+
+    def snapshot(self):
+        """最近的慢查询，最新的在前"""
+        with self.lock:
+            return [dict(entry) for entry in reversed(self.entries)]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def get_slow_query_log(app):
+    """当前应用的慢查询记录，未开启时返回None"""
+    return app.extensions.get('slow_query_log')
+
+
+def init_slow_query_log(app):
+    """SLOW_QUERY_THRESHOLD_MS > 0 时记录慢查询"""
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS', 0)
+    if threshold_ms <= 0:
+        return
+    slow_log = SlowQueryLog(
+        threshold_ms,
+        app.config['SLOW_QUERY_BUFFER_SIZE'],
+        explain=app.config['SLOW_QUERY_EXPLAIN'],
+        explain_interval=app.config['SLOW_QUERY_EXPLAIN_INTERVAL']
+    )
+    app.extensions['slow_query_log'] = slow_log
+    add_query_observer(slow_log.observe)
@@ -0,0 +1,80 @@
+"""
+启动耗时统计
+
+create_app 按阶段记录耗时（导入模块、初始化扩展、建表、注册蓝图、数据库预热），完成后打印一行报告。
+gunicorn预加载应用时 create_app 在主进程中执行，主进程的连接在fork后会被丢弃，
+数据库预热改由每个worker初始化后调用 warm_up_worker，耗时记入该worker的报告。
+总耗时超过 STARTUP_TIME_BUDGET 秒时打印警告；STARTUP_BUDGET_STRICT=true 时直接启动失败，
+可以在CI中防止启动变慢（gunicorn每次重启worker都要付出这部分时间）。
+管理员可通过 GET /api/admin/diagnostics/startup 查看当前worker的启动耗时。
+"""
+
+import logging
+import os
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """依次记录各阶段的耗时（秒），每个阶段从上一次 mark 开始计算"""
+
+    def __init__(self, import_seconds=0.0):
+        now = time.perf_counter()
+        self.started = now - import_seconds
+        self.last = now
+        self.phases = [('imports', import_seconds)] if import_seconds else []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def warm_up_database(db):
+    """从连接池取一个连接执行 SELECT 1，提前建立连接并尽早发现数据库配置错误；只读，不加锁"""
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+    except Exception as e:
+        logger.warning("数据库预热失败: %s", e)
+
+
+def warm_up_worker(app, db):
+    """gunicorn预加载时在每个worker中预热数据库，并把耗时追加到该worker的启动报告"""
+    started = time.perf_counter()
+    with app.app_context():
+        warm_up_database(db)
+    ms = round((time.perf_counter() - started) * 1000, 1)
+
+    report = dict(app.extensions.get('startup') or {'total_ms': 0.0, 'phases': []})
+    report['pid'] = os.getpid()
+    report['preloaded'] = True
+    report['phases'] = report['phases'] + [{'name': 'db_warmup', 'ms': ms}]
+    app.extensions['startup'] = report
+    logger.info("worker %d 数据库预热 %.0fms", os.getpid(), ms)
+
+
+def finish_startup(app, timer):
+    """打印启动耗时报告并检查是否超出预算"""
+    total = timer.total()
+    app.extensions['startup'] = {
+        'pid': os.getpid(),
+        'total_ms': round(total * 1000, 1),
+        'phases': [{'name': name, 'ms': round(seconds * 1000, 1)} for name, seconds in timer.phases],
+    }
+    logger.info("启动耗时 %.0fms: %s", total * 1000,
+                ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timer.phases))
+
+    budget = app.config.get('STARTUP_TIME_BUDGET', 0)
+    if budget and total > budget:
+        slowest, seconds = max(timer.phases, key=lambda phase: phase[1])
+        message = f"启动耗时 {total:.2f}s 超过预算 {budget:g}s，最慢的阶段: {slowest} {seconds:.2f}s"
+        if app.config.get('STARTUP_BUDGET_STRICT'):
+            raise RuntimeError(message)
+        logger.warning(message)
@@ -0,0 +1,66 @@
+"""
+静态文件缓存头
+
+- /assets/ 下带内容哈希的前端构建文件（如 index-B3kx9aQz.js）、
+  文件名含UUID的旧版上传文件、static/media/ 下按SHA-256命名的上传文件，内容永不改变：
+      Cache-Control: public, max-age=31536000, immutable
+- index.html 每次都向服务端验证（no-cache + ETag，未修改时返回304），保证发布后立即生效
+- 其他静态文件（logo、背景视频等可能被覆盖的文件）缓存 STATIC_DEFAULT_MAX_AGE 秒
+"""
+
+import posixpath
+import re
+
+from flask import current_app
+
+# Vite（rollup）构建产物的文件名：name-<8位base64url哈希>.ext，sourcemap为 .ext.map；
+# 哈希本身可能含有 - 和 _，固定取扩展名前的8个字符
+_ASSET_HASH_RE = re.compile(r'^.+-([A-Za-z0-9_-]{8})\.[A-Za-z0-9]+(\.map)?$')
+# 随机哈希几乎总有大写字母或数字，用来排除 my-settings.js 这类恰好8个字母的普通单词
+_HASH_MIXED_RE = re.compile(r'[A-Z0-9]')
+# 上传文件名中的UUID
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+# 内容寻址存储中的文件：media/<前两位>/<SHA-256>.<扩展名>
+_MEDIA_DIGEST_RE = re.compile(r'(^|/)media/[0-9a-f]{2}/[0-9a-f]{64}\.[A-Za-z0-9]+$')
+
+# 只为这些状态码设置缓存头，错误响应不应被长期缓存
+_CACHEABLE_STATUS = (200, 206, 304)
+
+
+def is_hashed_asset(filename):
+    """判断 /assets/ 下的文件名是否带内容哈希"""
+    match = _ASSET_HASH_RE.match(posixpath.basename(filename))
+    return bool(match and _HASH_MIXED_RE.search(match.group(1)))
+
+
+def is_immutable_upload(filename):
+    """判断 /static/ 下的文件是否为内容不会改变的上传文件"""
+    return bool(_MEDIA_DIGEST_RE.search(filename) or _UUID_RE.search(filename))
+
+
+def set_cache_headers(response, immutable=False, max_age=None):
+    """为静态文件响应设置 Cache-Control"""
+    if response.status_code not in _CACHEABLE_STATUS:
+        return response
+
+    cache_control = response.cache_control
+    # send_file 未指定 max_age 时默认加了 no-cache
+    cache_control.no_cache = None
+    cache_control.public = True
+    if immutable:
+        cache_control.max_age = current_app.config['STATIC_IMMUTABLE_MAX_AGE']
+        cache_control.immutable = True
+    else:
+        if max_age is None:
+            max_age = current_app.config['STATIC_DEFAULT_MAX_AGE']
+        cache_control.max_age = max_age
+    return response
+
+
+def set_revalidate_headers(response):
+    """index.html：允许缓存但每次使用前都要验证（ETag/Last-Modified -> 304）"""
+    if response.status_code not in _CACHEABLE_STATUS:
+        return response
+    response.cache_control.no_cache = True
+    response.cache_control.max_age = 0
+    return response
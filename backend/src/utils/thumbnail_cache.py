@@ -0,0 +1,168 @@
+"""
+视频缩略图缓存索引
+
+每个worker在内存中记录缩略图路径、对应视频的修改时间和文件大小：
+- 检查结果（包括“不存在”）在 THUMBNAIL_CACHE_CHECK_INTERVAL 秒内直接使用，热门缩略图的命中不访问文件系统
+- static/thumbnails/ 的总大小超过 THUMBNAIL_CACHE_MAX_BYTES 时按最近最少使用删除缩略图，需要时重新生成；
+  视频更新后已过期、但仍在磁盘上的缩略图同样计入总大小，可以被淘汰
+- 目录外的缩略图（如 static/images/thumbnail-*.jpg）只缓存检查结果，不会被删除
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from src.utils.metrics import record_cache
+
+
+class _Entry:
+    __slots__ = ('source_path', 'source_mtime', 'size', 'exists', 'fresh', 'checked_at')
+
+    def __init__(self, source_path, source_mtime, size, exists, fresh, checked_at):
+        self.source_path = source_path
+        self.source_mtime = source_mtime
+        self.size = size
+        # exists：文件在磁盘上（计入总大小）；fresh：文件存在且比视频新，可以直接使用
+        self.exists = exists
+        self.fresh = fresh
+        self.checked_at = checked_at
+
+
+class ThumbnailCache:
+    """缩略图的进程内索引和磁盘LRU淘汰"""
+
+    def __init__(self, cache_dir, max_bytes, check_interval):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """启动时按修改时间重建LRU顺序，首次访问时再校验对应的视频"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat_result.st_mtime, path, stat_result.st_size))
+        for _, path, size in sorted(files):
+            self.entries[path] = _Entry(None, None, size, True, True, 0)
+            self.total_bytes += size
+
+    def _is_managed(self, path):
+        return path.startswith(self.cache_dir + os.sep)
+
+    def _set_entry(self, path, entry):
+        """替换索引项并维护受管理目录的总大小，调用方持有锁"""
+        old = self.entries.pop(path, None)
+        if old is not None and old.exists and self._is_managed(path):
+            self.total_bytes -= old.size
+        self.entries[path] = entry
+        if entry.exists and self._is_managed(path):
+            self.total_bytes += entry.size
+
+    def lookup(self, thumbnail_path, source_path=None):
+        """缩略图存在且比视频新时返回True；检查结果在 check_interval 秒内复用"""
+        thumbnail_path = os.path.abspath(thumbnail_path)
+        if source_path is not None:
+            source_path = os.path.abspath(source_path)
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(thumbnail_path)
+            if entry is not None and entry.source_path == source_path and now - entry.checked_at < self.check_interval:
+                self.entries.move_to_end(thumbnail_path)
+                record_cache('thumbnail', True)
+                return entry.fresh
+
+        # 重新校验：缩略图和视频分别检查，视频已不存在时缩略图视为过期，但仍计入总大小、可以被淘汰
+        record_cache('thumbnail', False)
+        try:
+            thumb_stat = os.stat(thumbnail_path)
+        except OSError:
+            thumb_stat = None
+        source_mtime = None
+        source_missing = False
+        if source_path is not None:
+            try:
+                source_mtime = os.path.getmtime(source_path)
+            except OSError:
+                source_missing = True
+        fresh = (thumb_stat is not None and not source_missing
+                 and (source_mtime is None or thumb_stat.st_mtime > source_mtime))
+
+        size = thumb_stat.st_size if thumb_stat else 0
+        with self.lock:
+            self._set_entry(thumbnail_path, _Entry(source_path, source_mtime, size, thumb_stat is not None, fresh, now))
+        return fresh
+
+    def put(self, thumbnail_path, source_path=None):
+        """记录新生成的缩略图，超出磁盘预算时淘汰最久未使用的缩略图"""
+        thumbnail_path = os.path.abspath(thumbnail_path)
+        if source_path is not None:
+            source_path = os.path.abspath(source_path)
+        try:
+            size = os.path.getsize(thumbnail_path)
+            source_mtime = os.path.getmtime(source_path) if source_path is not None else None
+        except OSError:
+            return
+
+        with self.lock:
+            self._set_entry(thumbnail_path, _Entry(source_path, source_mtime, size, True, True, time.monotonic()))
+            evicted = self._evict()
+
+        for path in evicted:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """从最久未使用的开始淘汰受管理目录中的缩略图，保留刚写入的那一个，调用方持有锁"""
+        evicted = []
+        if self.total_bytes <= self.max_bytes:
+            return evicted
+        for path in list(self.entries)[:-1]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            entry = self.entries[path]
+            if not entry.exists or not self._is_managed(path):
+                continue
+            del self.entries[path]
+            self.total_bytes -= entry.size
+            evicted.append(path)
+        return evicted
+
+    def forget(self, thumbnail_path):
+        """缩略图已被其他worker删除时移除索引项"""
+        thumbnail_path = os.path.abspath(thumbnail_path)
+        with self.lock:
+            entry = self.entries.pop(thumbnail_path, None)
+            if entry is not None and entry.exists and self._is_managed(thumbnail_path):
+                self.total_bytes -= entry.size
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ThumbnailCache(
+                    current_app.config['THUMBNAIL_DIR'],
+                    current_app.config['THUMBNAIL_CACHE_MAX_BYTES'],
+                    current_app.config['THUMBNAIL_CACHE_CHECK_INTERVAL']
+                )
+    return _cache
@@ -0,0 +1,298 @@
+"""
+新闻视频HLS转码
+
+上传的新闻视频（MP4等）由后台worker用ffmpeg转为多码率HLS：
+    static/videos/hls/<任务ID>/master.m3u8        主播放列表
+    static/videos/hls/<任务ID>/720p/index.m3u8    各清晰度的播放列表和分段
+移动端按网络状况自动切换清晰度，拖动进度条时只需下载对应分段。
+
+任务保存在 transcode_jobs 表中，状态为 pending -> running -> done / failed。
+worker 通过条件UPDATE领取任务，可以在多台机器上同时运行：
+
+    FLASK_APP=src.main flask transcode worker
+    FLASK_APP=src.main flask transcode backfill    # 为已有新闻视频创建任务
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from werkzeug.security import safe_join
+
+from src.models.database import db, News, TranscodeJob
+
+Rendition = namedtuple('Rendition', ['name', 'height', 'video_bitrate', 'max_rate', 'buffer_size', 'audio_bitrate'])
+
+# 清晰度档位，只生成不高于原视频的档位
+RENDITIONS = (
+    Rendition('360p', 360, '800k', '856k', '1200k', '96k'),
+    Rendition('720p', 720, '2800k', '2996k', '4200k', '128k'),
+    Rendition('1080p', 1080, '5000k', '5350k', '7500k', '192k'),
+)
+
+# 每个分段的时长（秒），关键帧按该间隔对齐，保证各清晰度之间可以无缝切换
+SEGMENT_SECONDS = 6
+
+MASTER_PLAYLIST = 'master.m3u8'
+
+# 记录到任务中的ffmpeg错误输出的最大长度
+ERROR_TAIL_CHARS = 2000
+
+
+class TranscodeError(Exception):
+    """转码失败，retryable 为 False 时（如文件不存在）不再重试"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_playlist_url(url):
+    return bool(url) and url.split('?', 1)[0].lower().endswith('.m3u8')
+
+
+def _source_path(source_url):
+    """把 /static/... URL 转换为磁盘路径"""
+    if not source_url or not source_url.startswith('/static/'):
+        raise TranscodeError(f'不是本地视频: {source_url}', retryable=False)
+    path = safe_join(current_app.config['MEDIA_ROOT'], source_url[len('/static/'):])
+    if path is None or not os.path.isfile(path):
+        raise TranscodeError(f'视频文件不存在: {source_url}', retryable=False)
+    return path
+
+
+def _url_for_path(path):
+    rel_path = os.path.relpath(path, current_app.config['MEDIA_ROOT'])
+    return '/static/' + rel_path.replace(os.sep, '/')
+
+
+def probe_video(path):
+    """用ffprobe读取视频高度和是否有音轨，返回 (height, has_audio)"""
+    cmd = [
+        current_app.config['FFPROBE_PATH'], '-v', 'error',
+        '-show_entries', 'stream=codec_type,height',
+        '-of', 'json', path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60, check=True)
+        streams = json.loads(result.stdout).get('streams', [])
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        raise TranscodeError(f'读取视频信息失败: {str(e)}')
+
+    heights = [s.get('height') for s in streams if s.get('codec_type') == 'video' and s.get('height')]
+    if not heights:
+        raise TranscodeError('文件中没有视频流', retryable=False)
+    has_audio = any(s.get('codec_type') == 'audio' for s in streams)
+    return heights[0], has_audio
+
+
+def select_renditions(source_height):
+    """选择不高于原视频的清晰度，原视频低于最低档时保留最低档"""
+    selected = [r for r in RENDITIONS if r.height <= source_height]
+    return selected or [RENDITIONS[0]]
+
+
+def build_ffmpeg_command(source_path, output_dir, renditions, has_audio):
+    """生成一次输出全部清晰度的ffmpeg命令"""
+    count = len(renditions)
+    split = f'[0:v]split={count}' + ''.join(f'[v{i}]' for i in range(count))
+    scales = [f'[v{i}]scale=-2:{r.height}[v{i}out]' for i, r in enumerate(renditions)]
+
+    cmd = [
+        current_app.config['FFMPEG_PATH'], '-hide_banner', '-y', '-i', source_path,
+        '-filter_complex', ';'.join([split] + scales),
+    ]
+    for i, r in enumerate(renditions):
+        cmd += [
+            '-map', f'[v{i}out]',
+            f'-c:v:{i}', 'libx264', f'-b:v:{i}', r.video_bitrate,
+            f'-maxrate:v:{i}', r.max_rate, f'-bufsize:v:{i}', r.buffer_size,
+        ]
+        if has_audio:
+            cmd += ['-map', 'a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', r.audio_bitrate, '-ac', '2']
+
+    stream_map = ' '.join(
+        f'v:{i},a:{i},name:{r.name}' if has_audio else f'v:{i},name:{r.name}'
+        for i, r in enumerate(renditions)
+    )
+    cmd += [
+        '-preset', 'veryfast', '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+        '-sc_threshold', '0',
+        '-force_key_frames', f'expr:gte(t,n_forced*{SEGMENT_SECONDS})',
+        '-f', 'hls',
+        '-hls_time', str(SEGMENT_SECONDS),
+        '-hls_playlist_type', 'vod',
+        '-hls_flags', 'independent_segments',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', 'seg_%04d.ts'),
+        '-master_pl_name', MASTER_PLAYLIST,
+        '-var_stream_map', stream_map,
+        os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+    return cmd
+
+
+def transcode_to_hls(source_path, output_dir):
+    """转码到 output_dir，先写入临时目录，成功后再替换，返回生成的清晰度列表"""
+    height, has_audio = probe_video(source_path)
+    renditions = select_renditions(height)
+
+    tmp_dir = output_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for r in renditions:
+        os.makedirs(os.path.join(tmp_dir, r.name))
+
+    cmd = build_ffmpeg_command(source_path, tmp_dir, renditions, has_audio)
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True,
+            timeout=current_app.config['TRANSCODE_TIMEOUT']
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise TranscodeError(f'执行ffmpeg失败: {str(e)}')
+
+    if result.returncode != 0 or not os.path.isfile(os.path.join(tmp_dir, MASTER_PLAYLIST)):
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise TranscodeError(result.stderr[-ERROR_TAIL_CHARS:] or f'ffmpeg退出码 {result.returncode}')
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return [r.name for r in renditions]
+
+
+def enqueue_transcode(source_url):
+    """为视频创建转码任务；同一视频已有未失败的任务时直接返回该任务"""
+    job = TranscodeJob.query.filter_by(source_url=source_url).order_by(TranscodeJob.id.desc()).first()
+    if job and job.status != 'failed':
+        return job
+    if job:
+        # 失败的任务重新排队
+        job.status = 'pending'
+        job.attempts = 0
+        job.error = None
+    else:
+        job = TranscodeJob(source_url=source_url, status='pending')
+        db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def find_playlist_url(source_url):
+    """返回已完成转码的播放列表URL，没有时返回None"""
+    job = TranscodeJob.query.filter_by(source_url=source_url, status='done').first()
+    return job.playlist_url if job else None
+
+
+def find_source_url(playlist_url):
+    """由播放列表URL查回原始视频URL，用作不支持HLS的浏览器的备用地址"""
+    job = TranscodeJob.query.filter_by(playlist_url=playlist_url).first()
+    return job.source_url if job else None
+
+
+def requeue_stale_jobs():
+    """把运行超时（worker崩溃或被杀）的任务放回队列，超过重试次数的标记为失败"""
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['TRANSCODE_TIMEOUT'] * 2)
+    max_attempts = current_app.config['TRANSCODE_MAX_ATTEMPTS']
+    stale = TranscodeJob.query.filter(
+        TranscodeJob.status == 'running',
+        TranscodeJob.started_at < cutoff
+    ).all()
+    for job in stale:
+        if job.attempts >= max_attempts:
+            job.status = 'failed'
+            job.error = '转码超时'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'pending'
+    if stale:
+        db.session.commit()
+    return len(stale)
+
+
+def claim_next_job():
+    """领取最早的待处理任务；多个worker同时领取时只有条件UPDATE成功的一个拿到任务"""
+    while True:
+        job = TranscodeJob.query.filter_by(status='pending').order_by(TranscodeJob.id).first()
+        if job is None:
+            return None
+        claimed = TranscodeJob.query.filter_by(id=job.id, status='pending').update({
+            'status': 'running',
+            'attempts': TranscodeJob.attempts + 1,
+            'started_at': datetime.utcnow(),
+            'error': None,
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            db.session.refresh(job)
+            return job
+
+
+def run_job(job):
+    """执行一个已领取的任务，返回是否成功"""
+    output_dir = os.path.join(current_app.config['TRANSCODE_OUTPUT_DIR'], str(job.id))
+    try:
+        renditions = transcode_to_hls(_source_path(job.source_url), output_dir)
+    except TranscodeError as e:
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        if not e.retryable or job.attempts >= current_app.config['TRANSCODE_MAX_ATTEMPTS']:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+        db.session.commit()
+        current_app.logger.warning("转码失败: 任务%s %s, %s", job.id, job.source_url, job.error[:200])
+        return False
+
+    job.status = 'done'
+    job.playlist_url = _url_for_path(os.path.join(output_dir, MASTER_PLAYLIST))
+    job.renditions = ','.join(renditions)
+    job.error = None
+    job.finished_at = datetime.utcnow()
+
+    if current_app.config['TRANSCODE_REPOINT_NEWS']:
+        News.query.filter(News.video_url == job.source_url).update(
+            {'video_url': job.playlist_url}, synchronize_session=False
+        )
+    db.session.commit()
+    current_app.logger.info("转码完成: 任务%s %s -> %s", job.id, job.source_url, job.playlist_url)
+    return True
+
+
+def run_worker(once=False, poll_interval=10):
+    """循环领取并执行任务；once=True 时处理完当前队列后退出，返回处理的任务数"""
+    processed = 0
+    while True:
+        requeue_stale_jobs()
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return processed
+            db.session.remove()
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+
+
+def backfill_news_videos(dry_run=False):
+    """为已有的本地上传新闻视频创建转码任务，返回需要转码的视频URL列表"""
+    rows = db.session.query(News.video_url).filter(
+        News.video_source == 'local',
+        News.video_url.like('/static/%')
+    ).distinct()
+
+    urls = [url for (url,) in rows if not is_playlist_url(url)]
+    pending = []
+    for url in urls:
+        existing = TranscodeJob.query.filter_by(source_url=url).filter(TranscodeJob.status != 'failed').first()
+        if existing:
+            continue
+        pending.append(url)
+        if not dry_run:
+            enqueue_transcode(url)
+    return pending
@@ -0,0 +1,106 @@
+"""
+用户信息缓存
+
+前端每次切换路由都会调用 /api/auth/check，个人中心调用 /api/user/profile，
+这两个接口只需要用户的基本信息。每个worker按用户ID缓存这些信息 USER_CACHE_TTL 秒：
+- 本worker内修改资料、管理员修改/删除用户、重置密码时立即失效
+- 其他worker中的缓存最多在 USER_CACHE_TTL 秒后过期
+缓存的是普通字典（不含密码哈希），不是ORM对象，不会跨请求持有数据库会话。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from src.models.database import db, User
+from src.utils.metrics import record_cache
+
+
+class UserCache:
+    """按用户ID缓存用户信息的LRU，条目超过ttl秒后失效"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self.lock:
+            item = self.entries.get(user_id)
+            if item is None or time.monotonic() >= item[1]:
+                if item is not None:
+                    del self.entries[user_id]
+                self.misses += 1
+                record_cache('user', False)
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            record_cache('user', True)
+            return item[0]
+
+    def put(self, user_id, info):
+        with self.lock:
+            self.entries[user_id] = (info, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = UserCache(
+                    current_app.config['USER_CACHE_TTL'],
+                    current_app.config['USER_CACHE_SIZE']
+                )
+    return _cache
+
+
+def _user_info(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'phone': user.phone if hasattr(user, 'phone') else None,
+        'role': user.role,
+        'created_at': user.created_at.isoformat() if getattr(user, 'created_at', None) else None
+    }
+
+
+def get_user_info(user_id):
+    """返回用户信息字典，用户不存在时返回None（不缓存不存在的结果）"""
+    cache = get_user_cache()
+    info = cache.get(user_id)
+    if info is not None:
+        return info
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    info = _user_info(user)
+    cache.put(user_id, info)
+    return info
+
+
+def invalidate_user(user_id):
+    """用户资料、角色或密码变化后调用"""
+    get_user_cache().invalidate(user_id)
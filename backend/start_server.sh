@@ -24,9 +24,13 @@ if ! pip list | grep -q Flask; then
     pip install -r requirements.txt
 fi
 
-# 启动服务器
+# 创建缺少的表并执行数据库迁移（索引、默认预约时间段）
+echo "更新数据库..."
+FLASK_APP=src.main flask database setup
+
+# 启动服务器（进程数、线程数等参数见 gunicorn.conf.py）
 echo "启动服务器..."
-python3 -m src.api_server
+gunicorn -c gunicorn.conf.py src.api_server:app
 
 # 如果使用了虚拟环境，退出虚拟环境
 if [ -n "$VIRTUAL_ENV" ]; then
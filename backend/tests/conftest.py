@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# src.main 导入时会按 FLASK_ENV 创建模块级应用，测试中不连接开发数据库
+os.environ.setdefault('FLASK_ENV', 'testing')
+os.environ.setdefault('DB_WARMUP', 'false')
+os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+
+from src.config import TestingConfig, config  # noqa: E402
+from src.main import create_app  # noqa: E402
+from src.models.database import db  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """用临时SQLite数据库创建应用，关键字参数覆盖配置项"""
+    def factory(**overrides):
+        settings = {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}"}
+        settings.update(overrides)
+        monkeypatch.setitem(config, 'testing', type('TestConfig', (TestingConfig,), settings))
+        app = create_app('testing')
+        with app.app_context():
+            db.create_all(bind_key=None)
+        return app
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def login_as(client, user_id, role='user'):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = role
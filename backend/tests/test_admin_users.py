@@ -0,0 +1,72 @@
+import pytest
+
+from src.models.database import db, ServerSession, User
+from tests.conftest import login_as
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(SESSION_BACKEND='server')
+    with app.app_context():
+        db.session.add_all([
+            User(username='admin', email='admin@example.com', password='admin-pass', role='admin'),
+            User(username='alice', email='alice@example.com', password='alice-pass', phone='13800000000'),
+        ])
+        db.session.commit()
+    return app
+
+
+def user_id(app, username):
+    with app.app_context():
+        return User.query.filter_by(username=username).one().id
+
+
+def session_count(app, uid):
+    with app.app_context():
+        return ServerSession.query.filter_by(user_id=uid).count()
+
+
+def edit_user(client, uid, **fields):
+    """与管理后台的编辑表单一样，总是提交 role"""
+    response = client.get(f'/api/admin/users/{uid}')
+    user = response.get_json()['user']
+    user.update(fields)
+    return client.put(f'/api/admin/users/{uid}', json=user)
+
+
+@pytest.fixture
+def clients(app):
+    admin, alice = app.test_client(), app.test_client()
+    login_as(admin, user_id(app, 'admin'), role='admin')
+    login_as(alice, user_id(app, 'alice'))
+    return admin, alice
+
+
+def test_edit_keeping_role_leaves_sessions_alive(app, clients):
+    admin, _ = clients
+    alice_id = user_id(app, 'alice')
+
+    response = edit_user(admin, alice_id, phone='13900000000')
+
+    assert response.status_code == 200
+    assert session_count(app, alice_id) == 1
+
+
+def test_role_change_revokes_sessions(app, clients):
+    admin, _ = clients
+    alice_id = user_id(app, 'alice')
+
+    assert edit_user(admin, alice_id, role='admin').status_code == 200
+    assert session_count(app, alice_id) == 0
+
+
+def test_admin_changing_own_password_keeps_current_session(app, clients):
+    admin, _ = clients
+    admin_id = user_id(app, 'admin')
+    other = app.test_client()
+    login_as(other, admin_id, role='admin')
+    assert session_count(app, admin_id) == 2
+
+    assert edit_user(admin, admin_id, password='new-pass').status_code == 200
+    assert session_count(app, admin_id) == 1
+    assert admin.get(f'/api/admin/users/{admin_id}').status_code == 200
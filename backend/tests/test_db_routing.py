@@ -0,0 +1,49 @@
+import pytest
+
+from src.models.database import db, News
+from src.utils.db_routing import REPLICA_BIND, STICKY_COOKIE
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    """主库和只读副本是两个SQLite数据库，各有一条标题不同的新闻，用来判断查询发到了哪个库"""
+    app = make_app(REPLICA_DATABASE_URL=f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        replica = db.engines[REPLICA_BIND]
+        db.metadata.create_all(replica)
+        with replica.begin() as conn:
+            conn.execute(News.__table__.insert().values(id='replica', title='来自副本', content='-'))
+        db.session.add(News(id='primary', title='来自主库', content='-'))
+        db.session.commit()
+    return app
+
+
+def news_titles(client):
+    response = client.get('/api/news?page=1&per_page=10')
+    assert response.status_code == 200
+    return [item['title'] for item in response.get_json()['news']]
+
+
+def test_get_reads_replica(app):
+    client = app.test_client()
+    assert news_titles(client) == ['来自副本']
+
+
+def test_write_sets_sticky_cookie_and_later_reads_use_primary(app):
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'username': 'alice', 'email': 'alice@example.com', 'password': 'secret123', 'phone': '13800000000'
+    })
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.headers.get('Set-Cookie', '')
+    assert client.get_cookie(STICKY_COOKIE) is not None
+
+    assert news_titles(client) == ['来自主库']
+
+
+def test_replica_down_falls_back_to_primary(make_app, tmp_path):
+    app = make_app(REPLICA_DATABASE_URL=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    with app.app_context():
+        db.session.add(News(id='primary', title='来自主库', content='-'))
+        db.session.commit()
+    assert news_titles(app.test_client()) == ['来自主库']
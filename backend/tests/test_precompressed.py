@@ -0,0 +1,27 @@
+import os
+import time
+
+from src.utils.precompressed import compress_file, send_precompressed
+
+
+def test_changed_source_that_no_longer_compresses_drops_old_sibling(app, tmp_path):
+    source = tmp_path / 'app.js'
+    source.write_text('console.log("hello");\n' * 200)
+    assert compress_file(str(source)) != []
+    assert (tmp_path / 'app.js.gz').exists()
+
+    # 源文件改为压缩后不会变小的内容，旧的 .gz 不能再被发送
+    new_content = os.urandom(4096)
+    source.write_bytes(new_content)
+    later = time.time() + 10
+    os.utime(source, (later, later))
+
+    with app.test_request_context('/assets/app.js', headers={'Accept-Encoding': 'gzip, br'}):
+        response = send_precompressed(str(tmp_path), 'app.js')
+        response.direct_passthrough = False
+        body = response.get_data()
+
+    assert 'Content-Encoding' not in response.headers
+    assert body == new_content
+    assert not (tmp_path / 'app.js.gz').exists()
+    assert not (tmp_path / 'app.js.br').exists()
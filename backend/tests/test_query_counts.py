@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.models.database import db, Activity, Appointment, News, TimeSlotConfig, User
+from src.routes.appointments import DEFAULT_TIME_SLOTS, seed_time_slots
+from src.utils.query_stats import assert_max_queries
+from tests.conftest import login_as
+
+
+def next_weekday():
+    day = date.today() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+@pytest.fixture
+def populated(app):
+    """每个时间段都有预约，另有若干用户、活动和新闻"""
+    day = next_weekday()
+    now = datetime.utcnow()
+    with app.app_context():
+        seed_time_slots()
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', role='user')
+                 for i in range(10)]
+        db.session.add_all(users)
+        db.session.flush()
+        for i, time_slot in enumerate(DEFAULT_TIME_SLOTS * 2):
+            db.session.add(Appointment(
+                user_id=users[i % len(users)].id, date=day, time_slot=time_slot,
+                visitor_count=2, contact_name='张三', contact_phone='13800000000', status='confirmed'
+            ))
+        for i in range(8):
+            db.session.add(Activity(
+                title=f'活动{i}', description='-', location='科普基地',
+                start_time=now, end_time=now + timedelta(hours=2), registration_deadline=now
+            ))
+            db.session.add(News(id=f'news-{i}', title=f'新闻{i}', content='-'))
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        db.session.add(admin)
+        db.session.commit()
+        return {'day': day, 'admin_id': admin.id}
+
+
+def test_available_slots_query_count_does_not_grow_with_slots(app, populated):
+    client = app.test_client()
+    with assert_max_queries(2):
+        response = client.get(f"/api/appointments/available-slots?date={populated['day'].isoformat()}")
+
+    assert response.status_code == 200
+    slots = response.get_json()['available_slots']
+    assert len(slots) == len(DEFAULT_TIME_SLOTS)
+    assert all(slot['booked_count'] == 4 for slot in slots)
+
+
+def test_admin_dashboard_query_count_is_constant(app, populated):
+    client = app.test_client()
+    login_as(client, populated['admin_id'], role='admin')
+    with assert_max_queries(9):
+        response = client.get('/api/admin/dashboard')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['recent_appointments']) == 5
+
+
+def test_assert_max_queries_reports_repeated_statements(app, populated):
+    with app.app_context():
+        with pytest.raises(AssertionError, match='超过上限1次'):
+            with assert_max_queries(1):
+                for time_slot in DEFAULT_TIME_SLOTS:
+                    Appointment.query.filter_by(time_slot=time_slot).count()
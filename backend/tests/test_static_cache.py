@@ -0,0 +1,36 @@
+import pytest
+
+from src.utils.static_cache import is_hashed_asset, is_immutable_upload
+
+
+@pytest.mark.parametrize('filename', [
+    'index-B3kx9aQz.js',
+    'index-DiwrgTda.css',
+    'vendor-react-BQ_Hf3Pv.js',
+    'index-C-0nBm5N.js',
+    'logo-a1b2c3d4.png',
+    'index-B3kx9aQz.js.map',
+    'chunks/page-Xy12_abc.js',
+])
+def test_vite_hashed_assets_are_immutable(filename):
+    assert is_hashed_asset(filename)
+
+
+@pytest.mark.parametrize('filename', [
+    'foo-bar-baz.js',
+    'site-logo-large.png',
+    'my-settings.js',
+    'background-video.mp4',
+    'logo.png',
+    'index.js',
+    'photo-550e8400-e29b-41d4-a716-446655440000.png',
+    'index-B3kx9aQzX.js',
+])
+def test_unhashed_assets_are_not_immutable(filename):
+    assert not is_hashed_asset(filename)
+
+
+def test_content_addressed_and_uuid_uploads_are_immutable():
+    assert is_immutable_upload('media/ab/' + 'ab' * 32 + '.jpg')
+    assert is_immutable_upload('images/news/550e8400-e29b-41d4-a716-446655440000.jpg')
+    assert not is_immutable_upload('images/logo.png')
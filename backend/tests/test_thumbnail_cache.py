@@ -0,0 +1,55 @@
+import os
+import time
+
+from src.utils.thumbnail_cache import ThumbnailCache
+
+
+def write(path, size, mtime):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_stale_thumbnail_counts_toward_budget_and_is_evicted(tmp_path):
+    cache_dir = tmp_path / 'thumbnails'
+    cache_dir.mkdir()
+    video = tmp_path / 'video.mp4'
+    stale = cache_dir / 'stale.jpg'
+    now = time.time()
+    write(stale, 600, now - 100)
+    write(video, 10, now)
+
+    cache = ThumbnailCache(str(cache_dir), max_bytes=1000, check_interval=60)
+    # 视频比缩略图新：缩略图已过期，但仍占用磁盘
+    assert cache.lookup(str(stale), str(video)) is False
+    assert cache.lookup(str(stale), str(video)) is False
+    assert cache.total_bytes == 600
+
+    fresh = cache_dir / 'fresh.jpg'
+    write(fresh, 600, now + 10)
+    cache.put(str(fresh), str(video))
+
+    assert not stale.exists()
+    assert fresh.exists()
+    assert cache.total_bytes == 600
+
+
+def test_thumbnail_of_missing_video_stays_counted_and_evictable(tmp_path):
+    cache_dir = tmp_path / 'thumbnails'
+    cache_dir.mkdir()
+    orphan = cache_dir / 'orphan.jpg'
+    now = time.time()
+    write(orphan, 600, now)
+
+    cache = ThumbnailCache(str(cache_dir), max_bytes=1000, check_interval=60)
+    assert cache.lookup(str(orphan), str(tmp_path / 'deleted.mp4')) is False
+    assert cache.total_bytes == 600
+
+    video = tmp_path / 'video.mp4'
+    write(video, 10, now - 10)
+    fresh = cache_dir / 'fresh.jpg'
+    write(fresh, 600, now)
+    cache.put(str(fresh), str(video))
+
+    assert not orphan.exists()
+    assert cache.total_bytes == 600
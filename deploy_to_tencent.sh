@@ -113,6 +113,14 @@ pnpm run build
 echo "复制前端构建文件到静态目录..."
 cp -r dist/* ../backend/static/
 
+# 生成预压缩的 .br/.gz 文件，避免每次请求时压缩
+(cd ../backend && FLASK_APP=src.main flask assets compress)
+
+# 创建数据库表并执行迁移（索引、默认预约时间段）
+echo "正在初始化数据库..."
+# （flask命令会读取backend/.env中的FLASK_ENV和DATABASE_URL）
+(cd ../backend && FLASK_APP=src.main flask database setup)
+
 # 创建系统服务
 echo "正在创建系统服务..."
 cat > /etc/systemd/system/ai-science-base.service << EOF
@@ -10,6 +10,7 @@ import { Loader2, Upload, Play, X, Check, AlertCircle, FileUp, RefreshCw } from
 import { toast } from 'sonner';
 import { Alert, AlertDescription } from "../ui/alert";
 import { API_BASE_URL, videoUtils } from '../../lib/utils';
+import { chunkedUpload } from '../../utils/chunkedUpload';
 import { Badge } from '../ui/badge';
 import VideoPreview from './VideoPreview';
 import { Skeleton } from '../ui/skeleton';
@@ -86,11 +87,11 @@ const BackgroundVideoManagement = () => {
       return;
     }
 
-    // 检查文件大小 (限制为 50MB)
-    const maxSize = 50 * 1024 * 1024; // 50MB
+    // 检查文件大小 (限制为 500MB，与后端 BACKGROUND_VIDEO_MAX_SIZE 一致)
+    const maxSize = 500 * 1024 * 1024; // 500MB
     if (file.size > maxSize) {
       toast.error('文件过大', {
-        description: "视频文件大小不能超过 50MB"
+        description: "视频文件大小不能超过 500MB"
       });
       return;
     }
@@ -99,20 +100,12 @@ const BackgroundVideoManagement = () => {
     setUploadProgress(0);
     setUploadError(null);
 
-    const formData = new FormData();
-    formData.append('video', file);
-    formData.append('mode', mode);
-
     try {
-      const response = await axios.post(`${API_BASE_URL}/api/admin/upload/video`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data'
-        },
-        withCredentials: true, // 确保请求带上cookie
-        onUploadProgress: (progressEvent) => {
-          const percentCompleted = Math.round((progressEvent.loaded * 100) / progressEvent.total);
-          setUploadProgress(percentCompleted);
-        }
+      // 分片上传，网络中断时自动续传
+      await chunkedUpload(file, {
+        type: 'background',
+        mode,
+        onProgress: setUploadProgress
       });
 
       toast.success('上传成功', {
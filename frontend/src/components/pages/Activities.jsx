@@ -20,7 +20,7 @@ import {
 } from 'lucide-react'
 import { motion } from 'framer-motion'
 import { useAuth } from '../../contexts/AuthContext'
-import { API_BASE_URL } from '../../lib/utils'
+import { API_BASE_URL, imageUtils } from '../../lib/utils'
 
 const Activities = () => {
   const { apiAvailable } = useAuth()
@@ -414,6 +414,9 @@ const Activities = () => {
                         <div className="absolute inset-0 overflow-hidden rounded-t-lg">
                           <img
                             src={activity.image_url ? `${API_BASE_URL}${activity.image_url}` : '/images/activities/default.jpg'} 
+                            srcSet={imageUtils.getSrcSet(activity.image_url)}
+                            sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                            loading="lazy"
                             alt={activity.title}
                             className="w-full h-full object-cover transition-transform duration-300 hover:scale-105"
                             onError={(e) => {
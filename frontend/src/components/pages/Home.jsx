@@ -6,7 +6,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '../ui/card';
 import { Button } from '../ui/button';
 import { Skeleton } from '../ui/skeleton';
 import { useTheme } from '../../contexts/ThemeContext';
-import { API_BASE_URL, formatDate } from '../../lib/utils';
+import { API_BASE_URL, formatDate, imageUtils } from '../../lib/utils';
 import axios from 'axios';
 import { toast } from 'sonner';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -20,10 +20,10 @@ const SkeletonCard = ({ isActivity = false }) => (
 );
 const NoData = ({ type }) => <div className="col-span-full text-center py-8 text-muted-foreground">暂无{type}</div>;
 const NewsCard = ({ item, getCategoryLabel }) => (
-  <Link to={`/news/${item.id}`} className="block group"><Card className="h-full overflow-hidden transition-all duration-300 group-hover:shadow-xl"><div className="relative aspect-[16/9] overflow-hidden"><img src={item.image_url ? `${API_BASE_URL}${item.image_url}` : '/images/news/default.jpg'} alt={item.title} className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-105" onError={(e) => { e.target.src = '/images/news/default.jpg'; }} /><Badge variant="category" className="absolute top-3 left-3">{getCategoryLabel(item.category)}</Badge></div><CardHeader><CardTitle className="line-clamp-2 text-xl">{item.title}</CardTitle><p className="text-sm text-muted-foreground">{formatDate(item.published_at)}</p></CardHeader><CardContent><p className="line-clamp-3 text-muted-foreground">{item.content || '暂无内容摘要'}</p></CardContent></Card></Link>
+  <Link to={`/news/${item.id}`} className="block group"><Card className="h-full overflow-hidden transition-all duration-300 group-hover:shadow-xl"><div className="relative aspect-[16/9] overflow-hidden"><img src={item.image_url ? `${API_BASE_URL}${item.image_url}` : '/images/news/default.jpg'} srcSet={imageUtils.getSrcSet(item.image_url)} sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" loading="lazy" alt={item.title} className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-105" onError={(e) => { e.target.src = '/images/news/default.jpg'; }} /><Badge variant="category" className="absolute top-3 left-3">{getCategoryLabel(item.category)}</Badge></div><CardHeader><CardTitle className="line-clamp-2 text-xl">{item.title}</CardTitle><p className="text-sm text-muted-foreground">{formatDate(item.published_at)}</p></CardHeader><CardContent><p className="line-clamp-3 text-muted-foreground">{item.content || '暂无内容摘要'}</p></CardContent></Card></Link>
 );
 const ActivityCard = ({ item, getActivityCategoryLabel, getActivityStatus }) => (
-  <Link to={`/activities/${item.id}`} className="block group"><Card className="h-full overflow-hidden transition-all duration-300 group-hover:shadow-xl"><div className="relative aspect-video overflow-hidden"><img src={item.image_url ? `${API_BASE_URL}${item.image_url}` : '/images/activities/default.jpg'} alt={item.title} className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-105" onError={(e) => { e.target.src = '/images/activities/default.jpg'; }} />{item.category && <Badge variant="category" className="absolute top-3 left-3">{getActivityCategoryLabel(item.category)}</Badge>}</div><CardHeader><CardTitle className="line-clamp-2 text-xl">{item.title}</CardTitle><div className="flex items-center text-sm text-muted-foreground mt-2 space-x-4"><Badge variant={getActivityStatus(item).variant}>{getActivityStatus(item).label}</Badge><div className="flex items-center"><Calendar className="mr-1 h-4 w-4" />{formatDate(item.start_time, 'MM月DD日 HH:mm')}</div></div></CardHeader><CardContent><p className="line-clamp-3 text-muted-foreground mb-4">{item.description || '暂无活动描述'}</p><div className="flex items-center text-sm text-muted-foreground"><MapPin className="mr-1 h-4 w-4" />{item.location}</div></CardContent></Card></Link>
+  <Link to={`/activities/${item.id}`} className="block group"><Card className="h-full overflow-hidden transition-all duration-300 group-hover:shadow-xl"><div className="relative aspect-video overflow-hidden"><img src={item.image_url ? `${API_BASE_URL}${item.image_url}` : '/images/activities/default.jpg'} srcSet={imageUtils.getSrcSet(item.image_url)} sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" loading="lazy" alt={item.title} className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-105" onError={(e) => { e.target.src = '/images/activities/default.jpg'; }} />{item.category && <Badge variant="category" className="absolute top-3 left-3">{getActivityCategoryLabel(item.category)}</Badge>}</div><CardHeader><CardTitle className="line-clamp-2 text-xl">{item.title}</CardTitle><div className="flex items-center text-sm text-muted-foreground mt-2 space-x-4"><Badge variant={getActivityStatus(item).variant}>{getActivityStatus(item).label}</Badge><div className="flex items-center"><Calendar className="mr-1 h-4 w-4" />{formatDate(item.start_time, 'MM月DD日 HH:mm')}</div></div></CardHeader><CardContent><p className="line-clamp-3 text-muted-foreground mb-4">{item.description || '暂无活动描述'}</p><div className="flex items-center text-sm text-muted-foreground"><MapPin className="mr-1 h-4 w-4" />{item.location}</div></CardContent></Card></Link>
 );
 
 const Home = () => {
@@ -15,7 +15,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../ui/tabs'
 import { motion } from 'framer-motion'
 import { Calendar, Clock, User, Newspaper, ServerCrash, Search, Filter, RefreshCw } from 'lucide-react'
 import { useAuth } from '../../contexts/AuthContext'
-import { API_BASE_URL } from '../../lib/utils'
+import { API_BASE_URL, imageUtils } from '../../lib/utils'
 
 const News = () => {
   const { apiAvailable } = useAuth()
@@ -316,6 +316,9 @@ const News = () => {
                         <div className="absolute inset-0 overflow-hidden rounded-t-lg">
                           <img
                             src={item.image_url ? `${API_BASE_URL}${item.image_url}` : '/images/news/default.jpg'} 
+                            srcSet={imageUtils.getSrcSet(item.image_url)}
+                            sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                            loading="lazy"
                             alt={item.title}
                             className="w-full h-full object-cover transition-transform duration-300 hover:scale-105"
                             onError={(e) => {
@@ -99,11 +99,14 @@ const NewsDetail = () => {
     if (!news || !news.video_url) return null;
 
     if (news.video_source === 'local') {
-      // 本地上传的视频
+      // 本地上传的视频：浏览器原生支持HLS（iOS Safari、安卓Chrome）时播放自适应码率版本，否则播放原视频
+      const canPlayHls = typeof document !== 'undefined' &&
+        document.createElement('video').canPlayType('application/vnd.apple.mpegurl') !== '';
+      const videoUrl = (canPlayHls && news.video_playlist_url) || news.video_fallback_url || news.video_url;
       return (
         <div className="aspect-video w-full rounded-lg overflow-hidden mb-6">
           <video 
-            src={`${API_BASE_URL}${news.video_url}`} 
+            src={`${API_BASE_URL}${videoUrl}`} 
             controls 
             className="w-full h-full"
             preload="metadata"
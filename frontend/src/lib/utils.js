@@ -157,6 +157,39 @@ export const videoUtils = {
   }
 };
 
+/**
+ * 图片工具函数，配合后端 ?w= 尺寸变体使用
+ */
+export const imageUtils = {
+  // 与后端 WIDTH_BUCKETS 保持一致
+  widths: [320, 480, 640, 960, 1280],
+
+  /**
+   * 获取指定宽度的图片URL
+   * @param {string} imageUrl 后端返回的图片路径
+   * @param {number} width 宽度
+   * @returns {string} 图片URL
+   */
+  getVariantUrl: (imageUrl, width) => {
+    if (!imageUrl) return '';
+    const fullUrl = imageUrl.startsWith('http') ? imageUrl : `${API_BASE_URL}${imageUrl}`;
+    const separator = fullUrl.includes('?') ? '&' : '?';
+    return `${fullUrl}${separator}w=${width}`;
+  },
+
+  /**
+   * 生成srcset属性，仅对后端static目录下的图片生效
+   * @param {string} imageUrl 后端返回的图片路径
+   * @returns {string|undefined} srcset字符串
+   */
+  getSrcSet: (imageUrl) => {
+    if (!imageUrl || !imageUrl.startsWith('/static/') || /\.gif$/i.test(imageUrl)) return undefined;
+    return imageUtils.widths
+      .map((width) => `${imageUtils.getVariantUrl(imageUrl, width)} ${width}w`)
+      .join(', ');
+  }
+};
+
 // 格式化日期时间函数
 export function formatDateTime(dateString) {
   if (!dateString) return '';
@@ -0,0 +1,57 @@
+import axios from 'axios';
+import { API_BASE_URL } from '../lib/utils';
+
+/**
+ * 分片上传大文件，单个分片失败时从服务端记录的偏移量自动续传
+ * @param {File} file - 要上传的文件
+ * @param {Object} options - { type: 'background' | 'news', mode, onProgress, maxRetries }
+ * @returns {Promise<Object>} 完成接口返回的数据，与普通上传接口一致
+ */
+export const chunkedUpload = async (file, { type = 'background', mode, onProgress, maxRetries = 5 } = {}) => {
+  const baseUrl = `${API_BASE_URL}/api/admin/upload/chunked`;
+  const config = { withCredentials: true };
+
+  // 创建上传会话
+  const { data: session } = await axios.post(baseUrl, {
+    filename: file.name,
+    size: file.size,
+    type,
+    mode
+  }, config);
+
+  const uploadUrl = `${baseUrl}/${session.upload_id}`;
+  const chunkSize = session.chunk_size;
+  let offset = session.offset;
+  let retries = 0;
+
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + chunkSize);
+    try {
+      const { data } = await axios.put(`${uploadUrl}?offset=${offset}`, chunk, {
+        ...config,
+        headers: { 'Content-Type': 'application/octet-stream' }
+      });
+      offset = data.offset;
+      retries = 0;
+      if (onProgress) {
+        onProgress(Math.round((offset * 100) / file.size));
+      }
+    } catch (error) {
+      retries += 1;
+      if (retries > maxRetries) {
+        throw error;
+      }
+      // 以服务端实际收到的字节数为准继续上传
+      const serverOffset = error.response?.data?.offset;
+      if (typeof serverOffset === 'number') {
+        offset = serverOffset;
+      } else {
+        const { data: status } = await axios.get(uploadUrl, config);
+        offset = status.offset;
+      }
+    }
+  }
+
+  const { data: result } = await axios.post(`${uploadUrl}/complete`, {}, config);
+  return result;
+};